@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Benchmark DOI lookups through the doi.org redirect vs. learned direct routes.
+
+Usage:
+    python benchmarks/bench_doi_routing.py [--dois 200] [--prefixes 4] [--latency 20]
+
+Runs against two local stub servers, a resolver redirecting to an agency
+endpoint, each adding --latency milliseconds per request to stand in for the
+network round trip. Prints the mean and p95 latency per lookup on both paths.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from pdf_metadata_enhancer.resolver import DoiResolver
+
+
+def start_servers(latency: float) -> tuple[list[ThreadingHTTPServer], str]:
+    """Start the stub resolver and agency; return them and the resolver URL."""
+    agency_url = ""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep connections alive, as real servers do
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+    class Resolver(Handler):
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(302)
+            self.send_header("Location", f"{agency_url}/works{self.path}/transform")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    class Agency(Handler):
+        def do_GET(self):
+            time.sleep(latency)
+            doi = self.path.removeprefix("/works/").removesuffix("/transform")
+            body = json.dumps({"DOI": doi, "title": f"Title {doi}"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.citationstyles.csl+json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    servers = [ThreadingHTTPServer(("127.0.0.1", 0), h) for h in (Resolver, Agency)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    agency_url = f"http://127.0.0.1:{servers[1].server_address[1]}"
+    return servers, f"http://127.0.0.1:{servers[0].server_address[1]}"
+
+
+def run(resolver: DoiResolver, dois: list[str]) -> list[float]:
+    """Look up all DOIs one after another and return the latency of each in ms."""
+    latencies = []
+    for doi in dois:
+        start = time.perf_counter()
+        resolver(doi)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dois", type=int, default=200, help="Number of DOIs looked up")
+    parser.add_argument("--prefixes", type=int, default=4, help="Distinct DOI prefixes")
+    parser.add_argument(
+        "--latency", type=float, default=20.0, help="Simulated ms per request and server"
+    )
+    args = parser.parse_args()
+
+    servers, resolver_url = start_servers(args.latency / 1000)
+    dois = [f"10.{5000 + i % args.prefixes}/bench-{i}" for i in range(args.dois)]
+    try:
+        results = {}
+        for label, learn in (("via doi.org", False), ("direct route", True)):
+            resolver = DoiResolver(resolver_url=resolver_url, learn=learn)
+            latencies = run(resolver, dois)
+            results[label] = statistics.mean(latencies)
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(
+                f"{label:>14}: {results[label]:7.1f} ms mean, {p95:7.1f} ms p95 "
+                f"({resolver.stats['resolver']} resolver hop(s))"
+            )
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    speedup = results["via doi.org"] / results["direct route"]
+    print(
+        f"{'speedup':>14}: {speedup:7.2f}x "
+        f"({args.dois} DOIs, {args.prefixes} prefixes, {args.latency:g} ms per request)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Benchmark enhance_pdf_metadata with and without the direct XMP writer.
+
+Usage:
+    python benchmarks/bench_xmp_fast_path.py [--files 200] [--pages 1]
+
+Prints files/second for small generated PDFs on both paths.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import pikepdf
+
+from pdf_metadata_enhancer.pdf_enhancer import enhance_pdf_metadata
+
+METADATA = {
+    "DOI": "10.21255/sgb-01-406352",
+    "title": "Stadt.Geschichte.Basel: Benchmark Document",
+    "author": [{"family": "Muster", "given": "Anna"}, {"family": "Beispiel", "given": "Ben"}],
+    "subject": ["History", "Basel"],
+    "publisher": "Stadt.Geschichte.Basel",
+    "abstract": "A short abstract used to benchmark metadata embedding.",
+    "copyright": "CC BY 4.0",
+    "language": "de",
+}
+
+
+def run(inputs: list[Path], out_dir: Path, fast_xmp: bool) -> float:
+    """Enhance all inputs once and return files/second."""
+    start = time.perf_counter()
+    for i, input_pdf in enumerate(inputs):
+        enhance_pdf_metadata(str(input_pdf), out_dir / f"{i}.pdf", METADATA, fast_xmp=fast_xmp)
+    return len(inputs) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200, help="Number of PDFs per run")
+    parser.add_argument("--pages", type=int, default=1, help="Pages per generated PDF")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path (best is reported)")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        inputs = []
+        for i in range(args.files):
+            pdf = pikepdf.Pdf.new()
+            for _ in range(args.pages):
+                pdf.add_blank_page()
+            path = tmp / f"input-{i}.pdf"
+            pdf.save(path)
+            inputs.append(path)
+
+        out_dir = tmp / "out"
+        out_dir.mkdir()
+        results = {}
+        for label, fast_xmp in (("open_metadata", False), ("direct XMP", True)):
+            results[label] = max(run(inputs, out_dir, fast_xmp) for _ in range(args.repeat))
+            print(f"{label:>14}: {results[label]:8.1f} files/s")
+
+        speedup = results["direct XMP"] / results["open_metadata"]
+        print(f"{'speedup':>14}: {speedup:8.2f}x ({args.files} PDFs, {args.pages} page(s) each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""Module providing asyncio counterparts of the fetch, enhance and batch APIs."""
+
+import asyncio
+from collections import deque
+from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Mapping,
+    Sequence,
+)
+from concurrent.futures import Executor
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import aiohttp
+
+from .batch import EnhanceResult, ProvenanceSink, enhance_one, plan_mapping
+from .hashing import DEFAULT_ALGORITHMS
+from .layout import OutputLayout
+from .metadata_fetcher import (
+    REQUEST_HEADERS,
+    TRANSIENT_STATUS_CODES,
+    MetadataFetchError,
+    check_metadata,
+    doi_to_url,
+)
+from .metadata_store import MetadataStore
+from .pdf_enhancer import DEFAULT_SAVE_PROFILE, check_save_profile, enhance_pdf_metadata
+from .retry import is_transient
+from .sidecar import write_sidecar
+
+AsyncFetcher = Callable[..., Awaitable[dict[str, Any]]]
+
+
+def open_session(limit: int = 16, timeout: float = 30.0) -> aiohttp.ClientSession:
+    """
+    Create an HTTP session for fetch_metadata_async.
+
+    One session should be shared by all fetches, so connections are reused.
+    Close it with ``await session.close()`` or use it as an async context manager.
+
+    Args:
+        limit: Maximum number of simultaneous connections
+        timeout: Total timeout per request in seconds
+
+    Returns:
+        aiohttp client session sending the CSL-JSON request headers
+    """
+    return aiohttp.ClientSession(
+        headers=REQUEST_HEADERS,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        connector=aiohttp.TCPConnector(limit=limit),
+    )
+
+
+async def fetch_metadata_async(
+    doi: str, session: aiohttp.ClientSession, verbose: bool = False
+) -> dict[str, Any]:
+    """
+    Fetch metadata from a DOI using HTTP content negotiation, without blocking.
+
+    Args:
+        doi: The DOI identifier (e.g., "10.21255/sgb-01-406352")
+        session: Shared session, see open_session
+        verbose: Enable verbose output
+
+    Returns:
+        Dictionary containing CSL-JSON metadata
+
+    Raises:
+        MetadataFetchError: If the fetch fails; ``transient`` tells whether a
+            later retry may succeed (network errors, 429, 5xx)
+    """
+    doi_url = doi_to_url(doi)
+
+    try:
+        if verbose:
+            print(f"  → Fetching metadata from: {doi_url}")
+
+        async with session.get(doi_url, headers=REQUEST_HEADERS, allow_redirects=True) as response:
+            response.raise_for_status()
+            # doi.org answers with the CSL-JSON media type, not application/json
+            metadata = await response.json(content_type=None)
+
+    except aiohttp.ClientResponseError as e:
+        raise MetadataFetchError(
+            f"Failed to fetch metadata for DOI {doi}: {e.status}, {e.message}",
+            transient=e.status in TRANSIENT_STATUS_CODES,
+        ) from e
+    except (aiohttp.ClientConnectionError, TimeoutError) as e:
+        raise MetadataFetchError(
+            f"Failed to fetch metadata for DOI {doi}: {e!r}", transient=True
+        ) from e
+    except aiohttp.ClientError as e:
+        raise MetadataFetchError(f"Failed to fetch metadata for DOI {doi}: {e}") from e
+    except ValueError as e:
+        raise MetadataFetchError(f"Invalid metadata for DOI {doi}: {e}") from e
+
+    return check_metadata(doi, metadata, verbose)
+
+
+async def enhance_pdf_metadata_async(
+    input_pdf_path: str,
+    output_pdf_path: Path,
+    metadata: dict[str, Any],
+    *,
+    executor: Executor | None = None,
+    verbose: bool = False,
+    fast_xmp: bool = True,
+    save_profile: str = DEFAULT_SAVE_PROFILE,
+) -> None:
+    """
+    Enhance a PDF file with metadata from CSL-JSON on an executor.
+
+    Args:
+        input_pdf_path: Path to input PDF file
+        output_pdf_path: Path for output PDF file
+        metadata: CSL-JSON metadata dictionary
+        executor: Executor running the pikepdf work (default: the loop's default executor)
+        verbose: Enable verbose output
+        fast_xmp: Write the XMP packet directly when that loses no existing metadata
+        save_profile: Name of the save profile in pdf_enhancer.SAVE_PROFILES
+    """
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        executor,
+        partial(
+            enhance_pdf_metadata,
+            input_pdf_path,
+            output_pdf_path,
+            metadata,
+            verbose=verbose,
+            fast_xmp=fast_xmp,
+            save_profile=save_profile,
+        ),
+    )
+
+
+class _Prefetched:
+    """Fetcher handing out metadata that was already fetched; picklable for process pools."""
+
+    def __init__(self, metadata: dict[str, Any]):
+        self.metadata = metadata
+
+    def __call__(self, doi: str, verbose: bool = False) -> dict[str, Any]:
+        return self.metadata
+
+
+async def enhance_one_async(
+    mapping: Mapping[str, str],
+    out_dir: Path,
+    *,
+    session: aiohttp.ClientSession,
+    fetcher: AsyncFetcher = fetch_metadata_async,
+    executor: Executor | None = None,
+    verbose: bool = False,
+    **options: Any,
+) -> EnhanceResult:
+    """
+    Fetch metadata for one mapping, enhance its PDF and record provenance.
+
+    The fetch runs on the event loop; enhancing and hashing run on the executor.
+    Never raises for per-file problems; failures are reported in the result.
+
+    Args:
+        mapping: Dictionary with 'pdf' and 'doi' keys
+        out_dir: Output directory for the enhanced PDF
+        session: Shared session passed to the fetcher
+        fetcher: Coroutine function returning CSL-JSON for a DOI
+            (called as ``fetcher(doi, session, verbose=...)``)
+        executor: Executor running the blocking work (default: the loop's default executor)
+        verbose: Enable verbose output
+        **options: Further keyword arguments for batch.enhance_one, e.g. sink,
+            algorithms, output_pdf_path, metadata_store or save_profile
+
+    Returns:
+        Result record for the mapping
+    """
+    result = EnhanceResult(pdf=mapping["pdf"], doi=mapping["doi"], stage="fetch")
+    start = perf_counter()
+    try:
+        metadata = await fetcher(mapping["doi"], session, verbose=verbose)
+    except Exception as e:
+        result.fetch_seconds = perf_counter() - start
+        result.error = str(e)
+        result.transient = is_transient(e)
+        return result
+    fetch_seconds = perf_counter() - start
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(
+        executor,
+        partial(
+            enhance_one,
+            mapping,
+            out_dir,
+            fetcher=_Prefetched(metadata),
+            verbose=verbose,
+            **options,
+        ),
+    )
+    result.fetch_seconds = fetch_seconds
+    return result
+
+
+async def enhance_many_async(
+    mappings: Iterable[Mapping[str, str]] | AsyncIterable[Mapping[str, str]],
+    out_dir: Path,
+    *,
+    session: aiohttp.ClientSession | None = None,
+    fetcher: AsyncFetcher = fetch_metadata_async,
+    executor: Executor | None = None,
+    concurrency: int = 8,
+    sink: ProvenanceSink = write_sidecar,
+    algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    layout: OutputLayout | None = None,
+    metadata_store: MetadataStore | None = None,
+    save_profile: str = DEFAULT_SAVE_PROFILE,
+    verbose: bool = False,
+) -> AsyncIterator[EnhanceResult]:
+    """
+    Enhance PDFs for many PDF-DOI mappings from an event loop.
+
+    At most ``concurrency`` mappings are in flight at a time; results are
+    yielded in input order. Closing the iterator (``aclose()``, e.g. through
+    ``contextlib.aclosing`` after a ``break``) or cancelling the consuming
+    task cancels the mappings still in flight; work already running on the
+    executor finishes in the background.
+
+    Example:
+        async with open_session() as session:
+            batch = enhance_many_async(mappings, Path("out"), session=session)
+            async with aclosing(batch):
+                async for result in batch:
+                    print(result.pdf, result.status)
+
+    Args:
+        mappings: Iterable or async iterable of dictionaries with 'pdf' and 'doi' keys
+        out_dir: Output directory for enhanced PDFs and sidecar files
+        session: Shared session (default: one opened with open_session for this batch)
+        fetcher: Coroutine function returning CSL-JSON for a DOI
+            (called as ``fetcher(doi, session, verbose=...)``)
+        executor: Executor running the blocking work (default: the loop's default executor)
+        concurrency: Maximum number of mappings in flight
+        sink: Provenance sink receiving each record (default: JSON sidecar files)
+        algorithms: Digests recorded in the provenance, see hashing.normalize_algorithms
+        layout: Output layout resolving each output path (default: flat layout in out_dir)
+        metadata_store: Store metadata once by digest instead of embedding it per record
+        save_profile: Save profile for the enhanced PDFs, see pdf_enhancer.SAVE_PROFILES
+        verbose: Enable verbose output
+
+    Yields:
+        One EnhanceResult per mapping
+
+    Raises:
+        ValueError: If the save profile is unknown or concurrency is below 1
+    """
+    check_save_profile(save_profile)
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if layout is None:
+        layout = OutputLayout(out_dir)
+
+    own_session = session is None
+    if own_session:
+        session = open_session()
+    loop = asyncio.get_running_loop()
+    pending: deque[asyncio.Future] = deque()
+
+    plan = partial(plan_mapping, layout=layout, algorithms=algorithms, save_profile=save_profile)
+
+    async def process(mapping: Mapping[str, str], options: dict[str, Any]) -> EnhanceResult:
+        return await enhance_one_async(
+            mapping,
+            out_dir,
+            session=session,
+            fetcher=fetcher,
+            executor=executor,
+            verbose=verbose,
+            sink=sink,
+            algorithms=algorithms,
+            metadata_store=metadata_store,
+            save_profile=save_profile,
+            **options,
+        )
+
+    async def failed(mapping: Mapping[str, str], error: Exception) -> EnhanceResult:
+        return EnhanceResult(pdf=mapping["pdf"], doi=mapping["doi"], error=str(error))
+
+    try:
+        async for mapping in _aiter(mappings):
+            if len(pending) >= concurrency:
+                yield await pending.popleft()
+
+            # Output paths are resolved here, in input order, so that collision
+            # suffixes do not depend on which fetch finishes first
+            try:
+                if layout.needs_input_digest:
+                    # Hashing the input must not block the loop
+                    options = await loop.run_in_executor(executor, plan, mapping)
+                else:
+                    options = plan(mapping)
+            except Exception as e:
+                pending.append(asyncio.ensure_future(failed(mapping, e)))
+            else:
+                pending.append(asyncio.ensure_future(process(mapping, options)))
+
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if own_session:
+            await session.close()
+
+
+async def _aiter(
+    mappings: Iterable[Mapping[str, str]] | AsyncIterable[Mapping[str, str]],
+) -> AsyncIterator[Mapping[str, str]]:
+    if isinstance(mappings, AsyncIterable):
+        async for mapping in mappings:
+            yield mapping
+    else:
+        for mapping in mappings:
+            yield mapping
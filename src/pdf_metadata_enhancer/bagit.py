@@ -0,0 +1,183 @@
+"""Module for packaging enhanced PDFs and provenance as BagIt bags."""
+
+import hashlib
+import io
+import json
+import tarfile
+import threading
+import time
+from collections.abc import Sequence
+from datetime import date
+from pathlib import Path, PurePosixPath
+from typing import Any
+
+from .hashing import DEFAULT_ALGORITHMS
+
+BAGIT_VERSION = "1.0"
+# Digests BagIt manifests may use; only those recorded in the provenance are written
+BAGIT_ALGORITHMS = ("md5", "sha1", "sha256", "sha512")
+
+
+class BagWriter:
+    """
+    Provenance sink writing enhanced PDFs and their sidecars into a BagIt bag.
+
+    The payload manifests are filled from the digests create_sidecar records,
+    so no file is hashed twice. The bag is either a directory (the PDFs are
+    written straight into ``<root>/data``) or a tar stream: PDFs are staged in
+    ``<root>/data``, appended to the tar as soon as their record arrives and
+    removed again, and sidecars go into the tar from memory. Tag files are
+    written on close. Safe to share between worker threads.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+        tar_path: Path | None = None,
+        bag_info: dict[str, str] | None = None,
+    ):
+        """
+        Start a bag.
+
+        Args:
+            root: Bag directory, or the staging directory when writing a tar stream
+            algorithms: Digests recorded by create_sidecar; the BagIt ones get a manifest
+            tar_path: Write the bag as a tar stream to this file (compressed for
+                .tar.gz, .tgz, .tar.bz2 and .tar.xz) instead of a directory
+            bag_info: Additional bag-info.txt fields
+        """
+        self.root = root
+        self.tar_path = tar_path
+        self.algorithms = [name for name in algorithms if name in BAGIT_ALGORITHMS]
+        if "sha256" not in self.algorithms:
+            self.algorithms.insert(0, "sha256")
+        self.bag_info = dict(bag_info or {})
+        self.payload_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._manifests: dict[str, list[str]] = {name: [] for name in self.algorithms}
+        self._payload_bytes = 0
+        self._payload_files = 0
+        self._tag_files: dict[str, bytes] = {}
+        self._closed = False
+        self._tar = None
+        self._prefix = PurePosixPath()
+        if tar_path is not None:
+            self._prefix = PurePosixPath(_bag_name(tar_path))
+            self._tar = tarfile.open(str(tar_path), f"w|{_tar_compression(tar_path)}")
+        self._write_tag_file(
+            "bagit.txt", f"BagIt-Version: {BAGIT_VERSION}\nTag-File-Character-Encoding: UTF-8\n"
+        )
+
+    @property
+    def payload_dir(self) -> Path:
+        """Directory enhanced PDFs are written to."""
+        return self.root / "data"
+
+    def __call__(self, sidecar_data: dict[str, Any], sidecar_path: Path) -> str:
+        output = sidecar_data["output"]
+        output_path = Path(output["path"])
+        pdf_name = self._bag_path(output_path)
+        sidecar_name = self._bag_path(sidecar_path)
+        sidecar_bytes = json.dumps(sidecar_data, indent=2, ensure_ascii=False).encode("utf-8")
+        sidecar_digests = {
+            name: hashlib.new(name, sidecar_bytes).hexdigest() for name in self.algorithms
+        }
+        pdf_size = output_path.stat().st_size
+
+        with self._lock:
+            if self._tar is None:
+                sidecar_path.write_bytes(sidecar_bytes)
+            else:
+                self._tar.add(output_path, arcname=str(self._prefix / pdf_name))
+                self._add_to_tar(sidecar_name, sidecar_bytes)
+                output_path.unlink()
+
+            for name in self.algorithms:
+                self._manifests[name].append(f"{output[name]}  {_encode_path(pdf_name)}\n")
+                self._manifests[name].append(
+                    f"{sidecar_digests[name]}  {_encode_path(sidecar_name)}\n"
+                )
+            self._payload_bytes += pdf_size + len(sidecar_bytes)
+            self._payload_files += 2
+
+        if self._tar is None:
+            return str(sidecar_path)
+        return f"{self.tar_path}:{self._prefix / sidecar_name}"
+
+    def close(self) -> None:
+        """Write bag-info.txt, the manifests and the tag manifests, and finish the bag."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            info = {
+                "Bagging-Date": date.today().isoformat(),
+                "Payload-Oxum": f"{self._payload_bytes}.{self._payload_files}",
+                "Bag-Software-Agent": "pdf-metadata-enhancer/0.1.0",
+                **self.bag_info,
+            }
+            self._write_tag_file(
+                "bag-info.txt", "".join(f"{key}: {value}\n" for key, value in info.items())
+            )
+            for name, lines in self._manifests.items():
+                self._write_tag_file(f"manifest-{name}.txt", "".join(lines))
+
+            tag_files = dict(self._tag_files)
+            for name in self.algorithms:
+                lines = [
+                    f"{hashlib.new(name, data).hexdigest()}  {path}\n"
+                    for path, data in tag_files.items()
+                ]
+                self._write_tag_file(f"tagmanifest-{name}.txt", "".join(lines))
+
+            if self._tar is not None:
+                self._tar.close()
+
+    def _bag_path(self, path: Path) -> PurePosixPath:
+        return PurePosixPath(path.relative_to(self.root).as_posix())
+
+    def _write_tag_file(self, name: str, text: str) -> None:
+        data = text.encode("utf-8")
+        self._tag_files[name] = data
+        if self._tar is None:
+            (self.root / name).write_bytes(data)
+        else:
+            self._add_to_tar(PurePosixPath(name), data)
+
+    def _add_to_tar(self, name: PurePosixPath, data: bytes) -> None:
+        info = tarfile.TarInfo(str(self._prefix / name))
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _encode_path(path: PurePosixPath) -> str:
+    """Percent-encode the characters BagIt manifests cannot hold literally."""
+    return str(path).replace("%", "%25").replace("\n", "%0A").replace("\r", "%0D")
+
+
+def _bag_name(tar_path: Path) -> str:
+    name = tar_path.name
+    for suffix in (".tar.gz", ".tgz", ".tar.bz2", ".tar.xz", ".tar"):
+        if name.endswith(suffix):
+            return name[: -len(suffix)] or "bag"
+    return name
+
+
+def _tar_compression(tar_path: Path) -> str:
+    name = tar_path.name
+    if name.endswith((".tar.gz", ".tgz")):
+        return "gz"
+    if name.endswith(".tar.bz2"):
+        return "bz2"
+    if name.endswith(".tar.xz"):
+        return "xz"
+    return ""
@@ -0,0 +1,555 @@
+"""Module for enhancing many PDFs through a reusable library API."""
+
+import traceback
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from time import perf_counter, sleep
+from typing import Any
+
+from .dedup import LINK_METHODS, ContentDeduplicator, link_or_copy
+from .hashing import DEFAULT_ALGORITHMS, hash_file
+from .layout import OutputLayout
+from .metadata_fetcher import fetch_metadata
+from .metadata_store import MetadataStore
+from .pdf_enhancer import DEFAULT_SAVE_PROFILE, check_save_profile, enhance_pdf_metadata
+from .progress import ProgressTracker
+from .retry import RetryScheduler, is_transient
+from .sidecar import create_sidecar, write_sidecar
+
+Fetcher = Callable[..., dict[str, Any] | None]
+ProvenanceSink = Callable[[dict[str, Any], Path], Any]
+
+# Mappings submitted to an executor at a time unless the caller says otherwise
+DEFAULT_MAX_IN_FLIGHT = 8
+
+
+@dataclass(slots=True)
+class EnhanceResult:
+    """Outcome of enhancing one PDF-DOI mapping; metadata is the CSL-JSON embedded."""
+
+    pdf: str
+    doi: str
+    status: str = "error"
+    stage: str | None = None
+    output: str | None = None
+    sidecar: str | None = None
+    input_sha256: str | None = None
+    output_sha256: str | None = None
+    error: str | None = None
+    transient: bool = False
+    attempts: int = 1
+    save_profile: str | None = None
+    duplicate_of: str | None = None
+    link_method: str | None = None
+    metadata: dict[str, Any] | None = None
+    input_bytes: int = 0
+    output_bytes: int = 0
+    fetch_seconds: float = 0.0
+    enhance_seconds: float = 0.0
+    sidecar_seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the mapping was processed successfully."""
+        return self.status == "ok"
+
+    @property
+    def total_seconds(self) -> float:
+        """Time spent on all stages."""
+        return self.fetch_seconds + self.enhance_seconds + self.sidecar_seconds
+
+
+def enhance_one(
+    mapping: Mapping[str, str],
+    out_dir: Path,
+    *,
+    fetcher: Fetcher = fetch_metadata,
+    sink: ProvenanceSink = write_sidecar,
+    verbose: bool = False,
+    algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    output_pdf_path: Path | None = None,
+    input_digests: dict[str, str] | None = None,
+    provenance: dict[str, Any] | None = None,
+    metadata_store: MetadataStore | None = None,
+    save_profile: str = DEFAULT_SAVE_PROFILE,
+    progress: ProgressTracker | None = None,
+) -> EnhanceResult:
+    """
+    Fetch metadata for one mapping, enhance its PDF and record provenance.
+
+    Never raises for per-file problems; failures are reported in the result.
+
+    Args:
+        mapping: Dictionary with 'pdf' and 'doi' keys
+        out_dir: Output directory for the enhanced PDF
+        fetcher: Callable returning CSL-JSON for a DOI; on failure it returns None
+            or raises (MetadataFetchError tells whether the failure is transient)
+        sink: Provenance sink receiving each record (default: JSON sidecar files)
+        verbose: Enable verbose output
+        algorithms: Digests recorded in the provenance, see hashing.normalize_algorithms
+        output_pdf_path: Output path for the enhanced PDF (default: out_dir / input name)
+        input_digests: Already computed input digests, to avoid hashing the input again
+        provenance: Additional fields recorded in the provenance record
+        metadata_store: Store metadata once by digest instead of embedding it per record
+        save_profile: Save profile for the enhanced PDF, see pdf_enhancer.SAVE_PROFILES
+        progress: Tracker counting the mapping's stages as in flight
+
+    Returns:
+        Result record for the mapping
+    """
+    pdf_path = mapping["pdf"]
+    doi = mapping["doi"]
+    result = EnhanceResult(pdf=pdf_path, doi=doi, save_profile=save_profile)
+
+    def enter(stage: str | None) -> None:
+        if progress is not None:
+            progress.stage_changed(result.stage, stage)
+        result.stage = stage
+
+    try:
+        if verbose:
+            print(f"\nProcessing: {pdf_path} (DOI: {doi})")
+
+        # Fetch metadata from DOI
+        enter("fetch")
+        start = perf_counter()
+        metadata = fetcher(doi, verbose=verbose)
+        result.fetch_seconds = perf_counter() - start
+
+        if metadata is None:
+            # The fetcher gives no reason, so a later attempt may still succeed
+            result.error = f"Failed to fetch metadata for DOI: {doi}"
+            result.transient = True
+            return result
+        result.metadata = metadata
+
+        # Determine output path
+        if output_pdf_path is None:
+            output_pdf_path = out_dir / Path(pdf_path).name
+        sidecar_path = output_pdf_path.with_name(f"{output_pdf_path.name}.json")
+        output_pdf_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Enhance PDF with metadata
+        enter("enhance")
+        start = perf_counter()
+        enhance_pdf_metadata(
+            pdf_path, output_pdf_path, metadata, verbose=verbose, save_profile=save_profile
+        )
+        result.enhance_seconds = perf_counter() - start
+        result.output = str(output_pdf_path)
+        result.input_bytes = Path(pdf_path).stat().st_size
+        result.output_bytes = output_pdf_path.stat().st_size
+
+        # Create sidecar file, remembering where the sink put it
+        enter("sidecar")
+        locations = []
+        start = perf_counter()
+        record = create_sidecar(
+            pdf_path,
+            output_pdf_path,
+            doi,
+            metadata,
+            sidecar_path,
+            verbose=verbose,
+            sink=lambda data, path: locations.append(sink(data, path)),
+            algorithms=algorithms,
+            input_digests=input_digests,
+            extra=provenance,
+            metadata_store=metadata_store,
+        )
+        result.sidecar_seconds = perf_counter() - start
+        result.sidecar = str(locations[0]) if locations and locations[0] else None
+        result.input_sha256 = record["input"]["sha256"]
+        result.output_sha256 = record["output"]["sha256"]
+
+        result.status = "ok"
+        enter(None)
+
+    except Exception as e:
+        result.error = str(e)
+        result.transient = is_transient(e)
+        if verbose:
+            traceback.print_exc()
+
+    finally:
+        # A failed mapping keeps its stage for reporting but is no longer in flight
+        if progress is not None and result.stage is not None:
+            progress.stage_changed(result.stage, None)
+
+    return result
+
+
+def enhance_duplicate(
+    mapping: Mapping[str, str],
+    primary: EnhanceResult,
+    *,
+    sink: ProvenanceSink = write_sidecar,
+    verbose: bool = False,
+    algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    output_pdf_path: Path,
+    input_digests: dict[str, str] | None = None,
+    provenance: dict[str, Any] | None = None,
+    metadata_store: MetadataStore | None = None,
+    save_profile: str = DEFAULT_SAVE_PROFILE,
+    progress: ProgressTracker | None = None,
+    link_methods: Sequence[str] = LINK_METHODS,
+) -> EnhanceResult:
+    """
+    Produce the output of a mapping whose input and DOI match an enhanced one.
+
+    Instead of fetching and enhancing again, the primary's output is
+    reflinked, hardlinked or copied (see dedup.link_or_copy), and the
+    provenance record holds the primary's metadata, i.e. exactly what is
+    embedded, and notes which output it duplicates. Never raises; failures
+    are reported in the result.
+
+    Args:
+        mapping: Dictionary with 'pdf' and 'doi' keys
+        primary: Successful result of the mapping with the same input bytes and DOI
+        sink: Provenance sink receiving the record (default: JSON sidecar files)
+        verbose: Enable verbose output
+        algorithms: Digests recorded in the provenance, see hashing.normalize_algorithms
+        output_pdf_path: Output path for the duplicate
+        input_digests: Already computed input digests, to avoid hashing the input again
+        provenance: Additional fields recorded in the provenance record
+        metadata_store: Store metadata once by digest instead of embedding it per record
+        save_profile: Save profile the primary was written with
+        progress: Tracker counting the mapping's stages as in flight
+        link_methods: Ways to produce the output, tried in order
+
+    Returns:
+        Result record for the mapping
+    """
+    pdf_path = mapping["pdf"]
+    doi = mapping["doi"]
+    result = EnhanceResult(pdf=pdf_path, doi=doi, save_profile=save_profile)
+
+    def enter(stage: str | None) -> None:
+        if progress is not None:
+            progress.stage_changed(result.stage, stage)
+        result.stage = stage
+
+    try:
+        if not primary.ok or primary.metadata is None:
+            raise ValueError(f"{primary.pdf} has no enhanced output to link")
+        metadata = result.metadata = primary.metadata
+
+        # Link the primary's output instead of enhancing again
+        enter("enhance")
+        start = perf_counter()
+        output_pdf_path.parent.mkdir(parents=True, exist_ok=True)
+        result.link_method = link_or_copy(Path(primary.output), output_pdf_path, link_methods)
+        result.enhance_seconds = perf_counter() - start
+        result.output = str(output_pdf_path)
+        result.duplicate_of = primary.output
+        result.input_bytes = primary.input_bytes
+        result.output_bytes = primary.output_bytes
+        if verbose:
+            print(f"  → Duplicate of {primary.pdf} ({result.link_method})")
+
+        enter("sidecar")
+        locations = []
+        start = perf_counter()
+        dedup = {"of": primary.output, "input": primary.pdf, "method": result.link_method}
+        record = create_sidecar(
+            pdf_path,
+            output_pdf_path,
+            doi,
+            metadata,
+            output_pdf_path.with_name(f"{output_pdf_path.name}.json"),
+            verbose=verbose,
+            sink=lambda data, path: locations.append(sink(data, path)),
+            algorithms=algorithms,
+            input_digests=input_digests,
+            extra={**(provenance or {}), "dedup": dedup},
+            metadata_store=metadata_store,
+            output_digests={"sha256": primary.output_sha256},
+        )
+        result.sidecar_seconds = perf_counter() - start
+        result.sidecar = str(locations[0]) if locations and locations[0] else None
+        result.input_sha256 = record["input"]["sha256"]
+        result.output_sha256 = record["output"]["sha256"]
+
+        result.status = "ok"
+        enter(None)
+
+    except Exception as e:
+        result.error = str(e)
+        result.transient = is_transient(e)
+        if verbose:
+            traceback.print_exc()
+
+    finally:
+        if progress is not None and result.stage is not None:
+            progress.stage_changed(result.stage, None)
+
+    return result
+
+
+def plan_mapping(
+    mapping: Mapping[str, str],
+    layout: OutputLayout,
+    algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    save_profile: str = DEFAULT_SAVE_PROFILE,
+) -> dict[str, Any]:
+    """
+    Resolve the output path of one mapping and the options to process it with.
+
+    Batch runners call this in input order, so that collision suffixes do not
+    depend on which worker finishes first.
+
+    Args:
+        mapping: Dictionary with 'pdf' and 'doi' keys
+        layout: Output layout resolving the output path
+        algorithms: Digests recorded in the provenance
+        save_profile: Save profile recorded in the provenance
+
+    Returns:
+        Keyword arguments for enhance_one (output_pdf_path, input_digests, provenance)
+    """
+    input_digests = None
+    if layout.needs_input_digest:
+        input_digests = hash_file(mapping["pdf"], algorithms)
+    output_pdf_path = layout.resolve(
+        mapping["pdf"], mapping["doi"], input_digests and input_digests["sha256"]
+    )
+    return {
+        "output_pdf_path": output_pdf_path,
+        "input_digests": input_digests,
+        "provenance": {"layout": layout.name, "save_profile": save_profile},
+    }
+
+
+def enhance_many(
+    mappings: Iterable[Mapping[str, str]],
+    out_dir: Path,
+    *,
+    fetcher: Fetcher = fetch_metadata,
+    executor: Executor | None = None,
+    sink: ProvenanceSink = write_sidecar,
+    max_in_flight: int | None = None,
+    algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    layout: OutputLayout | None = None,
+    metadata_store: MetadataStore | None = None,
+    retry: RetryScheduler | None = None,
+    save_profile: str = DEFAULT_SAVE_PROFILE,
+    progress: ProgressTracker | None = None,
+    dedup: ContentDeduplicator | None = None,
+    verbose: bool = False,
+) -> Iterator[EnhanceResult]:
+    """
+    Enhance PDFs for many PDF-DOI mappings.
+
+    Mappings are consumed lazily and results are yielded in input order. With
+    a retry scheduler, transiently failed mappings are parked and retried
+    while other mappings continue; their results are yielded once they
+    succeed or run out of attempts. With a deduplicator, a mapping whose input
+    bytes and DOI match an earlier one gets a link to that mapping's output
+    and its metadata (see enhance_duplicate) once the earlier one is done,
+    without occupying a worker while it waits; if the earlier one failed, it
+    is enhanced on its own.
+
+    Example:
+        for result in enhance_many(parse_input_file(path), Path("out")):
+            print(result.pdf, result.status, result.output_sha256)
+
+    Args:
+        mappings: Iterable of dictionaries with 'pdf' and 'doi' keys
+        out_dir: Output directory for enhanced PDFs and sidecar files
+        fetcher: Callable returning CSL-JSON for a DOI; on failure it returns None
+            or raises (MetadataFetchError tells whether the failure is transient)
+        executor: Executor to run mappings on (default: run sequentially)
+        sink: Provenance sink receiving each record (default: JSON sidecar files)
+        max_in_flight: Maximum submitted but unfinished mappings when using an
+            executor; about twice its worker count keeps every worker busy
+            (default: DEFAULT_MAX_IN_FLIGHT)
+        algorithms: Digests recorded in the provenance, see hashing.normalize_algorithms
+        layout: Output layout resolving each output path (default: flat layout in out_dir)
+        metadata_store: Store metadata once by digest instead of embedding it per record
+        retry: Scheduler for retrying transient failures (default: no retries)
+        save_profile: Save profile for the enhanced PDFs, see pdf_enhancer.SAVE_PROFILES
+        progress: Tracker counting mappings in flight per stage; yielded results
+            are recorded by the caller (see ProgressTracker.record)
+        dedup: Deduplicator detecting inputs already enhanced for the same DOI
+        verbose: Enable verbose output
+
+    Yields:
+        One EnhanceResult per mapping
+
+    Raises:
+        ValueError: If the save profile is unknown or max_in_flight is below 1. Errors reading mappings
+            (e.g. an invalid row) are raised after the results of all rows read
+            before are yielded; rows parked for a retry are then not retried
+            but yielded with their last failure.
+    """
+    check_save_profile(save_profile)
+    if max_in_flight is not None and max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if layout is None:
+        layout = OutputLayout(out_dir)
+    process = partial(
+        enhance_one,
+        out_dir=out_dir,
+        fetcher=fetcher,
+        sink=sink,
+        verbose=verbose,
+        algorithms=algorithms,
+        metadata_store=metadata_store,
+        save_profile=save_profile,
+        progress=progress,
+    )
+
+    plan = partial(plan_mapping, layout=layout, algorithms=algorithms, save_profile=save_profile)
+
+    def failed(mapping: Mapping[str, str], error: Exception) -> EnhanceResult:
+        return EnhanceResult(pdf=mapping["pdf"], doi=mapping["doi"], error=str(error))
+
+    def process_duplicate(
+        mapping: Mapping[str, str], primary: EnhanceResult, **options: Any
+    ) -> EnhanceResult:
+        if primary.ok:
+            duplicate = enhance_duplicate(
+                mapping,
+                primary,
+                sink=sink,
+                verbose=verbose,
+                algorithms=algorithms,
+                metadata_store=metadata_store,
+                save_profile=save_profile,
+                progress=progress,
+                link_methods=dedup.link_methods,
+                **options,
+            )
+            if duplicate.ok:
+                return duplicate
+        # The primary failed or its output is gone (e.g. streamed into a tar)
+        return process(mapping, **options)
+
+    def submit(
+        mapping: Mapping[str, str], options: dict[str, Any], primary: Future | None = None
+    ) -> Future:
+        if primary is not None:
+            return submit_duplicate(mapping, options, primary)
+        if executor is not None:
+            return executor.submit(process, mapping, **options)
+        future = Future()
+        future.set_result(process(mapping, **options))
+        return future
+
+    def submit_duplicate(
+        mapping: Mapping[str, str], options: dict[str, Any], primary: Future
+    ) -> Future:
+        # Only start the duplicate once its primary is done, so no worker
+        # blocks waiting for another
+        future = Future()
+
+        def start(primary: Future) -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                if executor is None:
+                    future.set_result(process_duplicate(mapping, primary.result(), **options))
+                    return
+                job = executor.submit(process_duplicate, mapping, primary.result(), **options)
+            except BaseException as e:
+                future.set_exception(e)
+                return
+            job.add_done_callback(partial(_copy_outcome, target=future))
+
+        primary.add_done_callback(start)
+        return future
+
+    if executor is None:
+        max_in_flight = 1
+    elif max_in_flight is None:
+        max_in_flight = DEFAULT_MAX_IN_FLIGHT
+
+    # Entries are (future, mapping, options, attempt)
+    pending = deque()
+    remaining = iter(mappings)
+    exhausted = False
+    input_error = None
+    try:
+        while True:
+            # Parked rows whose backoff has passed go first
+            if retry is not None and input_error is None:
+                for mapping, options, attempt, _ in retry.pop_ready():
+                    pending.append((submit(mapping, options), mapping, options, attempt))
+
+            if not exhausted and len(pending) < max_in_flight:
+                try:
+                    mapping = next(remaining, None)
+                except Exception as e:
+                    # Account for every row read so far before reporting the input error
+                    input_error = e
+                    exhausted = True
+                    continue
+                if mapping is None:
+                    exhausted = True
+                    continue
+                try:
+                    options = plan(mapping)
+                    primary = dedup.find(mapping, options, algorithms) if dedup else None
+                except Exception as e:
+                    future = Future()
+                    future.set_result(failed(mapping, e))
+                    options = None
+                else:
+                    future = submit(mapping, options, primary)
+                    if dedup is not None and primary is None:
+                        dedup.add(mapping, options, future)
+                pending.append((future, mapping, options, 1))
+                continue
+
+            if pending:
+                future, mapping, options, attempt = pending.popleft()
+                result = future.result()
+                result.attempts = attempt
+                if (
+                    retry is not None
+                    and input_error is None
+                    and not result.ok
+                    and result.transient
+                    and options is not None
+                    and retry.should_retry(attempt)
+                ):
+                    delay = retry.park((mapping, options, attempt + 1, result), attempt)
+                    if verbose:
+                        print(f"  ↻ Retrying {mapping['pdf']} in {delay:.1f}s: {result.error}")
+                    continue
+                yield result
+                continue
+
+            if retry is not None and len(retry):
+                if input_error is not None:
+                    # The run fails anyway; report parked rows instead of waiting for them
+                    for *_, result in retry.drain():
+                        yield result
+                    continue
+                # Only parked rows are left; wait for the next one to become ready
+                sleep(retry.next_ready_in())
+                continue
+
+            break
+    finally:
+        # Stop queued work if the caller abandons the iterator
+        for future, *_ in pending:
+            future.cancel()
+
+    if input_error is not None:
+        raise input_error
+
+
+def _copy_outcome(source: Future, target: Future) -> None:
+    """Complete the running target future like the finished source future."""
+    try:
+        result = source.result()
+    except BaseException as e:
+        target.set_exception(e)
+    else:
+        target.set_result(result)
@@ -1,14 +1,37 @@
 """Main CLI entry point for pdf-metadata-enhancer."""
 
+import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import UTC, datetime
 from pathlib import Path
 
 import click
 
-from .input_parser import parse_input_file
-from .metadata_fetcher import fetch_metadata_from_doi
-from .pdf_enhancer import enhance_pdf_metadata
-from .sidecar import create_sidecar
+from .bagit import BagWriter
+from .batch import enhance_many
+from .dedup import LINK_METHODS, ContentDeduplicator
+from .hashing import normalize_algorithms
+from .input_parser import detect_format, iter_input_file, write_mapping_file
+from .layout import LAYOUTS, OutputLayout
+from .metadata_fetcher import fetch_metadata
+from .metadata_store import MetadataStore
+from .pdf_enhancer import DEFAULT_SAVE_PROFILE, SAVE_PROFILES
+from .progress import ProgressReporter, ProgressTracker, count_in_background
+from .resolver import DoiResolver, load_routes
+from .retry import RetryScheduler
+from .server import EnhancementService, make_server
+from .shard import (
+    merge_shards,
+    parse_shard,
+    select_shard,
+    shard_name,
+    write_manifest,
+    write_shard_summary,
+)
+from .sidecar import JournalSink, write_sidecar
+from .verify import load_provenance_records, verify_records
 
 
 @click.group()
@@ -25,7 +48,8 @@ def cli():
     "input_file",
     required=True,
     type=click.Path(exists=True, path_type=Path),
-    help="Input CSV/TSV/JSONL file mapping PDFs to DOIs",
+    help="Input CSV/TSV/JSONL (optionally .gz/.bz2/.xz/.zst) or Parquet/Arrow file "
+    "mapping PDFs to DOIs",
 )
 @click.option(
     "--out-dir",
@@ -35,19 +59,181 @@ def cli():
     type=click.Path(path_type=Path),
     help="Output directory for enhanced PDFs and sidecar files",
 )
+@click.option(
+    "--workers",
+    "-w",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of PDFs processed concurrently",
+)
+@click.option(
+    "--layout",
+    type=click.Choice(LAYOUTS),
+    default="flat",
+    show_default=True,
+    help="Output directory layout: flat, mirror (input tree), sharded (ab/cd/<name>), "
+    "doi (<prefix>/<suffix>/<name>) or content (ab/cd/<input sha256>.pdf)",
+)
+@click.option(
+    "--input-root",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Root of the input tree mirrored by --layout mirror (default: current directory)",
+)
+@click.option(
+    "--save-profile",
+    type=click.Choice(list(SAVE_PROFILES)),
+    default=DEFAULT_SAVE_PROFILE,
+    show_default=True,
+    help="How enhanced PDFs are written: fast (keep stream encoding and object layout), "
+    "default (pikepdf defaults) or archival (object streams, recompressed streams, "
+    "linearized for fast web view)",
+)
+@click.option(
+    "--digest",
+    "digests",
+    multiple=True,
+    help="Additional digest recorded in the provenance, e.g. sha512 or blake2b "
+    "(repeatable; sha256 is always recorded)",
+)
+@click.option(
+    "--metadata-store",
+    "metadata_store_dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Store each distinct metadata record once in this directory and reference it "
+    "by digest from the provenance records",
+)
+@click.option(
+    "--journal",
+    "journal_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Append provenance records to this JSONL journal instead of writing sidecar files",
+)
+@click.option(
+    "--bag",
+    is_flag=True,
+    help="Write the output directory as a BagIt bag: PDFs and sidecars go to <out-dir>/data "
+    "and the manifests are filled from the digests recorded in the provenance",
+)
+@click.option(
+    "--bag-tar",
+    "bag_tar",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Stream PDFs and sidecars into a tar file with BagIt layout (.tar, .tar.gz, "
+    ".tar.bz2 or .tar.xz; may be a named pipe) instead of keeping them in the output directory",
+)
+@click.option(
+    "--dedup",
+    is_flag=True,
+    help="Enhance byte-identical input PDFs with the same DOI only once and produce the "
+    "other outputs as links to the first one",
+)
+@click.option(
+    "--dedup-link",
+    type=click.Choice(("auto", *LINK_METHODS)),
+    default="auto",
+    show_default=True,
+    help="How duplicate outputs are produced: auto (reflink, else hardlink, else copy), "
+    "reflink (else copy), hardlink (else copy) or copy",
+)
+@click.option(
+    "--max-attempts",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Attempts per row for transient failures such as network errors (1 disables retries)",
+)
+@click.option(
+    "--retry-delay",
+    default=5.0,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Base delay in seconds before retrying a row; doubles with each attempt, with jitter",
+)
+@click.option(
+    "--failed-file",
+    "failed_file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write rows that still fail to this mapping file "
+    "(default: failed_mappings.<input format> in the output directory)",
+)
+@click.option(
+    "--direct-routing",
+    is_flag=True,
+    help="Learn which registration agency endpoint serves each DOI prefix and send "
+    "later lookups there directly, skipping the doi.org redirect",
+)
+@click.option(
+    "--route-cache",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Load learned DOI routes from this JSON file and save them back after the run "
+    "(implies --direct-routing)",
+)
+@click.option(
+    "--shard",
+    "shard_spec",
+    help="Only process shard i of N, e.g. 2/8. Rows are assigned by a hash of their DOI, "
+    "so use --layout doi; each shard writes its own summary and manifest for the merge command",
+)
+@click.option(
+    "--progress/--no-progress",
+    "show_progress",
+    default=None,
+    help="Show a live progress line with throughput and ETA instead of one line per file "
+    "(default: when stderr is a terminal)",
+)
+@click.option(
+    "--progress-events",
+    "progress_events",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Append progress snapshots as JSON lines to this file, for headless runs",
+)
+@click.option(
+    "--progress-interval",
+    default=1.0,
+    show_default=True,
+    type=click.FloatRange(min=0.05),
+    help="Seconds between progress updates",
+)
 @click.option(
     "--verbose",
     "-v",
     is_flag=True,
     help="Enable verbose output",
 )
-def ingest(input_file: Path, out_dir: Path, verbose: bool):
+def ingest(
+    input_file: Path,
+    out_dir: Path,
+    workers: int,
+    layout: str,
+    input_root: Path | None,
+    save_profile: str,
+    digests: tuple[str, ...],
+    metadata_store_dir: Path | None,
+    journal_path: Path | None,
+    bag: bool,
+    bag_tar: Path | None,
+    dedup: bool,
+    dedup_link: str,
+    max_attempts: int,
+    retry_delay: float,
+    failed_file: Path | None,
+    direct_routing: bool,
+    route_cache: Path | None,
+    shard_spec: str | None,
+    show_progress: bool | None,
+    progress_events: Path | None,
+    progress_interval: float,
+    verbose: bool,
+):
     """
     Ingest PDFs and enhance them with metadata from DOIs.
 
     Example:
         pdf-metadata-enhancer ingest --input map.csv --out-dir out/
     """
+    started = datetime.now(UTC).isoformat().replace("+00:00", "Z")
+
     # Create output directory if it doesn't exist
     out_dir.mkdir(parents=True, exist_ok=True)
 
@@ -55,65 +241,469 @@ def ingest(input_file: Path, out_dir: Path, verbose: bool):
         click.echo(f"Reading input from: {input_file}")
         click.echo(f"Output directory: {out_dir}")
 
-    # Parse input file
     try:
-        mappings = parse_input_file(input_file)
-        if verbose:
-            click.echo(f"Found {len(mappings)} PDF-DOI mappings")
+        algorithms = normalize_algorithms(digests)
+        shard = parse_shard(shard_spec) if shard_spec else None
+        if bag and bag_tar is not None:
+            raise ValueError("--bag and --bag-tar cannot be combined")
+        if (bag or bag_tar is not None) and journal_path is not None:
+            raise ValueError("--journal cannot be combined with --bag or --bag-tar")
+        if bag and shard is not None:
+            # Every shard would write the tag files of one bag over each other
+            raise ValueError("--bag cannot be combined with --shard; use one --bag-tar per shard")
+        resolver = None
+        if direct_routing or route_cache is not None:
+            resolver = DoiResolver(routes=load_routes(route_cache) if route_cache else None)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+    # Open input file; rows are streamed, so huge (compressed) mappings never
+    # need to fit in memory or be decompressed to disk
+    try:
+        input_format, input_compression = detect_format(input_file)
+        mappings = iter_input_file(input_file)
     except Exception as e:
         click.echo(f"Error parsing input file: {e}", err=True)
         sys.exit(1)
+    if shard is not None:
+        mappings = select_shard(mappings, *shard)
+        if verbose:
+            click.echo(f"Processing shard {shard[0]} of {shard[1]}")
+        if layout != "doi":
+            # Only the doi layout keeps rows that may share an output path on one node
+            click.echo(
+                f"Warning: with --layout {layout}, rows on different shards may write "
+                "the same output path; use --layout doi for sharded runs",
+                err=True,
+            )
+
+    if show_progress is None:
+        show_progress = sys.stderr.isatty() and not verbose
+    progress = None
+    if show_progress or progress_events is not None:
+        progress = ProgressTracker()
+        # A second pass over the input provides the total for the ETA
+        rows = iter_input_file(input_file)
+        count_in_background(progress, select_shard(rows, *shard) if shard else rows)
 
     # Process each PDF
     success_count = 0
     error_count = 0
+    retried_count = 0
+    # Per link method: number of duplicate outputs
+    dedup_stats: dict[str, int] = {}
+    failed_mappings = []
+    manifest_entries = []
+    input_error = None
+    # Per save profile: [files, enhance seconds, input bytes, output bytes]
+    profile_stats: dict[str, list] = {}
+
+    with ExitStack() as stack:
+        reporter = None
+        echo = click.echo
+        if progress is not None:
+            reporter = stack.enter_context(
+                ProgressReporter(
+                    progress,
+                    interval=progress_interval,
+                    display=sys.stderr if show_progress else None,
+                    events_path=progress_events,
+                )
+            )
+            echo = reporter.echo
 
-    for mapping in mappings:
-        pdf_path = mapping["pdf"]
-        doi = mapping["doi"]
+        sink = write_sidecar
+        payload_dir = out_dir
+        if journal_path is not None:
+            sink = stack.enter_context(JournalSink(journal_path))
+        if bag or bag_tar is not None:
+            # Outputs are written (or staged, for the tar stream) in the payload directory
+            sink = stack.enter_context(BagWriter(out_dir, algorithms, tar_path=bag_tar))
+            payload_dir = sink.payload_dir
+        executor = None
+        if workers > 1:
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=workers))
 
         try:
-            if verbose:
-                click.echo(f"\nProcessing: {pdf_path} (DOI: {doi})")
+            for result in enhance_many(
+                mappings,
+                payload_dir,
+                executor=executor,
+                max_in_flight=2 * workers,
+                sink=sink,
+                algorithms=algorithms,
+                layout=OutputLayout(payload_dir, layout, input_root),
+                metadata_store=MetadataStore(metadata_store_dir) if metadata_store_dir else None,
+                retry=RetryScheduler(max_attempts=max_attempts, base_delay=retry_delay),
+                fetcher=resolver or fetch_metadata,
+                save_profile=save_profile,
+                progress=progress,
+                dedup=ContentDeduplicator(_link_methods(dedup_link)) if dedup else None,
+                verbose=verbose,
+            ):
+                if progress is not None:
+                    progress.record(result)
+                if result.attempts > 1:
+                    retried_count += 1
+                if not result.ok:
+                    failed_mappings.append({"pdf": result.pdf, "doi": result.doi})
 
-            # Fetch metadata from DOI
-            metadata = fetch_metadata_from_doi(doi, verbose=verbose)
+                if result.ok:
+                    if not show_progress:
+                        echo(f"  ✓ Successfully processed: {Path(result.pdf).name}")
+                    success_count += 1
+                    if result.duplicate_of is not None:
+                        dedup_stats[result.link_method] = dedup_stats.get(result.link_method, 0) + 1
+                    else:
+                        stats = profile_stats.setdefault(result.save_profile, [0, 0.0, 0, 0])
+                        stats[0] += 1
+                        stats[1] += result.enhance_seconds
+                        stats[2] += result.input_bytes
+                        stats[3] += result.output_bytes
+                    if shard is not None:
+                        manifest_entries.append(
+                            (result.output_sha256, _relative_to(result.output, out_dir))
+                        )
+                elif result.stage == "fetch":
+                    echo(f"  ⚠️  {result.error}", err=True)
+                    error_count += 1
+                else:
+                    echo(f"  ✗ Error processing {result.pdf}: {result.error}", err=True)
+                    error_count += 1
+        except ValueError as e:
+            # Invalid rows surface while streaming the input file
+            input_error = e
+            echo(f"Error parsing input file: {e}", err=True)
 
-            if metadata is None:
-                click.echo(f"  ⚠️  Failed to fetch metadata for DOI: {doi}", err=True)
-                error_count += 1
-                continue
+    # Summary
+    click.echo(f"\n{'=' * 60}")
+    click.echo("Summary:")
+    click.echo(f"  Successfully processed: {success_count}")
+    click.echo(f"  Errors: {error_count}")
+    if retried_count:
+        click.echo(f"  Retried rows: {retried_count}")
+    if resolver is not None:
+        stats = resolver.stats
+        click.echo(
+            f"  DOI lookups: {stats['direct']} direct, {stats['resolver']} via the resolver "
+            f"({stats['fell_back']} direct lookup(s) fell back, "
+            f"{len(resolver.routes)} prefix route(s) known)"
+        )
+        if route_cache is not None:
+            try:
+                resolver.save_routes(route_cache)
+            except OSError as e:
+                click.echo(f"  Could not save DOI routes: {e}", err=True)
+    if dedup_stats:
+        methods = ", ".join(f"{method}: {count}" for method, count in dedup_stats.items())
+        click.echo(f"  Duplicate inputs linked: {sum(dedup_stats.values())} ({methods})")
+    if bag:
+        click.echo(f"  BagIt bag written to: {out_dir}")
+    elif bag_tar is not None:
+        click.echo(f"  BagIt tar stream written to: {bag_tar}")
+    for profile, (files, seconds, input_bytes, output_bytes) in profile_stats.items():
+        change = (output_bytes / input_bytes - 1) * 100 if input_bytes else 0.0
+        click.echo(
+            f"  Save profile '{profile}': {files} file(s) enhanced in {seconds:.2f}s "
+            f"({seconds / files * 1000:.1f} ms/file), "
+            f"{_format_size(output_bytes)} written from {_format_size(input_bytes)} "
+            f"({change:+.1f}%)"
+        )
 
-            # Determine output path
-            pdf_filename = Path(pdf_path).name
-            output_pdf_path = out_dir / pdf_filename
-            sidecar_path = out_dir / f"{pdf_filename}.json"
+    failed_written = False
+    if failed_mappings:
+        if failed_file is None:
+            suffix = input_format + (input_compression or "")
+            name = "failed_mappings" if shard is None else f"failed_mappings-{shard_name(*shard)}"
+            failed_file = out_dir / f"{name}{suffix}"
+        try:
+            write_mapping_file(failed_file, failed_mappings)
+            failed_written = True
+            click.echo(f"  Failed rows written to: {failed_file}")
+        except Exception as e:
+            click.echo(f"  Could not write failed rows: {e}", err=True)
 
-            # Enhance PDF with metadata
-            enhance_pdf_metadata(pdf_path, output_pdf_path, metadata, verbose=verbose)
+    exit_status = 1 if error_count > 0 or input_error is not None else 0
+    if shard is not None:
+        # Everything the merge command needs to consolidate this shard
+        prefix = shard_name(*shard)
+        manifest_path = out_dir / f"{prefix}.manifest-sha256.txt"
+        summary_path = out_dir / f"{prefix}.summary.json"
+        write_manifest(manifest_path, manifest_entries)
+        write_shard_summary(
+            summary_path,
+            {
+                "version": "0.1.0",
+                "shard": {"index": shard[0], "count": shard[1]},
+                "input": str(input_file),
+                "started": started,
+                "finished": datetime.now(UTC).isoformat().replace("+00:00", "Z"),
+                "processed": success_count,
+                "errors": error_count,
+                "retried": retried_count,
+                "input_error": str(input_error) if input_error is not None else None,
+                "journal": str(journal_path.resolve()) if journal_path else None,
+                "manifest": manifest_path.name,
+                "failed_file": str(failed_file.resolve()) if failed_written else None,
+                "save_profiles": {
+                    profile: {
+                        "files": files,
+                        "enhance_seconds": round(seconds, 3),
+                        "input_bytes": input_bytes,
+                        "output_bytes": output_bytes,
+                    }
+                    for profile, (files, seconds, input_bytes, output_bytes) in (
+                        profile_stats.items()
+                    )
+                },
+                "exit_status": exit_status,
+            },
+        )
+        click.echo(f"  Shard summary written to: {summary_path}")
+    click.echo(f"{'=' * 60}")
 
-            # Create sidecar file
-            create_sidecar(pdf_path, output_pdf_path, doi, metadata, sidecar_path, verbose=verbose)
+    if exit_status:
+        sys.exit(exit_status)
 
-            click.echo(f"  ✓ Successfully processed: {pdf_filename}")
-            success_count += 1
 
-        except Exception as e:
-            click.echo(f"  ✗ Error processing {pdf_path}: {e}", err=True)
-            error_count += 1
-            if verbose:
-                import traceback
+def _link_methods(choice: str) -> tuple[str, ...]:
+    """Return the link methods tried for a --dedup-link choice."""
+    if choice == "auto":
+        return LINK_METHODS
+    if choice == "copy":
+        return ("copy",)
+    return (choice, "copy")
 
-                traceback.print_exc()
 
-    # Summary
-    click.echo(f"\n{'=' * 60}")
-    click.echo("Summary:")
-    click.echo(f"  Successfully processed: {success_count}")
-    click.echo(f"  Errors: {error_count}")
+def _relative_to(path: str, base: Path) -> str:
+    """Return path relative to base in POSIX form, or unchanged if it is outside."""
+    try:
+        return Path(path).relative_to(base).as_posix()
+    except ValueError:
+        return Path(path).as_posix()
+
+
+def _format_size(size: int) -> str:
+    """Format a byte count for the run summary."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+
+@cli.command()
+@click.option(
+    "--out-dir",
+    "-o",
+    "out_dir",
+    required=True,
+    type=click.Path(path_type=Path),
+    help="Output directory for enhanced PDFs, sidecar files and uploads",
+)
+@click.option("--host", default="127.0.0.1", show_default=True, help="Interface to bind to")
+@click.option("--port", "-p", default=8000, show_default=True, help="Port to listen on")
+@click.option(
+    "--workers",
+    "-w",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of concurrent enhancement workers",
+)
+@click.option(
+    "--max-pending",
+    default=16,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Requests allowed to wait for a worker before the server answers 503",
+)
+@click.option(
+    "--verbose",
+    "-v",
+    is_flag=True,
+    help="Enable verbose output",
+)
+def serve(out_dir: Path, host: str, port: int, workers: int, max_pending: int, verbose: bool):
+    """
+    Run a local HTTP server that enhances PDFs on request.
+
+    POST a JSON body {"pdf": path, "doi": ...} or a raw PDF upload to /enhance.
+
+    Example:
+        pdf-metadata-enhancer serve --out-dir out/ --port 8000
+    """
+    service = EnhancementService(out_dir, workers=workers, max_pending=max_pending, verbose=verbose)
+    server = make_server(service, host, port)
+
+    click.echo(f"Serving on http://{server.server_address[0]}:{server.server_address[1]}/")
+    click.echo(f"Output directory: {out_dir}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        click.echo("\nShutting down...")
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+@cli.command()
+@click.argument("source", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--base-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Directory relative paths in the records are resolved against (default: current)",
+)
+@click.option(
+    "--workers",
+    "-w",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of files hashed concurrently",
+)
+@click.option("--no-inputs", is_flag=True, help="Only verify enhanced outputs, not inputs")
+@click.option(
+    "--check-metadata",
+    is_flag=True,
+    help="Also compare embedded XMP and docinfo metadata with the recorded metadata",
+)
+@click.option(
+    "--report",
+    "report_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write the JSON report to this file instead of standard output",
+)
+def verify(
+    source: Path,
+    base_dir: Path | None,
+    workers: int,
+    no_inputs: bool,
+    check_metadata: bool,
+    report_path: Path | None,
+):
+    """
+    Verify PDFs against their provenance records.
+
+    SOURCE is a directory containing sidecar files or a JSONL journal.
+
+    Example:
+        pdf-metadata-enhancer verify out/ --check-metadata --report report.json
+    """
+    try:
+        report = verify_records(
+            load_provenance_records(source),
+            base_dir=base_dir,
+            workers=workers,
+            check_inputs=not no_inputs,
+            check_metadata=check_metadata,
+        )
+    except Exception as e:
+        click.echo(f"Error reading provenance records: {e}", err=True)
+        sys.exit(2)
+
+    report_json = json.dumps(report, indent=2, ensure_ascii=False)
+    if report_path is not None:
+        report_path.write_text(report_json + "\n", encoding="utf-8")
+    else:
+        click.echo(report_json)
+
+    click.echo(f"\n{'=' * 60}", err=True)
+    click.echo("Verification summary:", err=True)
+    click.echo(f"  Records checked: {report['checked']}", err=True)
+    click.echo(f"  OK: {report['ok']}", err=True)
+    click.echo(f"  Missing files: {report['missing']}", err=True)
+    click.echo(f"  Hash mismatches: {report['mismatched']}", err=True)
+    if check_metadata:
+        click.echo(f"  Metadata mismatches: {report['metadata_mismatches']}", err=True)
+    click.echo(f"{'=' * 60}", err=True)
+
+    if report["failed"] > 0:
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument("out_dir", type=click.Path(exists=True, file_okay=False, path_type=Path))
+@click.option(
+    "--journal",
+    "journal_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Consolidated journal of all shards' provenance records "
+    "(default: provenance.jsonl in OUT_DIR; only written if the shards used journals)",
+)
+@click.option(
+    "--manifest",
+    "manifest_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Consolidated SHA256 manifest of all outputs (default: manifest-sha256.txt in OUT_DIR)",
+)
+@click.option(
+    "--failed-file",
+    "failed_file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write all shards' failed rows to this mapping file "
+    "(default: failed_mappings.<input format> in OUT_DIR)",
+)
+@click.option(
+    "--summary",
+    "summary_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Consolidated run summary (default: summary.json in OUT_DIR)",
+)
+def merge(
+    out_dir: Path,
+    journal_path: Path | None,
+    manifest_path: Path | None,
+    failed_file: Path | None,
+    summary_path: Path | None,
+):
+    """
+    Merge the results of a run split with ingest --shard.
+
+    OUT_DIR is the output directory shared by all shards. Exits with status 1
+    unless every shard is present, finished without errors and no two shards
+    wrote the same output.
+
+    Example:
+        pdf-metadata-enhancer merge out/
+    """
+    try:
+        summary = merge_shards(out_dir, journal_path, manifest_path, failed_file)
+    except Exception as e:
+        click.echo(f"Error merging shards: {e}", err=True)
+        sys.exit(2)
+
+    if summary_path is None:
+        summary_path = out_dir / "summary.json"
+    summary_path.write_text(
+        json.dumps(summary, indent=2, ensure_ascii=False) + "\n", encoding="utf-8"
+    )
+
+    shards = summary["shards"]
+    click.echo(f"{'=' * 60}")
+    click.echo("Merge summary:")
+    click.echo(f"  Shards: {len(shards['present'])} of {shards['count']}")
+    if shards["missing"]:
+        click.echo(f"  Missing shards: {', '.join(map(str, shards['missing']))}", err=True)
+    if summary["duplicate_shards"]:
+        duplicates = ", ".join(map(str, summary["duplicate_shards"]))
+        click.echo(f"  Duplicate shard summaries: {duplicates}", err=True)
+    click.echo(f"  Successfully processed: {summary['processed']}")
+    click.echo(f"  Errors: {summary['errors']}")
+    if summary["conflicting_outputs"]:
+        conflicts = len(summary["conflicting_outputs"])
+        click.echo(f"  Outputs written by more than one shard: {conflicts}", err=True)
+    click.echo(f"  Manifest: {summary['manifest']} ({summary['manifest_entries']} entries)")
+    if summary["journal"]:
+        click.echo(f"  Journal: {summary['journal']} ({summary['journal_records']} records)")
+    if summary["failed_file"]:
+        click.echo(f"  Failed rows written to: {summary['failed_file']}")
+    click.echo(f"  Summary: {summary_path}")
     click.echo(f"{'=' * 60}")
 
-    if error_count > 0:
+    if not summary["ok"]:
         sys.exit(1)
 
 
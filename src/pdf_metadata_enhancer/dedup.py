@@ -0,0 +1,168 @@
+"""Module for detecting byte-identical input PDFs and linking their outputs."""
+
+import errno
+import os
+import shutil
+from collections.abc import Mapping, Sequence
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .hashing import DEFAULT_ALGORITHMS, hash_file
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Ways to produce a duplicate output, in order of preference
+LINK_METHODS = ("reflink", "hardlink", "copy")
+
+# ioctl cloning a whole file on Linux (Btrfs, XFS, bcachefs, ...)
+FICLONE = 0x40049409
+
+
+def reflink(source: Path, target: Path) -> None:
+    """
+    Create target as a copy-on-write clone of source.
+
+    Raises:
+        OSError: If the platform or file system does not support reflinks
+    """
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform")
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            target.unlink()
+            raise
+
+
+def link_or_copy(source: Path, target: Path, methods: Sequence[str] = LINK_METHODS) -> str:
+    """
+    Make target hold the same bytes as source, as cheaply as possible.
+
+    Each method is tried in turn; reflinks and hardlinks fail across file
+    systems or where the file system lacks support. An existing target is
+    replaced. Note that hardlinked outputs share one inode: editing one in
+    place changes all of them.
+
+    Args:
+        source: Existing file
+        target: Path to create
+        methods: Methods from LINK_METHODS to try, in order
+
+    Returns:
+        Name of the method that succeeded
+
+    Raises:
+        OSError: If every method failed (the last error is raised)
+    """
+    target.unlink(missing_ok=True)
+    error = OSError(errno.EINVAL, "No link method given")
+    for method in methods:
+        try:
+            if method == "reflink":
+                reflink(source, target)
+            elif method == "hardlink":
+                os.link(source, target)
+            elif method == "copy":
+                shutil.copyfile(source, target)
+            else:
+                raise ValueError(f"Unknown link method: {method}. Supported: {LINK_METHODS}")
+            return method
+        except OSError as e:
+            error = e
+    raise error
+
+
+@dataclass(slots=True)
+class _Candidate:
+    pdf: str
+    sha256: str | None
+    future: Future
+
+
+class ContentDeduplicator:
+    """
+    Index of processed rows, finding earlier rows with the same input bytes and DOI.
+
+    Inputs are first grouped by file size and DOI; a file is only hashed once
+    another row falls into its group, and the new row's digests are handed on
+    so they are not computed again. Keeps one entry per processed row,
+    whose future holds the row's result (including its metadata, which
+    duplicates reuse). Used by batch.enhance_many from the planning loop, so
+    not thread-safe.
+    """
+
+    def __init__(self, link_methods: Sequence[str] = LINK_METHODS):
+        for method in link_methods:
+            if method not in LINK_METHODS:
+                raise ValueError(f"Unknown link method: {method}. Supported: {LINK_METHODS}")
+        self.link_methods = tuple(link_methods)
+        self._groups: dict[tuple[int, str], list[_Candidate]] = {}
+
+    def find(
+        self,
+        mapping: Mapping[str, str],
+        options: dict[str, Any],
+        algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    ) -> Future | None:
+        """
+        Look for an earlier row with a byte-identical input and the same DOI.
+
+        Args:
+            mapping: Dictionary with 'pdf' and 'doi' keys
+            options: Options from batch.plan_mapping; input_digests is filled
+                in when the input had to be hashed
+            algorithms: Digests recorded in the provenance
+
+        Returns:
+            Future of the earlier row's result, or None if the row is unique so far
+        """
+        key = self._key(mapping)
+        candidates = self._groups.get(key) if key else None
+        if not candidates:
+            return None
+
+        if options.get("input_digests") is None:
+            options["input_digests"] = hash_file(mapping["pdf"], algorithms)
+        sha256 = options["input_digests"]["sha256"]
+        for candidate in candidates:
+            if candidate.sha256 is None:
+                try:
+                    candidate.sha256 = hash_file(candidate.pdf)["sha256"]
+                except OSError:
+                    continue
+            if candidate.sha256 == sha256:
+                return candidate.future
+        return None
+
+    def add(self, mapping: Mapping[str, str], options: dict[str, Any], future: Future) -> None:
+        """
+        Register a row that is processed on its own.
+
+        Args:
+            mapping: Dictionary with 'pdf' and 'doi' keys
+            options: Options from batch.plan_mapping
+            future: Future of the row's result
+        """
+        key = self._key(mapping)
+        if key is None:
+            return
+        digests = options.get("input_digests")
+        self._groups.setdefault(key, []).append(
+            _Candidate(mapping["pdf"], digests and digests["sha256"], future)
+        )
+
+    @staticmethod
+    def _key(mapping: Mapping[str, str]) -> tuple[int, str] | None:
+        try:
+            size = os.stat(mapping["pdf"]).st_size
+        except OSError:
+            # Missing inputs fail on their own
+            return None
+        return size, mapping["doi"].strip().lower()
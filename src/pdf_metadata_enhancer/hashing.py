@@ -0,0 +1,70 @@
+"""Module for hashing files with one or more digest algorithms."""
+
+import hashlib
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+# SHA256 is always recorded; sidecars, verify and manifests rely on it
+DEFAULT_ALGORITHMS = ("sha256",)
+
+# Read size for hashing; large reads keep hashing close to disk bandwidth
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def normalize_algorithms(algorithms: Iterable[str] | None) -> tuple[str, ...]:
+    """
+    Validate digest algorithm names and make sure SHA256 comes first.
+
+    Args:
+        algorithms: Algorithm names as understood by hashlib (e.g. "sha512", "blake2b")
+
+    Returns:
+        Tuple of unique lowercase algorithm names starting with "sha256"
+
+    Raises:
+        ValueError: If an algorithm is not available or has no fixed digest length
+    """
+    normalized = list(DEFAULT_ALGORITHMS)
+    for name in algorithms or ():
+        name = name.strip().lower().replace("-", "_")
+        if name not in hashlib.algorithms_available:
+            raise ValueError(
+                f"Unsupported digest algorithm: {name}. "
+                f"Available: {', '.join(sorted(hashlib.algorithms_guaranteed))}"
+            )
+        if name.startswith("shake_"):
+            raise ValueError(f"Unsupported digest algorithm: {name} (variable length)")
+        if name not in normalized:
+            normalized.append(name)
+    return tuple(normalized)
+
+
+def hash_file(
+    file_path: str | Path,
+    algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    chunk_size: int = HASH_CHUNK_SIZE,
+) -> dict[str, str]:
+    """
+    Compute one or more digests of a file in a single pass.
+
+    All algorithms are fed from one reused read buffer of chunk_size bytes,
+    so the file is read only once.
+
+    Args:
+        file_path: Path to file
+        algorithms: hashlib algorithm names
+        chunk_size: Number of bytes read per call
+
+    Returns:
+        Dictionary mapping algorithm name to hex digest
+    """
+    with open(file_path, "rb", buffering=0) as f:
+        hashers = [hashlib.new(name) for name in algorithms]
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        while n := f.readinto(buffer):
+            chunk = view[:n]
+            for hasher in hashers:
+                hasher.update(chunk)
+
+    return {name: hasher.hexdigest() for name, hasher in zip(algorithms, hashers, strict=True)}
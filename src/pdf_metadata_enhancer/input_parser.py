@@ -1,15 +1,130 @@
-"""Module for parsing input files (CSV/TSV/JSONL)."""
+"""Module for parsing input files (CSV/TSV/JSONL, optionally compressed, and Parquet/Arrow)."""
 
+import bz2
 import csv
+import gzip
 import json
+import lzma
+from collections.abc import Iterable, Iterator
 from pathlib import Path
+from typing import IO
+
+TEXT_FORMATS = (".csv", ".tsv", ".jsonl")
+COLUMNAR_FORMATS = (".parquet", ".arrow", ".feather")
+COMPRESSIONS = (".gz", ".bz2", ".xz", ".zst")
+
+# Rows read per Parquet/Arrow record batch
+BATCH_SIZE = 65536
+
+
+def detect_format(input_path: Path) -> tuple[str, str | None]:
+    """
+    Determine the mapping format and compression codec from the file name.
+
+    Args:
+        input_path: Path to input file, e.g. map.csv, map.jsonl.zst or map.parquet
+
+    Returns:
+        Tuple of (format suffix, compression suffix or None)
+
+    Raises:
+        ValueError: If file format is not supported
+    """
+    suffixes = [s.lower() for s in input_path.suffixes]
+    compression = None
+    if suffixes and suffixes[-1] in COMPRESSIONS:
+        compression = suffixes.pop()
+    suffix = suffixes[-1] if suffixes else ""
+
+    if suffix in TEXT_FORMATS or (suffix in COLUMNAR_FORMATS and compression is None):
+        return suffix, compression
+
+    supported = ", ".join(TEXT_FORMATS + COLUMNAR_FORMATS)
+    codecs = ", ".join(COMPRESSIONS)
+    raise ValueError(
+        f"Unsupported file format: {''.join(input_path.suffixes) or input_path.name}. "
+        f"Supported formats: {supported} (text formats optionally compressed: {codecs})"
+    )
+
+
+def open_text(path: Path, compression: str | None, mode: str = "r") -> IO[str]:
+    """
+    Open a possibly compressed text file, decompressing as a stream.
+
+    Args:
+        path: Path to file
+        compression: Compression suffix as returned by detect_format, or None
+        mode: "r" or "w"
+
+    Returns:
+        Text file object
+    """
+    if compression is None:
+        return open(path, mode, encoding="utf-8", newline="")
+    if compression == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    if compression == ".bz2":
+        return bz2.open(path, mode + "t", encoding="utf-8", newline="")
+    if compression == ".xz":
+        return lzma.open(path, mode + "t", encoding="utf-8", newline="")
+
+    # Zstandard is not in the standard library before Python 3.14
+    try:
+        from compression import zstd
+
+        return zstd.open(path, mode + "t", encoding="utf-8", newline="")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ValueError(
+            "Reading .zst files requires the 'zstandard' package "
+            "(pip install 'pdf-metadata-enhancer[zstd]')"
+        ) from e
+    return zstandard.open(path, mode + "t", encoding="utf-8", newline="")
+
+
+def iter_input_file(input_path: Path) -> Iterator[dict[str, str]]:
+    """
+    Stream PDF-DOI mappings from an input file without loading it into memory.
+
+    The file is opened and its columns are validated before this function
+    returns; rows are then parsed lazily while iterating.
+
+    Args:
+        input_path: Path to input file
+
+    Returns:
+        Iterator of dictionaries with 'pdf' and 'doi' keys
+
+    Raises:
+        ValueError: If file format is not supported or invalid (invalid rows,
+            and truncated or corrupt files, raise while iterating)
+    """
+    suffix, compression = detect_format(input_path)
+
+    if suffix in COLUMNAR_FORMATS:
+        return _require_mappings(_read_errors_as_value_errors(_iter_columnar(input_path, suffix)))
+
+    f = open_text(input_path, compression)
+    try:
+        if suffix == ".jsonl":
+            rows = _iter_jsonl(f)
+        else:
+            rows = _iter_csv_tsv(f, "\t" if suffix == ".tsv" else ",")
+    except BaseException:
+        f.close()
+        raise
+    return _require_mappings(_closing(rows, f))
 
 
 def parse_input_file(input_path: Path) -> list[dict[str, str]]:
     """
     Parse input file and return list of PDF-DOI mappings.
 
-    Supports CSV, TSV, and JSONL formats.
+    Supports CSV, TSV, and JSONL formats, optionally compressed with gzip,
+    bzip2, xz or zstandard, as well as Parquet and Arrow files.
 
     Args:
         input_path: Path to input file
@@ -20,17 +135,7 @@ def parse_input_file(input_path: Path) -> list[dict[str, str]]:
     Raises:
         ValueError: If file format is not supported or invalid
     """
-    suffix = input_path.suffix.lower()
-
-    if suffix == ".jsonl":
-        return parse_jsonl(input_path)
-    elif suffix in [".csv", ".tsv"]:
-        delimiter = "\t" if suffix == ".tsv" else ","
-        return parse_csv_tsv(input_path, delimiter)
-    else:
-        raise ValueError(
-            f"Unsupported file format: {suffix}. Supported formats: .csv, .tsv, .jsonl"
-        )
+    return list(iter_input_file(input_path))
 
 
 def parse_csv_tsv(input_path: Path, delimiter: str) -> list[dict[str, str]]:
@@ -41,59 +146,176 @@ def parse_csv_tsv(input_path: Path, delimiter: str) -> list[dict[str, str]]:
         pdf,doi
         ./path/to/file.pdf,10.21255/sgb-01-406352
     """
-    mappings = []
+    with open(input_path, encoding="utf-8", newline="") as f:
+        return list(_require_mappings(_iter_csv_tsv(f, delimiter)))
+
 
+def parse_jsonl(input_path: Path) -> list[dict[str, str]]:
+    """
+    Parse JSONL file.
+
+    Expected format (one JSON object per line):
+        {"pdf": "./path/to/file.pdf", "doi": "10.21255/sgb-01-406352"}
+    """
     with open(input_path, encoding="utf-8") as f:
-        reader = csv.DictReader(f, delimiter=delimiter)
+        return list(_require_mappings(_iter_jsonl(f)))
+
+
+def _iter_csv_tsv(f: IO[str], delimiter: str) -> Iterator[dict[str, str]]:
+    reader = csv.DictReader(f, delimiter=delimiter)
+
+    # Validate headers
+    if (
+        reader.fieldnames is None
+        or "pdf" not in reader.fieldnames
+        or "doi" not in reader.fieldnames
+    ):
+        raise ValueError(
+            f"Invalid CSV/TSV format. Expected columns: 'pdf', 'doi'. Found: {reader.fieldnames}"
+        )
+
+    return _valid_rows((row["pdf"], row["doi"]) for row in reader)
+
+
+def _iter_jsonl(f: IO[str]) -> Iterator[dict[str, str]]:
+    for line_num, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            obj = json.loads(line)
+
+            if not isinstance(obj, dict):
+                raise ValueError(f"Line {line_num}: Expected a JSON object, got {line[:40]}")
+            if "pdf" not in obj or "doi" not in obj:
+                raise ValueError(f"Line {line_num}: Missing 'pdf' or 'doi' field")
 
-        # Validate headers
-        if "pdf" not in reader.fieldnames or "doi" not in reader.fieldnames:
-            raise ValueError(
-                f"Invalid CSV/TSV format. Expected columns: 'pdf', 'doi'. "
-                f"Found: {reader.fieldnames}"
-            )
+            yield {"pdf": str(obj["pdf"]).strip(), "doi": str(obj["doi"]).strip()}
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {line_num}: Invalid JSON - {e}") from e
 
-        for row in reader:
-            pdf_path = row["pdf"].strip()
-            doi = row["doi"].strip()
 
-            if not pdf_path or not doi:
-                continue  # Skip empty rows
+def _iter_columnar(input_path: Path, suffix: str) -> Iterator[dict[str, str]]:
+    try:
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ValueError(
+            f"Reading {suffix} files requires the 'pyarrow' package "
+            "(pip install 'pdf-metadata-enhancer[parquet]')"
+        ) from e
+
+    if suffix == ".parquet":
+        parquet_file = pyarrow.parquet.ParquetFile(input_path)
+        _check_columns(parquet_file.schema_arrow.names, suffix)
+        batches = parquet_file.iter_batches(batch_size=BATCH_SIZE, columns=["pdf", "doi"])
+    else:
+        try:
+            reader = pyarrow.ipc.open_file(input_path)
+            _check_columns(reader.schema.names, suffix)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pyarrow.ArrowInvalid:
+            # Arrow IPC stream format rather than file format
+            reader = pyarrow.ipc.open_stream(input_path)
+            _check_columns(reader.schema.names, suffix)
+            batches = iter(reader)
+
+    # Only the two needed columns are converted to Python objects
+    return _valid_rows(
+        pair
+        for batch in batches
+        for pair in zip(
+            batch.column(batch.schema.get_field_index("pdf")).to_pylist(),
+            batch.column(batch.schema.get_field_index("doi")).to_pylist(),
+            strict=True,
+        )
+    )
 
-            mappings.append({"pdf": pdf_path, "doi": doi})
 
-    if not mappings:
+def _check_columns(names: list[str], suffix: str) -> None:
+    if "pdf" not in names or "doi" not in names:
+        raise ValueError(f"Invalid {suffix} format. Expected columns: 'pdf', 'doi'. Found: {names}")
+
+
+def _valid_rows(pairs: Iterable[tuple[object, object]]) -> Iterator[dict[str, str]]:
+    for pdf_path, doi in pairs:
+        pdf_path = str(pdf_path).strip() if pdf_path is not None else ""
+        doi = str(doi).strip() if doi is not None else ""
+
+        if not pdf_path or not doi:
+            continue  # Skip empty rows
+
+        yield {"pdf": pdf_path, "doi": doi}
+
+
+def _require_mappings(rows: Iterator[dict[str, str]]) -> Iterator[dict[str, str]]:
+    found = False
+    for row in rows:
+        found = True
+        yield row
+
+    if not found:
         raise ValueError("No valid PDF-DOI mappings found in input file")
 
-    return mappings
 
+def _closing(rows: Iterator[dict[str, str]], f: IO) -> Iterator[dict[str, str]]:
+    with f:
+        yield from _read_errors_as_value_errors(rows)
 
-def parse_jsonl(input_path: Path) -> list[dict[str, str]]:
-    """
-    Parse JSONL file.
 
-    Expected format (one JSON object per line):
-        {"pdf": "./path/to/file.pdf", "doi": "10.21255/sgb-01-406352"}
+def _read_errors_as_value_errors(rows: Iterator[dict[str, str]]) -> Iterator[dict[str, str]]:
+    """Report I/O and decompression errors (e.g. a truncated .gz) like invalid rows."""
+    count = 0
+    try:
+        for row in rows:
+            yield row
+            count += 1
+    except ValueError:
+        raise
+    except Exception as e:
+        # OSError, EOFError, zlib.error, lzma.LZMAError, ZstdError, ArrowIOError, ...
+        raise ValueError(
+            f"Could not read the input file after {count} rows - {type(e).__name__}: {e}"
+        ) from e
+
+
+def write_mapping_file(output_path: Path, mappings: list[dict[str, str]]) -> None:
     """
-    mappings = []
+    Write PDF-DOI mappings in the format given by the file suffix.
 
-    with open(input_path, encoding="utf-8") as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
+    The result can be passed to parse_input_file again, e.g. to rerun failed rows.
 
-            try:
-                obj = json.loads(line)
+    Args:
+        output_path: Path of the file to write, in any format parse_input_file reads
+        mappings: List of dictionaries with 'pdf' and 'doi' keys
 
-                if "pdf" not in obj or "doi" not in obj:
-                    raise ValueError(f"Line {line_num}: Missing 'pdf' or 'doi' field")
+    Raises:
+        ValueError: If the file format is not supported
+    """
+    suffix, compression = detect_format(output_path)
+    rows = [{"pdf": mapping["pdf"], "doi": mapping["doi"]} for mapping in mappings]
 
-                mappings.append({"pdf": str(obj["pdf"]).strip(), "doi": str(obj["doi"]).strip()})
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Line {line_num}: Invalid JSON - {e}") from e
+    if suffix in COLUMNAR_FORMATS:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
 
-    if not mappings:
-        raise ValueError("No valid PDF-DOI mappings found in input file")
+        table = pyarrow.Table.from_pylist(
+            rows, schema=pyarrow.schema([("pdf", "string"), ("doi", "string")])
+        )
+        if suffix == ".parquet":
+            pyarrow.parquet.write_table(table, output_path)
+        else:
+            pyarrow.feather.write_feather(table, output_path)
+        return
 
-    return mappings
+    with open_text(output_path, compression, "w") as f:
+        if suffix == ".jsonl":
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        else:
+            delimiter = "\t" if suffix == ".tsv" else ","
+            writer = csv.DictWriter(f, fieldnames=["pdf", "doi"], delimiter=delimiter)
+            writer.writeheader()
+            writer.writerows(rows)
@@ -0,0 +1,130 @@
+"""Module for resolving where enhanced PDFs are written."""
+
+import hashlib
+import threading
+from pathlib import Path, PurePosixPath
+from urllib.parse import quote
+
+# flat:    <out>/<name>                        (default, one directory)
+# mirror:  <out>/<path relative to input root>
+# sharded: <out>/ab/cd/<name>                  (ab/cd from the SHA256 of the input path)
+# doi:     <out>/<doi prefix>/<doi suffix>/<name>
+# content: <out>/ab/cd/<input sha256>.pdf      (content-addressed by the input bytes)
+LAYOUTS = ("flat", "mirror", "sharded", "doi", "content")
+
+
+class OutputLayout:
+    """
+    Deterministic, collision-free mapping of inputs to output paths.
+
+    Paths are resolved in input order. When two inputs would land on the same
+    path, the later one gets a suffix derived from its input path and DOI, so
+    same-named files never overwrite each other. Claims are kept in memory;
+    with keep_existing, files already on disk count as claimed too, so the
+    layout also avoids outputs of earlier runs, and release() drops claims
+    whose output is written. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        name: str = "flat",
+        input_root: Path | None = None,
+        keep_existing: bool = False,
+    ):
+        if name not in LAYOUTS:
+            raise ValueError(f"Unknown output layout: {name}. Supported: {', '.join(LAYOUTS)}")
+        self.out_dir = out_dir
+        self.name = name
+        self.input_root = (input_root or Path.cwd()).resolve()
+        self.keep_existing = keep_existing
+        self._claimed: set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def needs_input_digest(self) -> bool:
+        """Whether resolve() requires the SHA256 of the input file."""
+        return self.name == "content"
+
+    def resolve(self, pdf_path: str, doi: str, input_sha256: str | None = None) -> Path:
+        """
+        Resolve and reserve the output PDF path for one mapping.
+
+        The sidecar belongs next to it as ``<output name>.json``.
+
+        Args:
+            pdf_path: Path to the input PDF as given in the mapping
+            doi: DOI of the mapping
+            input_sha256: SHA256 of the input file (required for the content layout)
+
+        Returns:
+            Output path inside the output directory
+        """
+        relative = self._relative_path(pdf_path, doi, input_sha256)
+        candidate = self.out_dir / relative
+
+        with self._lock:
+            if self._taken(candidate):
+                token = hashlib.sha256(f"{pdf_path}\0{doi}".encode()).hexdigest()[:8]
+                base = candidate.with_name(f"{candidate.stem}-{token}{candidate.suffix}")
+                candidate, counter = base, 1
+                while self._taken(candidate):
+                    counter += 1
+                    candidate = base.with_name(f"{base.stem}-{counter}{base.suffix}")
+            self._claimed.add(str(candidate).casefold())
+
+        return candidate
+
+    def release(self, output_pdf_path: Path) -> None:
+        """
+        Drop the in-memory claim on a resolved path.
+
+        Only useful with keep_existing, once the output has been written (the
+        file then guards the name) or has been given up.
+
+        Args:
+            output_pdf_path: Path returned by resolve
+        """
+        with self._lock:
+            self._claimed.discard(str(output_pdf_path).casefold())
+
+    def _taken(self, candidate: Path) -> bool:
+        if str(candidate).casefold() in self._claimed:
+            return True
+        return self.keep_existing and candidate.exists()
+
+    def _relative_path(self, pdf_path: str, doi: str, input_sha256: str | None) -> PurePosixPath:
+        name = Path(pdf_path).name
+
+        if self.name == "flat":
+            return PurePosixPath(name)
+
+        if self.name == "mirror":
+            source = Path(pdf_path).resolve()
+            try:
+                return PurePosixPath(source.relative_to(self.input_root).as_posix())
+            except ValueError:
+                # Outside the input root: keep the absolute structure below a marker
+                return PurePosixPath("_external", *source.parts[1:])
+
+        if self.name == "sharded":
+            digest = hashlib.sha256(Path(pdf_path).as_posix().encode()).hexdigest()
+            return PurePosixPath(digest[:2], digest[2:4], name)
+
+        if self.name == "doi":
+            doi = doi.strip().lower()
+            prefix, _, suffix = doi.partition("/")
+            return PurePosixPath(_safe_segment(prefix), _safe_segment(suffix or "_"), name)
+
+        # content
+        if input_sha256 is None:
+            raise ValueError("The content layout requires the input SHA256")
+        return PurePosixPath(input_sha256[:2], input_sha256[2:4], f"{input_sha256}.pdf")
+
+
+def _safe_segment(value: str) -> str:
+    """Encode a DOI part as one portable path segment."""
+    segment = quote(value, safe="-._~()")
+    if segment in ("", ".", ".."):
+        segment = segment.replace(".", "%2E") or "_"
+    return segment
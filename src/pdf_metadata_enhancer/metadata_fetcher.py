@@ -4,8 +4,63 @@
 
 import requests
 
+# HTTP statuses worth retrying later: timeouts, rate limits and server errors
+TRANSIENT_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
 
-def fetch_metadata_from_doi(doi: str, verbose: bool = False) -> dict[str, Any] | None:
+# Request CSL-JSON format
+REQUEST_HEADERS = {
+    "Accept": "application/vnd.citationstyles.csl+json",
+    "User-Agent": "pdf-metadata-enhancer/0.1.0 (https://github.com/Stadt-Geschichte-Basel/pdf-metadata-enhancer)",
+}
+
+
+class MetadataFetchError(Exception):
+    """Error raised when metadata cannot be fetched for a DOI."""
+
+    def __init__(self, message: str, transient: bool = False):
+        super().__init__(message)
+        self.transient = transient
+
+
+def doi_to_url(doi: str) -> str:
+    """Return the doi.org URL of a DOI; URLs are returned unchanged."""
+    if not doi.startswith("http"):
+        return f"https://doi.org/{doi}"
+    return doi
+
+
+def check_metadata(doi: str, metadata: Any, verbose: bool = False) -> dict[str, Any]:
+    """
+    Check that a decoded response is a CSL-JSON record.
+
+    Args:
+        doi: The DOI the metadata was fetched for
+        metadata: Decoded JSON response
+        verbose: Print a short description of the record
+
+    Returns:
+        The metadata
+
+    Raises:
+        MetadataFetchError: If the response is not a JSON object
+    """
+    if not isinstance(metadata, dict):
+        raise MetadataFetchError(f"Invalid metadata for DOI {doi}: expected a JSON object")
+
+    if verbose:
+        print("  ✓ Successfully fetched metadata")
+        print(f"    Title: {metadata.get('title', 'N/A')}")
+        if "author" in metadata:
+            authors = metadata["author"]
+            if isinstance(authors, list) and len(authors) > 0:
+                first_author = authors[0]
+                author_name = f"{first_author.get('family', '')}, {first_author.get('given', '')}"
+                print(f"    First author: {author_name}")
+
+    return metadata
+
+
+def fetch_metadata(doi: str, verbose: bool = False) -> dict[str, Any]:
     """
     Fetch metadata from a DOI using HTTP content negotiation.
 
@@ -14,44 +69,78 @@ def fetch_metadata_from_doi(doi: str, verbose: bool = False) -> dict[str, Any] |
         verbose: Enable verbose output
 
     Returns:
-        Dictionary containing CSL-JSON metadata, or None if fetch fails
+        Dictionary containing CSL-JSON metadata
+
+    Raises:
+        MetadataFetchError: If the fetch fails; ``transient`` tells whether a
+            later retry may succeed (network errors, 429, 5xx)
     """
-    # Construct DOI URL
-    if not doi.startswith("http"):
-        doi_url = f"https://doi.org/{doi}"
-    else:
-        doi_url = doi
+    doi_url = doi_to_url(doi)
+    if verbose:
+        print(f"  → Fetching metadata from: {doi_url}")
 
-    # Request CSL-JSON format
-    headers = {
-        "Accept": "application/vnd.citationstyles.csl+json",
-        "User-Agent": "pdf-metadata-enhancer/0.1.0 (https://github.com/Stadt-Geschichte-Basel/pdf-metadata-enhancer)",
-    }
+    metadata, _ = request_metadata(doi, doi_url)
+    return check_metadata(doi, metadata, verbose)
 
-    try:
-        if verbose:
-            print(f"  → Fetching metadata from: {doi_url}")
 
-        response = requests.get(doi_url, headers=headers, timeout=30, allow_redirects=True)
+def request_metadata(
+    doi: str, url: str, session: requests.Session | None = None, timeout: float = 30
+) -> tuple[Any, requests.Response]:
+    """
+    Request CSL-JSON for a DOI from a URL, following redirects.
+
+    Args:
+        doi: The DOI the metadata is requested for (used in error messages)
+        url: URL answering with CSL-JSON, e.g. from doi_to_url
+        session: Session to send the request with (default: a one-off request)
+        timeout: Timeout in seconds
+
+    Returns:
+        Tuple of the decoded JSON and the final response
+
+    Raises:
+        MetadataFetchError: If the request fails; ``transient`` tells whether a
+            later retry may succeed (network errors, 429, 5xx)
+    """
+    get = session.get if session is not None else requests.get
+    try:
+        response = get(url, headers=REQUEST_HEADERS, timeout=timeout, allow_redirects=True)
         response.raise_for_status()
 
         metadata = response.json()
 
-        if verbose:
-            print("  ✓ Successfully fetched metadata")
-            print(f"    Title: {metadata.get('title', 'N/A')}")
-            if "author" in metadata:
-                authors = metadata["author"]
-                if isinstance(authors, list) and len(authors) > 0:
-                    first_author = authors[0]
-                    author_name = (
-                        f"{first_author.get('family', '')}, {first_author.get('given', '')}"
-                    )
-                    print(f"    First author: {author_name}")
-
-        return metadata
-
+    except requests.exceptions.HTTPError as e:
+        status = e.response.status_code if e.response is not None else None
+        raise MetadataFetchError(
+            f"Failed to fetch metadata for DOI {doi}: {e}",
+            transient=status in TRANSIENT_STATUS_CODES,
+        ) from e
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        raise MetadataFetchError(
+            f"Failed to fetch metadata for DOI {doi}: {e}", transient=True
+        ) from e
     except requests.exceptions.RequestException as e:
+        raise MetadataFetchError(f"Failed to fetch metadata for DOI {doi}: {e}") from e
+    except ValueError as e:
+        raise MetadataFetchError(f"Invalid metadata for DOI {doi}: {e}") from e
+
+    return metadata, response
+
+
+def fetch_metadata_from_doi(doi: str, verbose: bool = False) -> dict[str, Any] | None:
+    """
+    Fetch metadata from a DOI using HTTP content negotiation.
+
+    Args:
+        doi: The DOI identifier (e.g., "10.21255/sgb-01-406352")
+        verbose: Enable verbose output
+
+    Returns:
+        Dictionary containing CSL-JSON metadata, or None if fetch fails
+    """
+    try:
+        return fetch_metadata(doi, verbose=verbose)
+    except MetadataFetchError as e:
         if verbose:
             print(f"  ✗ Failed to fetch metadata: {e}")
         return None
@@ -0,0 +1,125 @@
+"""Module for storing CSL-JSON metadata records once, keyed by their digest."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+
+class MetadataStore:
+    """
+    Content-addressed store of CSL-JSON metadata records.
+
+    Each distinct record is written once to ``<root>/ab/<sha256>.json``, where
+    the SHA256 is taken over the canonical JSON serialisation. Sidecars then
+    reference the record by digest instead of embedding a copy. Safe to share
+    between threads and processes.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._known: set[str] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def serialize(metadata: dict[str, Any]) -> bytes:
+        """Return the canonical JSON serialisation the digest is computed over."""
+        return json.dumps(
+            metadata, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+
+    def path_for(self, digest: str) -> Path:
+        """Return the store path of the record with the given digest."""
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def put(self, metadata: dict[str, Any]) -> str:
+        """
+        Store a metadata record unless it is already present.
+
+        Args:
+            metadata: CSL-JSON metadata
+
+        Returns:
+            SHA256 hex digest referencing the record
+        """
+        data = self.serialize(metadata)
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            if digest in self._known:
+                return digest
+
+        path = self.path_for(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so readers never see partial records
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._known.add(digest)
+        return digest
+
+    def get(self, digest: str) -> dict[str, Any]:
+        """
+        Load a metadata record by digest.
+
+        Args:
+            digest: SHA256 hex digest as returned by put
+
+        Returns:
+            CSL-JSON metadata
+
+        Raises:
+            FileNotFoundError: If the record is not in the store
+            ValueError: If the stored record does not match its digest
+        """
+        data = self.path_for(digest).read_bytes()
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Metadata record {digest} is corrupt")
+        return json.loads(data)
+
+
+def rehydrate_record(
+    sidecar_data: dict[str, Any], store: MetadataStore | None = None
+) -> dict[str, Any]:
+    """
+    Return a provenance record with its full metadata.
+
+    Records written with a metadata store carry a ``metadata_ref`` instead of
+    the ``metadata`` itself; the referenced record is loaded from the store.
+
+    Args:
+        sidecar_data: Provenance record as written by create_sidecar
+        store: Store to read from (default: the store named in the record)
+
+    Returns:
+        Copy of the record with ``metadata`` filled in
+    """
+    ref = sidecar_data.get("metadata_ref")
+    if ref is None or "metadata" in sidecar_data:
+        return sidecar_data
+
+    if store is None:
+        store = MetadataStore(Path(ref["store"]))
+    return {**sidecar_data, "metadata": store.get(ref["sha256"])}
+
+
+def load_sidecar(sidecar_path: Path, store: MetadataStore | None = None) -> dict[str, Any]:
+    """
+    Read a sidecar file and rehydrate its metadata.
+
+    Args:
+        sidecar_path: Path to sidecar JSON file
+        store: Store to read from (default: the store named in the sidecar)
+
+    Returns:
+        Provenance record with full metadata
+    """
+    with open(sidecar_path, encoding="utf-8") as f:
+        return rehydrate_record(json.load(f), store)
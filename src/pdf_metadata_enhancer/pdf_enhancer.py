@@ -5,59 +5,119 @@
 
 import pikepdf
 
+from .xmp import write_metadata
+
+# Keyword arguments for pdf.save() per save profile:
+#   fast:     copy streams as they are and keep the object layout (least CPU)
+#   default:  pikepdf's defaults
+#   archival: object streams, recompressed streams and linearization for fast web view
+SAVE_PROFILES: dict[str, dict[str, Any]] = {
+    "fast": {
+        "compress_streams": False,
+        "stream_decode_level": pikepdf.StreamDecodeLevel.none,
+        "object_stream_mode": pikepdf.ObjectStreamMode.preserve,
+    },
+    "default": {},
+    "archival": {
+        "compress_streams": True,
+        "stream_decode_level": pikepdf.StreamDecodeLevel.generalized,
+        "object_stream_mode": pikepdf.ObjectStreamMode.generate,
+        "recompress_flate": True,
+        "linearize": True,
+    },
+}
+DEFAULT_SAVE_PROFILE = "default"
+
+
+def extract_csl_fields(metadata: dict[str, Any]) -> dict[str, Any]:
+    """
+    Map CSL-JSON metadata to the values embedded into PDFs.
+
+    Args:
+        metadata: CSL-JSON metadata dictionary
+
+    Returns:
+        Dictionary with title, authors (list), subject, publisher, doi,
+        abstract, copyright and language
+    """
+    # Handle authors
+    authors = []
+    if "author" in metadata:
+        for author in metadata["author"]:
+            if "family" in author:
+                name = f"{author.get('given', '')} {author['family']}".strip()
+                authors.append(name)
+            elif "literal" in author:
+                authors.append(author["literal"])
+
+    # Subject/keywords
+    subject = metadata.get("subject", "")
+    if isinstance(subject, list):
+        subject = "; ".join(subject)
+
+    return {
+        "title": metadata.get("title", ""),
+        "authors": authors,
+        "subject": subject,
+        "publisher": metadata.get("publisher", ""),
+        "doi": metadata.get("DOI", ""),
+        "abstract": metadata.get("abstract", ""),
+        "copyright": metadata.get("copyright", ""),
+        "language": metadata.get("language", ""),
+    }
+
+
+def check_save_profile(save_profile: str) -> None:
+    """
+    Check that a save profile exists.
+
+    Raises:
+        ValueError: If the save profile is not in SAVE_PROFILES
+    """
+    if save_profile not in SAVE_PROFILES:
+        raise ValueError(
+            f"Unknown save profile: {save_profile}. Supported: {', '.join(SAVE_PROFILES)}"
+        )
+
 
 def enhance_pdf_metadata(
-    input_pdf_path: str, output_pdf_path: Path, metadata: dict[str, Any], verbose: bool = False
+    input_pdf_path: str,
+    output_pdf_path: Path,
+    metadata: dict[str, Any],
+    verbose: bool = False,
+    fast_xmp: bool = True,
+    save_profile: str = DEFAULT_SAVE_PROFILE,
 ) -> None:
     """
     Enhance a PDF file with metadata from CSL-JSON.
 
-    Updates both PDF InfoDict and XMP metadata.
+    Updates both PDF InfoDict and XMP metadata. By default the XMP packet is
+    written directly from the mapped values; PDFs whose existing packet holds
+    other metadata are edited through pikepdf's metadata editor instead.
 
     Args:
         input_pdf_path: Path to input PDF file
         output_pdf_path: Path for output PDF file
         metadata: CSL-JSON metadata dictionary
         verbose: Enable verbose output
+        fast_xmp: Write the XMP packet directly when that loses no existing metadata
+        save_profile: Name of the save profile in SAVE_PROFILES
+
+    Raises:
+        ValueError: If the save profile is unknown
     """
+    check_save_profile(save_profile)
+    save_options = dict(SAVE_PROFILES[save_profile])
+
     if verbose:
         print(f"  → Opening PDF: {input_pdf_path}")
 
     # Open PDF
     with pikepdf.open(input_pdf_path) as pdf:
         # Extract relevant metadata fields from CSL-JSON
-        title = metadata.get("title", "")
-
-        # Handle authors
-        authors = []
-        if "author" in metadata:
-            for author in metadata["author"]:
-                if "family" in author:
-                    name = f"{author.get('given', '')} {author['family']}".strip()
-                    authors.append(name)
-                elif "literal" in author:
-                    authors.append(author["literal"])
-        author_string = "; ".join(authors) if authors else ""
-
-        # Subject/keywords
-        subject = metadata.get("subject", "")
-        if isinstance(subject, list):
-            subject = "; ".join(subject)
-
-        # Publisher
-        publisher = metadata.get("publisher", "")
-
-        # DOI
-        doi = metadata.get("DOI", "")
-
-        # Abstract/description
-        abstract = metadata.get("abstract", "")
-
-        # Copyright/rights
-        copyright_text = metadata.get("copyright", "")
-
-        # Language
-        language = metadata.get("language", "")
+        fields = extract_csl_fields(metadata)
+        title = fields["title"]
+        author_string = "; ".join(fields["authors"])
 
         if verbose:
             print("  → Updating PDF metadata")
@@ -68,43 +128,64 @@ def enhance_pdf_metadata(
                 else f"    Authors: {author_string}"
             )
 
-        # Update PDF Info dictionary
-        with pdf.open_metadata() as meta:
-            # Dublin Core metadata
-            if title:
-                meta["dc:title"] = title
-            if authors:
-                meta["dc:creator"] = authors  # Should be a list
-            if subject:
-                meta["dc:subject"] = subject
-            if publisher:
-                meta["dc:publisher"] = publisher
-            if abstract:
-                meta["dc:description"] = abstract
-            if doi:
-                meta["dc:identifier"] = f"doi:{doi}"
-            if copyright_text:
-                meta["dc:rights"] = copyright_text
-            if language:
-                meta["dc:language"] = language
-
-            # Add PDF metadata
-            if title:
-                pdf.docinfo["/Title"] = title
-            if author_string:
-                pdf.docinfo["/Author"] = author_string
-            if subject:
-                pdf.docinfo["/Subject"] = subject
-            if abstract:
-                pdf.docinfo["/Keywords"] = abstract[:255]  # PDF has limits on keyword length
-            if copyright_text:
-                pdf.docinfo["/Copyright"] = copyright_text
-
-            # Add producer info
-            pdf.docinfo["/Producer"] = "pdf-metadata-enhancer/0.1.0"
+        if fast_xmp and write_metadata(pdf, fields, fields["copyright"]):
+            if verbose:
+                print("  → Wrote XMP packet directly")
+            # The packet has no pdf:PDFVersion, so skip re-parsing it on save
+            save_options["fix_metadata_version"] = False
+        else:
+            _edit_metadata(pdf, fields)
 
         # Save enhanced PDF
         if verbose:
-            print(f"  → Saving enhanced PDF to: {output_pdf_path}")
-
-        pdf.save(output_pdf_path)
+            print(f"  → Saving enhanced PDF to: {output_pdf_path} ({save_profile} profile)")
+
+        pdf.save(output_pdf_path, **save_options)
+
+
+def _edit_metadata(pdf: pikepdf.Pdf, fields: dict[str, Any]) -> None:
+    """Update XMP and InfoDict through pikepdf's metadata editor, keeping other metadata."""
+    title = fields["title"]
+    authors = fields["authors"]
+    author_string = "; ".join(authors) if authors else ""
+    subject = fields["subject"]
+    publisher = fields["publisher"]
+    doi = fields["doi"]
+    abstract = fields["abstract"]
+    copyright_text = fields["copyright"]
+    language = fields["language"]
+
+    # Update PDF Info dictionary
+    with pdf.open_metadata() as meta:
+        # Dublin Core metadata
+        if title:
+            meta["dc:title"] = title
+        if authors:
+            meta["dc:creator"] = authors  # Should be a list
+        if subject:
+            meta["dc:subject"] = subject
+        if publisher:
+            meta["dc:publisher"] = publisher
+        if abstract:
+            meta["dc:description"] = abstract
+        if doi:
+            meta["dc:identifier"] = f"doi:{doi}"
+        if copyright_text:
+            meta["dc:rights"] = copyright_text
+        if language:
+            meta["dc:language"] = language
+
+        # Add PDF metadata
+        if title:
+            pdf.docinfo["/Title"] = title
+        if author_string:
+            pdf.docinfo["/Author"] = author_string
+        if subject:
+            pdf.docinfo["/Subject"] = subject
+        if abstract:
+            pdf.docinfo["/Keywords"] = abstract[:255]  # PDF has limits on keyword length
+        if copyright_text:
+            pdf.docinfo["/Copyright"] = copyright_text
+
+        # Add producer info
+        pdf.docinfo["/Producer"] = "pdf-metadata-enhancer/0.1.0"
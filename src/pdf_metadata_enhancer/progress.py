@@ -0,0 +1,263 @@
+"""Module for live progress, throughput and ETA reporting of long runs."""
+
+import json
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import IO, Any
+
+STAGES = ("fetch", "enhance", "sidecar")
+
+
+class ProgressTracker:
+    """
+    Counters describing a running batch.
+
+    Updating is cheap so it can sit in the hot loop: finished rows are
+    recorded by the thread consuming results, stage changes by the workers.
+    Rates, ETA and output are computed by a ProgressReporter in the background
+    from snapshot().
+    """
+
+    def __init__(self, total: int | None = None):
+        self.total = total
+        self.done = 0
+        self.ok = 0
+        self.errors = 0
+        self.retried = 0
+        self.bytes = 0
+        self.in_flight = dict.fromkeys(STAGES, 0)
+        self._lock = threading.Lock()
+
+    def stage_changed(self, old: str | None, new: str | None) -> None:
+        """Move one row from stage old to stage new (None: not in a stage)."""
+        with self._lock:
+            if old is not None:
+                self.in_flight[old] -= 1
+            if new is not None:
+                self.in_flight[new] += 1
+
+    def record(self, result: Any) -> None:
+        """Count a finished row (an EnhanceResult)."""
+        with self._lock:
+            self.done += 1
+            if result.ok:
+                self.ok += 1
+                self.bytes += result.input_bytes
+            else:
+                self.errors += 1
+            if result.attempts > 1:
+                self.retried += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Copy the counters consistently, e.g. from a reporting thread.
+
+        Returns:
+            Dictionary with total, done, ok, errors, retried, bytes and
+            in_flight (rows per stage)
+        """
+        with self._lock:
+            return {
+                "total": self.total,
+                "done": self.done,
+                "ok": self.ok,
+                "errors": self.errors,
+                "retried": self.retried,
+                "bytes": self.bytes,
+                "in_flight": dict(self.in_flight),
+            }
+
+
+def count_in_background(tracker: ProgressTracker, rows: Iterable[Any]) -> threading.Thread:
+    """
+    Count rows on a daemon thread and set the tracker's total when done.
+
+    Use a second, independent iterator over the input, so the total (and with
+    it the ETA) becomes known without holding up processing. Errors are
+    ignored; the main run reports them.
+
+    Args:
+        tracker: Tracker to set the total on
+        rows: Iterable over the rows that will be processed
+
+    Returns:
+        The started thread
+    """
+
+    def count() -> None:
+        total = 0
+        try:
+            for _ in rows:
+                total += 1
+        except Exception:
+            return
+        tracker.total = total
+
+    thread = threading.Thread(target=count, name="progress-count", daemon=True)
+    thread.start()
+    return thread
+
+
+class ProgressReporter:
+    """
+    Background thread reporting a tracker's state at a fixed interval.
+
+    Draws a one-line live display on a terminal and/or appends JSON events
+    (one per line) to a file for headless runs. Rates are rolling averages
+    over the last ``window`` seconds. Use as a context manager; a final
+    "finished" event is written on exit.
+    """
+
+    def __init__(
+        self,
+        tracker: ProgressTracker,
+        interval: float = 1.0,
+        display: IO[str] | None = None,
+        events_path: Path | None = None,
+        window: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.tracker = tracker
+        self.interval = interval
+        self.display = display
+        self.events_path = events_path
+        self.window = window
+        self._clock = clock
+        self._started = clock()
+        # (time, rows done, bytes) at each snapshot, starting from an empty run
+        self._samples: deque[tuple[float, int, int]] = deque([(self._started, 0, 0)])
+        self._events = None
+        self._stop = threading.Event()
+        self._output_lock = threading.Lock()
+        self._line_width = 0
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+
+    def __enter__(self):
+        if self.events_path is not None:
+            self._events = open(self.events_path, "a", encoding="utf-8")
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        status = self.snapshot()
+        with self._output_lock:
+            self._clear_line()
+            if self._events is not None:
+                self._write_event("finished", status)
+                self._events.close()
+
+    def echo(self, message: str, err: bool = False) -> None:
+        """Print a message without garbling the live display."""
+        with self._output_lock:
+            self._clear_line()
+            print(message, file=sys.stderr if err else sys.stdout, flush=True)
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Compute the current status.
+
+        Returns:
+            Dictionary with rows done and remaining, ok and error counts, error
+            rate, rolling rows/s and MB/s, in-flight rows per stage, elapsed
+            seconds and ETA in seconds (None while unknown)
+        """
+        counts = self.tracker.snapshot()
+        now = self._clock()
+        done, processed_bytes = counts["done"], counts["bytes"]
+
+        self._samples.append((now, done, processed_bytes))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= self.window:
+            self._samples.popleft()
+        then, done_then, bytes_then = self._samples[0]
+        span = now - then
+        rows_per_second = (done - done_then) / span if span > 0 else 0.0
+        mb_per_second = (processed_bytes - bytes_then) / span / 1e6 if span > 0 else 0.0
+
+        total = counts["total"]
+        remaining = max(total - done, 0) if total is not None else None
+        eta = None
+        if remaining is not None and rows_per_second > 0:
+            eta = remaining / rows_per_second
+        elif remaining == 0:
+            eta = 0.0
+
+        return {
+            "done": done,
+            "total": total,
+            "remaining": remaining,
+            "ok": counts["ok"],
+            "errors": counts["errors"],
+            "retried": counts["retried"],
+            "error_rate": round(counts["errors"] / done, 4) if done else 0.0,
+            "rows_per_second": round(rows_per_second, 2),
+            "mb_per_second": round(mb_per_second, 3),
+            "in_flight": counts["in_flight"],
+            "elapsed_seconds": round(now - self._started, 1),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            status = self.snapshot()
+            with self._output_lock:
+                if self.display is not None:
+                    self._draw(format_status(status))
+                if self._events is not None:
+                    self._write_event("progress", status)
+
+    def _write_event(self, event: str, status: dict[str, Any]) -> None:
+        record = {
+            "event": event,
+            "timestamp": datetime.now(UTC).isoformat().replace("+00:00", "Z"),
+            **status,
+        }
+        self._events.write(json.dumps(record) + "\n")
+        self._events.flush()
+
+    def _draw(self, line: str) -> None:
+        padding = " " * max(self._line_width - len(line), 0)
+        self.display.write(f"\r{line}{padding}")
+        self.display.flush()
+        self._line_width = len(line)
+
+    def _clear_line(self) -> None:
+        if self.display is not None and self._line_width:
+            self.display.write("\r" + " " * self._line_width + "\r")
+            self.display.flush()
+            self._line_width = 0
+
+
+def format_status(status: dict[str, Any]) -> str:
+    """Render a status snapshot as one display line."""
+    if status["total"] is not None:
+        percent = status["done"] / status["total"] * 100 if status["total"] else 100.0
+        rows = f"{status['done']:,}/{status['total']:,} rows ({percent:.1f}%)"
+    else:
+        rows = f"{status['done']:,} rows"
+    stages = " ".join(f"{stage} {count}" for stage, count in status["in_flight"].items())
+    return (
+        f"{rows} | {status['rows_per_second']:.1f} rows/s {status['mb_per_second']:.1f} MB/s"
+        f" | {stages} | errors {status['errors']:,} ({status['error_rate']:.1%})"
+        f" | ETA {format_duration(status['eta_seconds'])}"
+    )
+
+
+def format_duration(seconds: float | None) -> str:
+    """Format seconds as e.g. 2h05m, 3m14s or 12s; None is shown as '?'."""
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
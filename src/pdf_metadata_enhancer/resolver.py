@@ -0,0 +1,187 @@
+"""Module for resolving DOIs directly at their registration agency."""
+
+import json
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote, urlsplit
+
+import requests
+
+from .metadata_fetcher import REQUEST_HEADERS, check_metadata, doi_to_url, request_metadata
+
+DOI_RESOLVER = "https://doi.org"
+
+# Ways a DOI may be written into an agency URL, tried in this order when learning
+_ENCODINGS = {
+    "raw": lambda doi: doi,
+    "path": lambda doi: quote(doi, safe="/"),
+    "full": lambda doi: quote(doi, safe=""),
+}
+
+
+def doi_prefix(doi: str) -> str:
+    """Return the prefix of a DOI, e.g. "10.21255" for "10.21255/sgb-01-406352"."""
+    return doi.strip().split("/", 1)[0].lower()
+
+
+def learn_route(doi: str, url: str) -> dict[str, str] | None:
+    """
+    Derive an endpoint template from the URL a DOI finally resolved to.
+
+    Args:
+        doi: The resolved DOI
+        url: Final URL after the resolver's redirects
+
+    Returns:
+        Route with a "template" containing ``{doi}`` and the DOI's "encoding",
+        or None if the DOI does not appear exactly once in the URL
+    """
+    lowered = url.lower()
+    for encoding, encode in _ENCODINGS.items():
+        needle = encode(doi.strip()).lower()
+        if lowered.count(needle) == 1:
+            index = lowered.index(needle)
+            template = url[:index] + "{doi}" + url[index + len(needle) :]
+            return {"template": template, "encoding": encoding}
+    return None
+
+
+class DoiResolver:
+    """
+    Fetcher sending DOIs straight to the endpoint of their registration agency.
+
+    A DOI whose prefix is unknown is resolved through doi.org; the final URL
+    of the redirect chain is turned into a template for the prefix (see
+    learn_route), so later DOIs with that prefix skip the redirect hop and its
+    extra connection. If a direct request fails, the DOI is resolved through
+    doi.org again, which also relearns the route. Connections are kept alive
+    per thread. Safe to share between worker threads; use in place of
+    metadata_fetcher.fetch_metadata.
+    """
+
+    def __init__(
+        self,
+        resolver_url: str = DOI_RESOLVER,
+        routes: dict[str, dict[str, str]] | None = None,
+        timeout: float = 30.0,
+        learn: bool = True,
+    ):
+        """
+        Create a resolver.
+
+        Args:
+            resolver_url: Base URL of the DOI resolver
+            routes: Known routes by DOI prefix, e.g. from load_routes
+            timeout: Timeout per request in seconds
+            learn: Learn routes from resolver redirects (False: always use the resolver)
+        """
+        self.resolver_url = resolver_url.rstrip("/")
+        self.routes = dict(routes or {})
+        self.timeout = timeout
+        self.learn = learn
+        # Requests answered "direct"ly, through the "resolver", and direct requests
+        # that failed and "fell_back" to the resolver
+        self.stats: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __call__(self, doi: str, verbose: bool = False) -> dict[str, Any]:
+        """
+        Fetch CSL-JSON metadata for a DOI.
+
+        Args:
+            doi: The DOI identifier (e.g., "10.21255/sgb-01-406352") or a DOI URL
+            verbose: Enable verbose output
+
+        Returns:
+            Dictionary containing CSL-JSON metadata
+
+        Raises:
+            MetadataFetchError: If the fetch fails; ``transient`` tells whether a
+                later retry may succeed (network errors, 429, 5xx)
+        """
+        if doi.startswith("http"):
+            return check_metadata(doi, self._get(doi, doi_to_url(doi), verbose)[0], verbose)
+
+        prefix = doi_prefix(doi)
+        route = self.routes.get(prefix)
+        if route is not None:
+            url = route["template"].replace("{doi}", _ENCODINGS[route["encoding"]](doi.strip()))
+            try:
+                metadata = check_metadata(doi, self._get(doi, url, verbose)[0], verbose)
+            except Exception as e:
+                if verbose:
+                    print(f"  ↻ Direct request failed, asking the resolver: {e}")
+                self._count("fell_back")
+            else:
+                self._count("direct")
+                return metadata
+
+        metadata, response = self._get(doi, f"{self.resolver_url}/{doi.strip()}", verbose)
+        self._count("resolver")
+        metadata = check_metadata(doi, metadata, verbose)
+        if self.learn and response.history:
+            self._learn(prefix, doi, response.url)
+        return metadata
+
+    def save_routes(self, path: Path) -> None:
+        """
+        Write the learned routes to a JSON file, for load_routes in a later run.
+
+        Args:
+            path: Path of the JSON file
+        """
+        with self._lock:
+            routes = dict(sorted(self.routes.items()))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(routes, f, indent=2)
+
+    def _learn(self, prefix: str, doi: str, url: str) -> None:
+        route = learn_route(doi, url)
+        if route is None or urlsplit(url).netloc == urlsplit(self.resolver_url).netloc:
+            return
+        with self._lock:
+            self.routes[prefix] = route
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _get(self, doi: str, url: str, verbose: bool) -> tuple[Any, requests.Response]:
+        if verbose:
+            print(f"  → Fetching metadata from: {url}")
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers.update(REQUEST_HEADERS)
+        return request_metadata(doi, url, session=session, timeout=self.timeout)
+
+
+def load_routes(path: Path) -> dict[str, dict[str, str]]:
+    """
+    Read routes saved by DoiResolver.save_routes.
+
+    Args:
+        path: Path of the JSON file; a missing file has no routes
+
+    Returns:
+        Routes by DOI prefix
+
+    Raises:
+        ValueError: If the file is not a valid route file
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            routes = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if not isinstance(routes, dict) or not all(
+        isinstance(route, dict)
+        and "{doi}" in route.get("template", "")
+        and route.get("encoding") in _ENCODINGS
+        for route in routes.values()
+    ):
+        raise ValueError(f"Invalid route file: {path}")
+    return routes
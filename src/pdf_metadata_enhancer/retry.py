@@ -0,0 +1,104 @@
+"""Module for deferring and retrying transiently failed mappings within a run."""
+
+import errno
+import heapq
+import itertools
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+
+import requests
+
+from .metadata_fetcher import MetadataFetchError
+
+# OS errors that typically clear up on their own (busy or flaky network storage)
+TRANSIENT_ERRNOS = {errno.EAGAIN, errno.EBUSY, errno.EINTR, errno.ETIMEDOUT, errno.ESTALE}
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Classify a failure as transient (worth retrying) or permanent.
+
+    Args:
+        error: Exception raised while processing a mapping
+
+    Returns:
+        True for network problems, rate limits, server errors and busy storage
+    """
+    if isinstance(error, MetadataFetchError):
+        return error.transient
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, OSError):
+        return error.errno in TRANSIENT_ERRNOS
+    return False
+
+
+class RetryScheduler:
+    """
+    Delay queue for transiently failed work items.
+
+    Items are parked with jittered exponential backoff: attempt n waits between
+    half and the full ``base_delay * 2**(n - 1)`` seconds, capped at
+    ``max_delay``. Other work keeps running while items wait.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 5.0,
+        max_delay: float = 120.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._rng = rng
+        self._queue: list[tuple[float, int, Any]] = []
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def should_retry(self, attempt: int) -> bool:
+        """Whether an item that failed on the given attempt may be tried again."""
+        return attempt < self.max_attempts
+
+    def park(self, item: Any, attempt: int) -> float:
+        """
+        Park an item that failed on the given attempt.
+
+        Args:
+            item: Work item to hand back once its delay has passed
+            attempt: Number of the attempt that just failed (1-based)
+
+        Returns:
+            Delay in seconds before the item becomes ready
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = delay / 2 + self._rng() * delay / 2
+        heapq.heappush(self._queue, (self._clock() + delay, next(self._counter), item))
+        return delay
+
+    def pop_ready(self) -> list[Any]:
+        """Remove and return all items whose delay has passed, oldest first."""
+        now = self._clock()
+        ready = []
+        while self._queue and self._queue[0][0] <= now:
+            ready.append(heapq.heappop(self._queue)[2])
+        return ready
+
+    def drain(self) -> list[Any]:
+        """Remove and return all parked items, whether ready or not, oldest first."""
+        items = [entry[2] for entry in sorted(self._queue)]
+        self._queue.clear()
+        return items
+
+    def next_ready_in(self) -> float | None:
+        """Seconds until the next item becomes ready, or None if nothing is parked."""
+        if not self._queue:
+            return None
+        return max(0.0, self._queue[0][0] - self._clock())
@@ -0,0 +1,301 @@
+"""Module for serving PDF enhancement as a local HTTP API."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+from .layout import OutputLayout
+from .metadata_fetcher import fetch_metadata_from_doi
+from .pdf_enhancer import enhance_pdf_metadata
+from .sidecar import create_sidecar
+
+
+class ServiceError(Exception):
+    """Error raised for a request that cannot be served, carrying an HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class EnhancementService:
+    """
+    Run enhancement jobs on a bounded worker pool.
+
+    At most ``workers`` jobs run at once and at most ``max_pending`` further
+    jobs wait for a worker; requests beyond that are rejected as busy. Output
+    paths are claimed through a flat OutputLayout that also treats files
+    already in the output directory as taken, so requests for same-named PDFs
+    never overwrite each other's outputs, including those of earlier runs.
+    A claim is held in memory only while its job runs.
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        workers: int = 4,
+        max_pending: int = 16,
+        fetcher=fetch_metadata_from_doi,
+        verbose: bool = False,
+    ):
+        self.out_dir = out_dir
+        self.upload_dir = out_dir / "uploads"
+        self.fetcher = fetcher
+        self.verbose = verbose
+        self._layout = OutputLayout(out_dir, keep_existing=True)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="enhance")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+
+    def enhance(
+        self,
+        pdf_path: str,
+        doi: str | None = None,
+        metadata: dict[str, Any] | None = None,
+        output_name: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Enhance one PDF on the worker pool and wait for the result.
+
+        Args:
+            pdf_path: Path to the input PDF
+            doi: DOI to fetch metadata for (optional if metadata is given)
+            metadata: Inline CSL-JSON metadata (skips the DOI lookup)
+            output_name: File name for the enhanced PDF inside the output directory;
+                a suffix is added if another request or an existing file uses the name
+
+        Returns:
+            Dictionary with output path, sidecar path and provenance record
+
+        Raises:
+            ServiceError: If the request is invalid, the pool is full or the job fails
+        """
+        if not doi and not metadata:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Either 'doi' or 'metadata' is required")
+        if metadata is not None and not isinstance(metadata, dict):
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "'metadata' must be a CSL-JSON object")
+        if not Path(pdf_path).is_file():
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"PDF not found: {pdf_path}")
+        # Only accept a bare file name so requests cannot write outside out_dir
+        if Path(output_name or pdf_path).name in ("", ".", ".."):
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Invalid output name: {output_name}")
+
+        if not self._slots.acquire(blocking=False):
+            raise ServiceError(HTTPStatus.SERVICE_UNAVAILABLE, "Too many pending requests")
+        try:
+            future = self._executor.submit(self._run, pdf_path, doi, metadata, output_name)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def _run(
+        self,
+        pdf_path: str,
+        doi: str | None,
+        metadata: dict[str, Any] | None,
+        output_name: str | None,
+    ) -> dict[str, Any]:
+        if metadata is None:
+            metadata = self.fetcher(doi, verbose=self.verbose)
+            if metadata is None:
+                raise ServiceError(
+                    HTTPStatus.BAD_GATEWAY, f"Failed to fetch metadata for DOI: {doi}"
+                )
+        doi = doi or metadata.get("DOI", "")
+
+        output_pdf_path = self._layout.resolve(output_name or pdf_path, doi)
+        sidecar_path = output_pdf_path.with_name(f"{output_pdf_path.name}.json")
+
+        try:
+            enhance_pdf_metadata(pdf_path, output_pdf_path, metadata, verbose=self.verbose)
+            record = create_sidecar(
+                pdf_path, output_pdf_path, doi, metadata, sidecar_path, verbose=self.verbose
+            )
+        except Exception as e:
+            raise ServiceError(
+                HTTPStatus.INTERNAL_SERVER_ERROR, f"Error processing {pdf_path}: {e}"
+            ) from e
+        finally:
+            # The output file now guards the name; keep only in-flight claims
+            self._layout.release(output_pdf_path)
+
+        return {
+            "status": "ok",
+            "output": str(output_pdf_path),
+            "sidecar": str(sidecar_path),
+            "provenance": record,
+        }
+
+    def store_upload(self, data: bytes, filename: str | None = None) -> Path:
+        """
+        Store an uploaded PDF under its content digest.
+
+        The file is written to a temporary name and moved into place, so
+        concurrent uploads of the same bytes never see a partial file; an
+        upload already stored is not written again.
+
+        Args:
+            data: Raw PDF bytes
+            filename: Original file name, used for the enhanced output
+
+        Returns:
+            Path of the stored upload
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        name = Path(filename).name if filename else ""
+        if name in ("", ".", ".."):
+            name = f"{digest}.pdf"
+        upload_path = self.upload_dir / digest / name
+        if not upload_path.exists():
+            upload_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=upload_path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, upload_path)
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+        return upload_path
+
+    def shutdown(self) -> None:
+        """Wait for running jobs and stop the worker pool."""
+        self._executor.shutdown(wait=True)
+
+
+class EnhancementRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler for the enhancement API.
+
+    Endpoints:
+        GET  /health   - liveness check
+        POST /enhance  - JSON body {"pdf": path, "doi": ..., "metadata": {...}}
+                         or a raw application/pdf upload with ?doi=... or
+                         ?metadata=<CSL-JSON>; send "Accept: application/pdf"
+                         to receive the enhanced PDF instead of JSON
+    """
+
+    server_version = "pdf-metadata-enhancer/0.1.0"
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok"})
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"status": "error", "error": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/enhance":
+            self._send_json(HTTPStatus.NOT_FOUND, {"status": "error", "error": "Not found"})
+            return
+
+        return_pdf = "application/pdf" in self.headers.get("Accept", "")
+        try:
+            result = self._handle_enhance(parse_qs(url.query))
+            body = Path(result["output"]).read_bytes() if return_pdf else None
+        except ServiceError as e:
+            self._send_json(e.status, {"status": "error", "error": str(e)})
+            return
+        except Exception as e:
+            # Always answer, rather than dropping the connection with a traceback
+            self._send_json(
+                HTTPStatus.INTERNAL_SERVER_ERROR,
+                {"status": "error", "error": f"Internal error - {e}"},
+            )
+            return
+
+        if return_pdf:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("X-Output-SHA256", result["provenance"]["output"]["sha256"])
+            self.send_header("X-Provenance-Path", result["sidecar"])
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(HTTPStatus.OK, result)
+
+    def _handle_enhance(self, query: dict[str, list[str]]) -> dict[str, Any]:
+        service: EnhancementService = self.server.service
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length header")
+        body = self.rfile.read(length)
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+
+        if content_type == "application/pdf":
+            if not body:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "Empty PDF upload")
+            filename = query.get("filename", [None])[0]
+            metadata = query.get("metadata", [None])[0]
+            try:
+                metadata = json.loads(metadata) if metadata else None
+            except json.JSONDecodeError as e:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, f"Invalid metadata JSON - {e}") from e
+            try:
+                pdf_path = service.store_upload(body, filename)
+            except OSError as e:
+                raise ServiceError(
+                    HTTPStatus.INTERNAL_SERVER_ERROR, f"Error storing upload - {e}"
+                ) from e
+            return service.enhance(
+                str(pdf_path), query.get("doi", [None])[0], metadata, pdf_path.name
+            )
+
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Invalid JSON - {e}") from e
+        if not isinstance(request, dict) or "pdf" not in request:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Missing 'pdf' field")
+        return service.enhance(
+            str(request["pdf"]),
+            request.get("doi"),
+            request.get("metadata"),
+            request.get("output"),
+        )
+
+    def _send_json(self, status: HTTPStatus, data: dict[str, Any]) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.service.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(service: EnhancementService, host: str, port: int) -> ThreadingHTTPServer:
+    """
+    Create an HTTP server bound to host and port that serves the given service.
+
+    Args:
+        service: Enhancement service executing the jobs
+        host: Interface to bind to
+        port: Port to bind to (0 picks a free port)
+
+    Returns:
+        Configured server, not yet serving
+    """
+    server = ThreadingHTTPServer((host, port), EnhancementRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
@@ -0,0 +1,277 @@
+"""Module for splitting a mapping over several nodes and merging their results."""
+
+import hashlib
+import json
+import re
+from collections.abc import Iterable, Iterator, Mapping
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from .input_parser import detect_format, iter_input_file, write_mapping_file
+
+SUMMARY_PATTERN = "shard-*-of-*.summary.json"
+_SHARD_SPEC = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """
+    Parse a shard specification such as "2/8".
+
+    Args:
+        spec: "i/N" with 1 <= i <= N
+
+    Returns:
+        Tuple of (shard index, shard count)
+
+    Raises:
+        ValueError: If the specification is malformed or out of range
+    """
+    match = _SHARD_SPEC.match(spec)
+    if match is None:
+        raise ValueError(f"Invalid shard: {spec}. Expected i/N, e.g. 1/4")
+    index, count = int(match[1]), int(match[2])
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard: {spec}. The index must be between 1 and {count}")
+    return index, count
+
+
+def shard_of(doi: str, count: int) -> int:
+    """
+    Assign a DOI to one of count shards.
+
+    The assignment only depends on the normalised DOI, so it is the same on
+    every node and rows sharing a DOI always land on the same shard. Only
+    the doi output layout derives paths that rows on different shards cannot
+    share.
+
+    Args:
+        doi: DOI of the mapping row
+        count: Number of shards
+
+    Returns:
+        Shard index between 1 and count
+    """
+    digest = hashlib.sha256(doi.strip().lower().encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def select_shard(
+    mappings: Iterable[Mapping[str, str]], index: int, count: int
+) -> Iterator[Mapping[str, str]]:
+    """
+    Yield the mapping rows belonging to one shard, in input order.
+
+    Args:
+        mappings: Iterable of dictionaries with 'pdf' and 'doi' keys
+        index: Shard index between 1 and count
+        count: Number of shards
+
+    Yields:
+        Rows whose DOI is assigned to the shard
+    """
+    for mapping in mappings:
+        if shard_of(mapping["doi"], count) == index:
+            yield mapping
+
+
+def shard_name(index: int, count: int) -> str:
+    """Return the name prefix of per-shard files, e.g. "shard-2-of-8"."""
+    return f"shard-{index}-of-{count}"
+
+
+def write_manifest(manifest_path: Path, entries: Iterable[tuple[str, str]]) -> None:
+    """
+    Write a checksum manifest in sha256sum format.
+
+    Args:
+        manifest_path: Path of the manifest file
+        entries: Tuples of (SHA256 hex digest, relative path)
+    """
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        for digest, path in entries:
+            f.write(f"{digest}  {path}\n")
+
+
+def read_manifest(manifest_path: Path) -> Iterator[tuple[str, str]]:
+    """
+    Read a checksum manifest in sha256sum format.
+
+    Args:
+        manifest_path: Path of the manifest file
+
+    Yields:
+        Tuples of (SHA256 hex digest, relative path)
+    """
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line:
+                digest, _, path = line.partition("  ")
+                yield digest, path
+
+
+def write_shard_summary(summary_path: Path, summary: dict[str, Any]) -> None:
+    """
+    Write the summary of one shard's run.
+
+    Args:
+        summary_path: Path of the summary file, named after shard_name
+        summary: Run summary as assembled by the ingest command
+    """
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+
+def merge_shards(
+    out_dir: Path,
+    journal_path: Path | None = None,
+    manifest_path: Path | None = None,
+    failed_file: Path | None = None,
+) -> dict[str, Any]:
+    """
+    Combine the per-shard results of a sharded run into one record.
+
+    Reads the shard summaries in out_dir, concatenates the shards' journals
+    and manifests and collects their failed rows. The merge only succeeds if
+    every shard of the run is present and finished without errors, and no two
+    shards wrote the same output path.
+
+    Args:
+        out_dir: Output directory shared by all shards
+        journal_path: Consolidated journal (default: out_dir/provenance.jsonl;
+            only written if the shards used journals, and left untouched if
+            it is the one journal all shards appended to)
+        manifest_path: Consolidated manifest (default: out_dir/manifest-sha256.txt)
+        failed_file: Consolidated failed rows (default: failed_mappings.<input
+            format> in out_dir; only written if rows failed)
+
+    Returns:
+        Consolidated summary; "ok" tells whether the run as a whole succeeded
+
+    Raises:
+        ValueError: If there are no shard summaries, they belong to different runs,
+            journal_path is one of several shard journals or manifest_path is
+            a manifest of a BagIt bag
+    """
+    summaries = []
+    for path in sorted(out_dir.glob(SUMMARY_PATTERN)):
+        with open(path, encoding="utf-8") as f:
+            summaries.append(json.load(f))
+    if not summaries:
+        raise ValueError(f"No shard summaries ({SUMMARY_PATTERN}) found in {out_dir}")
+
+    counts = {summary["shard"]["count"] for summary in summaries}
+    inputs = {summary["input"] for summary in summaries}
+    if len(counts) > 1 or len(inputs) > 1:
+        raise ValueError("Shard summaries belong to different runs (shard count or input differ)")
+    count = counts.pop()
+
+    summaries.sort(key=lambda summary: summary["shard"]["index"])
+    indices = [summary["shard"]["index"] for summary in summaries]
+    duplicates = sorted({index for index in indices if indices.count(index) > 1})
+    missing = sorted(set(range(1, count + 1)) - set(indices))
+
+    if journal_path is None:
+        journal_path = out_dir / "provenance.jsonl"
+    if manifest_path is None:
+        manifest_path = out_dir / "manifest-sha256.txt"
+    if (manifest_path.parent / "bagit.txt").exists() and manifest_path.name.startswith(
+        ("manifest-", "tagmanifest-")
+    ):
+        raise ValueError(
+            f"{manifest_path} would overwrite a manifest of the BagIt bag in "
+            f"{manifest_path.parent}; choose another manifest path"
+        )
+
+    # Journals: shards may share one journal file; copy each file once
+    journals = list(
+        dict.fromkeys(Path(s["journal"]).resolve() for s in summaries if s.get("journal"))
+    )
+    records = 0
+    if journals and journals == [journal_path.resolve()]:
+        # Every shard appended to the consolidated journal already
+        records = _count_records(journals[0])
+    elif journal_path.resolve() in journals:
+        raise ValueError(
+            f"The consolidated journal {journal_path} is one of the shard journals; "
+            "choose another path"
+        )
+    elif journals:
+        with open(journal_path, "w", encoding="utf-8") as out:
+            for journal in journals:
+                with open(journal, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            out.write(line if line.endswith("\n") else line + "\n")
+                            records += 1
+
+    # Manifests: the same output path from two shards means one overwrote the other
+    seen = set()
+    conflicts = []
+    entries = []
+    for summary in summaries:
+        for digest, path in read_manifest(out_dir / summary["manifest"]):
+            if path in seen:
+                conflicts.append(path)
+                continue
+            seen.add(path)
+            entries.append((digest, path))
+    write_manifest(manifest_path, entries)
+
+    # Failed rows are written in the format of the first shard's failed file
+    failed_rows = []
+    suffix = None
+    for summary in summaries:
+        if summary.get("failed_file"):
+            shard_failed = Path(summary["failed_file"])
+            failed_rows.extend(_read_failed_rows(shard_failed))
+            if suffix is None:
+                input_format, compression = detect_format(shard_failed)
+                suffix = input_format + (compression or "")
+    if failed_rows:
+        if failed_file is None:
+            failed_file = out_dir / f"failed_mappings{suffix}"
+        write_mapping_file(failed_file, failed_rows)
+
+    totals = {
+        key: sum(summary[key] for summary in summaries)
+        for key in ("processed", "errors", "retried")
+    }
+    ok = (
+        not missing
+        and not duplicates
+        and not conflicts
+        and all(summary["exit_status"] == 0 for summary in summaries)
+    )
+    return {
+        "version": "0.1.0",
+        "timestamp": datetime.now(UTC).isoformat().replace("+00:00", "Z"),
+        "input": inputs.pop(),
+        "shards": {"count": count, "present": indices, "missing": missing},
+        "duplicate_shards": duplicates,
+        **totals,
+        "conflicting_outputs": conflicts,
+        "journal": str(journal_path) if journals else None,
+        "journal_records": records,
+        "manifest": str(manifest_path),
+        "manifest_entries": len(entries),
+        "failed_file": str(failed_file) if failed_rows else None,
+        "failed_rows": len(failed_rows),
+        "shard_summaries": summaries,
+        "ok": ok,
+    }
+
+
+def _count_records(journal: Path) -> int:
+    """Count the records in a JSONL journal."""
+    with open(journal, encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def _read_failed_rows(failed_file: Path) -> list[dict[str, str]]:
+    """Read a shard's failed rows; a missing or empty file has none."""
+    try:
+        return list(iter_input_file(failed_file))
+    except (OSError, ValueError):
+        return []
@@ -1,30 +1,79 @@
 """Module for creating provenance sidecar files."""
 
-import hashlib
 import json
-from datetime import datetime
+import threading
+from collections.abc import Callable, Sequence
+from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
+from .hashing import DEFAULT_ALGORITHMS, HASH_CHUNK_SIZE, hash_file
+from .metadata_store import MetadataStore
 
-def compute_file_hash(file_path: str) -> str:
+
+def compute_file_hash(file_path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
     """
     Compute SHA256 hash of a file.
 
     Args:
         file_path: Path to file
+        chunk_size: Number of bytes read per call
 
     Returns:
         Hex string of SHA256 hash
     """
-    sha256_hash = hashlib.sha256()
+    return hash_file(file_path, ("sha256",), chunk_size)["sha256"]
+
+
+def write_sidecar(sidecar_data: dict[str, Any], sidecar_path: Path) -> Path:
+    """
+    Write a provenance record to a JSON sidecar file.
+
+    This is the default provenance sink used by create_sidecar.
+
+    Args:
+        sidecar_data: Provenance record
+        sidecar_path: Path for sidecar JSON file
+
+    Returns:
+        Path the record was written to
+    """
+    with open(sidecar_path, "w", encoding="utf-8") as f:
+        json.dump(sidecar_data, f, indent=2, ensure_ascii=False)
 
-    with open(file_path, "rb") as f:
-        # Read in chunks to handle large files
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
+    return sidecar_path
 
-    return sha256_hash.hexdigest()
+
+class JournalSink:
+    """
+    Provenance sink appending every record as one line to a JSONL journal.
+
+    Use instead of write_sidecar to keep all provenance of a run in one file.
+    Safe to share between worker threads.
+    """
+
+    def __init__(self, journal_path: Path):
+        self.path = journal_path
+        self._lock = threading.Lock()
+        self._file = open(journal_path, "a", encoding="utf-8")
+
+    def __call__(self, sidecar_data: dict[str, Any], sidecar_path: Path) -> Path:
+        line = json.dumps(sidecar_data, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+        return self.path
+
+    def close(self) -> None:
+        """Close the journal file."""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
 
 def create_sidecar(
@@ -34,7 +83,13 @@ def create_sidecar(
     metadata: dict[str, Any],
     sidecar_path: Path,
     verbose: bool = False,
-) -> None:
+    sink: Callable[[dict[str, Any], Path], Any] | None = None,
+    algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    input_digests: dict[str, str] | None = None,
+    extra: dict[str, Any] | None = None,
+    metadata_store: MetadataStore | None = None,
+    output_digests: dict[str, str] | None = None,
+) -> dict[str, Any]:
     """
     Create a JSON sidecar file with provenance information.
 
@@ -45,29 +100,53 @@ def create_sidecar(
         metadata: CSL-JSON metadata
         sidecar_path: Path for sidecar JSON file
         verbose: Enable verbose output
+        sink: Callable receiving the record and sidecar path (default: write_sidecar)
+        algorithms: Digests recorded for input and output, see hashing.normalize_algorithms
+        input_digests: Already computed input digests, to avoid hashing the input again
+        extra: Additional provenance fields merged into the record (e.g. the output layout)
+        metadata_store: Store the metadata there and reference it by digest
+            instead of embedding it (see metadata_store.load_sidecar)
+        output_digests: Already known output digests, e.g. of a linked duplicate
+
+    Returns:
+        The provenance record written to the sidecar file
     """
     if verbose:
         print(f"  → Creating sidecar file: {sidecar_path.name}")
 
-    # Compute hashes
-    input_hash = compute_file_hash(input_pdf_path)
-    output_hash = compute_file_hash(output_pdf_path)
+    # Compute hashes, all digests in one pass per file
+    if input_digests is None or not set(algorithms) <= input_digests.keys():
+        input_digests = hash_file(input_pdf_path, algorithms)
+    input_digests = {name: input_digests[name] for name in algorithms}
+    if output_digests is None or not set(algorithms) <= output_digests.keys():
+        output_digests = hash_file(output_pdf_path, algorithms)
+    output_digests = {name: output_digests[name] for name in algorithms}
+    input_hash = input_digests["sha256"]
+    output_hash = output_digests["sha256"]
 
     # Create provenance record
     sidecar_data = {
         "version": "0.1.0",
-        "timestamp": datetime.utcnow().isoformat() + "Z",
-        "input": {"path": str(input_pdf_path), "sha256": input_hash},
-        "output": {"path": str(output_pdf_path), "sha256": output_hash},
+        "timestamp": datetime.now(UTC).isoformat().replace("+00:00", "Z"),
+        "input": {"path": str(input_pdf_path), **input_digests},
+        "output": {"path": str(output_pdf_path), **output_digests},
         "doi": doi,
         "metadata": metadata,
+        **(extra or {}),
     }
+    if metadata_store is not None:
+        del sidecar_data["metadata"]
+        sidecar_data["metadata_ref"] = {
+            "sha256": metadata_store.put(metadata),
+            "store": str(metadata_store.root),
+        }
 
     # Write sidecar file
-    with open(sidecar_path, "w", encoding="utf-8") as f:
-        json.dump(sidecar_data, f, indent=2, ensure_ascii=False)
+    (sink or write_sidecar)(sidecar_data, sidecar_path)
 
     if verbose:
         print("  ✓ Sidecar file created")
         print(f"    Input hash: {input_hash[:16]}...")
         print(f"    Output hash: {output_hash[:16]}...")
+
+    return sidecar_data
@@ -0,0 +1,218 @@
+"""Module for auditing enhanced PDFs against their provenance records."""
+
+import hashlib
+import json
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import pikepdf
+
+from .hashing import hash_file
+from .metadata_store import MetadataStore, rehydrate_record
+from .pdf_enhancer import extract_csl_fields
+
+
+def load_provenance_records(source: Path) -> Iterator[tuple[str, dict[str, Any]]]:
+    """
+    Load provenance records from sidecar files or a JSONL journal.
+
+    Args:
+        source: Directory searched recursively for sidecar JSON files, or a
+            JSONL journal with one provenance record per line
+
+    Yields:
+        Tuples of (origin, record) where origin names the sidecar file or journal line
+
+    Raises:
+        ValueError: If a journal line is not valid JSON
+    """
+    if source.is_dir():
+        for sidecar_path in sorted(source.rglob("*.json")):
+            try:
+                with open(sidecar_path, encoding="utf-8") as f:
+                    record = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue  # Not a sidecar file
+            if _is_provenance_record(record):
+                yield str(sidecar_path), record
+        return
+
+    with open(source, encoding="utf-8") as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_num}: Invalid JSON - {e}") from e
+            if _is_provenance_record(record):
+                yield f"{source}:{line_num}", record
+
+
+def _is_provenance_record(record: Any) -> bool:
+    return (
+        isinstance(record, dict)
+        and isinstance(record.get("input"), dict)
+        and isinstance(record.get("output"), dict)
+    )
+
+
+def check_embedded_metadata(output_pdf_path: Path, metadata: dict[str, Any]) -> list[dict]:
+    """
+    Compare the XMP and docinfo metadata of a PDF against CSL-JSON metadata.
+
+    Only the fields written deterministically by enhance_pdf_metadata are
+    checked: title, authors and DOI.
+
+    Args:
+        output_pdf_path: Path to an enhanced PDF
+        metadata: CSL-JSON metadata recorded in the provenance record
+
+    Returns:
+        List of mismatches, each with field, expected and actual values
+    """
+    fields = extract_csl_fields(metadata)
+    expected: list[tuple[str, Any]] = []
+    if fields["title"]:
+        expected.append(("/Title", fields["title"]))
+        expected.append(("dc:title", fields["title"]))
+    if fields["authors"]:
+        expected.append(("/Author", "; ".join(fields["authors"])))
+        expected.append(("dc:creator", fields["authors"]))
+    if fields["doi"]:
+        expected.append(("dc:identifier", f"doi:{fields['doi']}"))
+
+    mismatches = []
+    with pikepdf.open(output_pdf_path) as pdf:
+        xmp = pdf.open_metadata(set_pikepdf_as_editor=False, update_docinfo=False)
+        for field, value in expected:
+            if field.startswith("/"):
+                actual = str(pdf.docinfo[field]) if field in pdf.docinfo else None
+            else:
+                actual = xmp.get(field)
+            if actual != value:
+                mismatches.append({"field": field, "expected": value, "actual": actual})
+
+    return mismatches
+
+
+def verify_record(
+    origin: str,
+    record: dict[str, Any],
+    base_dir: Path | None = None,
+    check_inputs: bool = True,
+    check_metadata: bool = False,
+) -> dict[str, Any]:
+    """
+    Verify the files referenced by one provenance record.
+
+    Args:
+        origin: Where the record was loaded from
+        record: Provenance record as written by create_sidecar
+        base_dir: Directory relative paths in the record are resolved against
+        check_inputs: Also verify the original input PDF
+        check_metadata: Also compare embedded metadata with the recorded metadata
+
+    Returns:
+        Dictionary with origin, status ('ok' or 'failed') and a list of problems
+    """
+    problems = []
+    roles = ["input", "output"] if check_inputs else ["output"]
+
+    for role in roles:
+        entry = record[role]
+        path = Path(entry.get("path", ""))
+        if base_dir is not None and not path.is_absolute():
+            path = base_dir / path
+
+        if not path.is_file():
+            problems.append({"kind": "missing", "file": role, "path": str(path)})
+            continue
+
+        # Re-check every recorded digest in one pass over the file
+        algorithms = [key for key in entry if key in hashlib.algorithms_available]
+        actual = hash_file(path, algorithms or ["sha256"])
+        mismatched = [name for name in actual if actual[name] != entry.get(name)]
+        for name in mismatched:
+            problems.append(
+                {
+                    "kind": "mismatch",
+                    "file": role,
+                    "path": str(path),
+                    "algorithm": name,
+                    "expected": entry.get(name),
+                    "actual": actual[name],
+                }
+            )
+        if mismatched:
+            continue
+        if (
+            role == "output"
+            and check_metadata
+            and ("metadata" in record or "metadata_ref" in record)
+        ):
+            try:
+                store = None
+                if "metadata_ref" in record and base_dir is not None:
+                    store = MetadataStore(base_dir / record["metadata_ref"]["store"])
+                metadata = rehydrate_record(record, store)["metadata"]
+                mismatches = check_embedded_metadata(path, metadata)
+            except Exception as e:
+                mismatches = [{"field": None, "expected": None, "actual": str(e)}]
+            for mismatch in mismatches:
+                problems.append({"kind": "metadata", "file": role, "path": str(path), **mismatch})
+
+    return {
+        "origin": origin,
+        "doi": record.get("doi"),
+        "status": "failed" if problems else "ok",
+        "problems": problems,
+    }
+
+
+def verify_records(
+    records: Iterable[tuple[str, dict[str, Any]]],
+    base_dir: Path | None = None,
+    workers: int = 4,
+    check_inputs: bool = True,
+    check_metadata: bool = False,
+) -> dict[str, Any]:
+    """
+    Verify many provenance records in parallel.
+
+    Args:
+        records: Tuples of (origin, record), e.g. from load_provenance_records
+        base_dir: Directory relative paths in the records are resolved against
+        workers: Number of files hashed concurrently
+        check_inputs: Also verify the original input PDFs
+        check_metadata: Also compare embedded metadata with the recorded metadata
+
+    Returns:
+        Machine-readable report with counts and the records that failed
+    """
+    checked = 0
+    failures = []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            lambda item: verify_record(*item, base_dir, check_inputs, check_metadata), records
+        )
+        for result in results:
+            checked += 1
+            if result["status"] != "ok":
+                failures.append(result)
+
+    return {
+        "checked": checked,
+        "ok": checked - len(failures),
+        "failed": len(failures),
+        "missing": sum(p["kind"] == "missing" for f in failures for p in f["problems"]),
+        "mismatched": sum(p["kind"] == "mismatch" for f in failures for p in f["problems"]),
+        "metadata_mismatches": sum(
+            p["kind"] == "metadata" for f in failures for p in f["problems"]
+        ),
+        "failures": failures,
+    }
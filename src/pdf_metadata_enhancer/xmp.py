@@ -0,0 +1,209 @@
+"""Module for writing XMP metadata packets directly, without an XML round trip."""
+
+import re
+from datetime import UTC, datetime
+from typing import Any
+from xml.sax.saxutils import escape
+
+import pikepdf
+
+NS_X = "adobe:ns:meta/"
+NS_RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+NS_DC = "http://purl.org/dc/elements/1.1/"
+NS_XMP = "http://ns.adobe.com/xap/1.0/"
+NS_PDF = "http://ns.adobe.com/pdf/1.3/"
+NS_XML = "http://www.w3.org/XML/1998/namespace"
+
+# Namespaces the fast path understands; anything else in an existing packet is kept
+# by falling back to pikepdf's metadata editor
+KNOWN_NAMESPACES = {NS_X, NS_RDF, NS_DC, NS_XMP, NS_PDF, NS_XML}
+
+# Same producer string pikepdf's metadata editor records
+PRODUCER = f"pikepdf {pikepdf.__version__}"
+
+# DocumentInfo keys pikepdf keeps in sync with XMP; keys without an XMP value are removed
+SYNCED_DOCINFO_KEYS = (
+    "/Author",
+    "/Subject",
+    "/Title",
+    "/Keywords",
+    "/Producer",
+    "/CreationDate",
+    "/Creator",
+    "/ModDate",
+)
+
+_ILLEGAL_XML_CHARS = re.compile(r"[^\x09\x0A\x0D\x20-\uD7FF\uE000-\uFFFD\U00010000-\U0010FFFF]")
+_NAMESPACE_DECL = re.compile(rb"""xmlns:([\w.-]+)\s*=\s*["']([^"']*)["']""")
+_PROPERTY_NAME = re.compile(rb"""<([\w.-]+):([\w.-]+)|\s([\w.-]+):([\w.-]+)\s*=""")
+
+_PACKET_BEGIN = (
+    '<?xpacket begin="\ufeff" id="W5M0MpCehiHzreSzNTczkc9d"?>\n'
+    f'<x:xmpmeta xmlns:x="{NS_X}" x:xmptk="pikepdf">\n'
+    f' <rdf:RDF xmlns:rdf="{NS_RDF}">\n'
+    f'  <rdf:Description rdf:about="" xmlns:dc="{NS_DC}" xmlns:xmp="{NS_XMP}"'
+    f' xmlns:pdf="{NS_PDF}">\n'
+)
+_PACKET_END = '  </rdf:Description>\n </rdf:RDF>\n</x:xmpmeta>\n<?xpacket end="w"?>\n'
+
+# Element templates per RDF value type, matching what pikepdf writes for each dc field
+_TEXT = "   <{0}>{1}</{0}>\n"
+_ALT = '   <{0}><rdf:Alt><rdf:li xml:lang="x-default">{1}</rdf:li></rdf:Alt></{0}>\n'
+_BAG = "   <{0}><rdf:Bag>{1}</rdf:Bag></{0}>\n"
+_SEQ = "   <{0}><rdf:Seq>{1}</rdf:Seq></{0}>\n"
+_LI = "<rdf:li>{0}</rdf:li>"
+
+
+def _clean(value: str) -> str:
+    """Drop characters XML 1.0 does not allow, as pikepdf does."""
+    return _ILLEGAL_XML_CHARS.sub("", value)
+
+
+def _text(value: str) -> str:
+    return escape(_clean(value))
+
+
+def dublin_core_values(fields: dict[str, Any]) -> dict[str, Any]:
+    """
+    Select the Dublin Core properties written for the mapped CSL fields.
+
+    Args:
+        fields: Values as returned by extract_csl_fields
+
+    Returns:
+        Dictionary of dc property names (e.g. "dc:title") to string or list values
+    """
+    values = {}
+    if fields["title"]:
+        values["dc:title"] = fields["title"]
+    if fields["authors"]:
+        values["dc:creator"] = fields["authors"]
+    if fields["subject"]:
+        values["dc:subject"] = fields["subject"]
+    if fields["publisher"]:
+        values["dc:publisher"] = fields["publisher"]
+    if fields["abstract"]:
+        values["dc:description"] = fields["abstract"]
+    if fields["doi"]:
+        values["dc:identifier"] = f"doi:{fields['doi']}"
+    if fields["copyright"]:
+        values["dc:rights"] = fields["copyright"]
+    if fields["language"]:
+        values["dc:language"] = fields["language"]
+    return values
+
+
+def build_xmp_packet(dc_values: dict[str, Any], metadata_date: str | None = None) -> bytes:
+    """
+    Serialise an XMP packet from Dublin Core values.
+
+    Args:
+        dc_values: Dictionary as returned by dublin_core_values
+        metadata_date: ISO 8601 xmp:MetadataDate (default: now, in UTC)
+
+    Returns:
+        UTF-8 encoded XMP packet including the xpacket wrapper
+    """
+    if metadata_date is None:
+        metadata_date = datetime.now(UTC).isoformat()
+
+    parts = [_PACKET_BEGIN]
+    for name, value in dc_values.items():
+        if name == "dc:creator":
+            items = "".join(_LI.format(_text(author)) for author in value)
+            parts.append(_SEQ.format(name, items))
+        elif name in ("dc:subject", "dc:publisher", "dc:language"):
+            parts.append(_BAG.format(name, _LI.format(_text(value))))
+        elif name in ("dc:title", "dc:description", "dc:rights"):
+            parts.append(_ALT.format(name, _text(value)))
+        else:
+            parts.append(_TEXT.format(name, _text(value)))
+    parts.append(_TEXT.format("xmp:MetadataDate", _text(metadata_date)))
+    parts.append(_TEXT.format("pdf:Producer", _text(PRODUCER)))
+    parts.append(_PACKET_END)
+    return "".join(parts).encode("utf-8")
+
+
+def can_replace_packet(packet: bytes, dc_values: dict[str, Any]) -> bool:
+    """
+    Check whether an existing XMP packet can be replaced without losing data.
+
+    That is the case when it only uses known namespaces and holds no property
+    besides the ones about to be written.
+
+    Args:
+        packet: Existing XMP packet bytes
+        dc_values: Dictionary as returned by dublin_core_values
+
+    Returns:
+        True if writing a fresh packet is equivalent to editing the existing one
+    """
+    prefixes = {b"xml": NS_XML}
+    for prefix, uri in _NAMESPACE_DECL.findall(packet):
+        if uri.decode("utf-8", "replace") not in KNOWN_NAMESPACES:
+            return False
+        prefixes[prefix] = uri.decode()
+
+    replaced = {(NS_DC, name.partition(":")[2]) for name in dc_values}
+    replaced |= {(NS_XMP, "MetadataDate"), (NS_PDF, "Producer")}
+
+    for match in _PROPERTY_NAME.finditer(packet):
+        prefix, local = (match[1], match[2]) if match[1] else (match[3], match[4])
+        if prefix == b"xmlns":
+            continue
+        uri = prefixes.get(prefix)
+        if uri in (NS_X, NS_RDF, NS_XML):
+            continue
+        if (uri, local.decode()) not in replaced:
+            return False
+    return True
+
+
+def write_metadata(pdf: pikepdf.Pdf, fields: dict[str, Any], copyright_text: str = "") -> bool:
+    """
+    Replace a PDF's XMP packet and DocumentInfo with the mapped values.
+
+    The result matches what editing through ``pdf.open_metadata()`` produces.
+    Nothing is changed when the existing packet holds other metadata that must
+    be kept; the caller then has to use the metadata editor instead.
+
+    Args:
+        pdf: Open PDF to update in memory
+        fields: Values as returned by extract_csl_fields
+        copyright_text: Value for the /Copyright DocumentInfo entry (optional)
+
+    Returns:
+        True if the metadata was written, False if the caller must fall back
+    """
+    dc_values = dublin_core_values(fields)
+
+    existing = pdf.Root.get("/Metadata")
+    if isinstance(existing, pikepdf.Stream):
+        try:
+            packet = existing.read_bytes()
+        except pikepdf.PdfError:
+            return False
+        if not can_replace_packet(packet, dc_values):
+            return False
+
+    stream = pdf.make_stream(build_xmp_packet(dc_values))
+    stream.Type = pikepdf.Name.Metadata
+    stream.Subtype = pikepdf.Name.XML
+    pdf.Root.Metadata = stream
+
+    docinfo = {
+        "/Title": dc_values.get("dc:title"),
+        "/Author": "; ".join(dc_values["dc:creator"]) if "dc:creator" in dc_values else None,
+        "/Subject": dc_values.get("dc:description"),
+        "/Producer": PRODUCER,
+    }
+    info = pdf.docinfo
+    for key in SYNCED_DOCINFO_KEYS:
+        value = docinfo.get(key)
+        if value is not None:
+            info[key] = _clean(value)
+        elif key in info:
+            del info[key]
+    if copyright_text:
+        info["/Copyright"] = copyright_text
+    return True
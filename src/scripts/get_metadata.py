@@ -4,8 +4,11 @@
 import json
 import re
 import sys
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Any
+from urllib.parse import urldefrag, urljoin, urlsplit
 
 import aiohttp
 
@@ -25,9 +28,16 @@
 DOI_RE = re.compile(r"10\.\d{4,9}/[A-Za-z0-9][A-Za-z0-9().;_/:~-]*", re.IGNORECASE)
 DOI_HREF_RE = re.compile(r'href=["\']https?://doi\.org/([^"\'<> ]+)["\']', re.IGNORECASE)
 TRAILING_PUNCT_RE = re.compile(r'[">)\].,;]+$')
+LINK_RE = re.compile(r'<a\s[^>]*?href\s*=\s*["\']([^"\'<>]+)["\']', re.IGNORECASE)
+
+# Links to these are never fetched while crawling
+SKIP_EXTENSIONS = (".pdf", ".epub", ".zip", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".css", ".js")
 
 USER_AGENT = "doi-harvester/2.0 (+https://example.org; mailto:contact@example.org)"
 
+# Formats records are streamed in while fetching
+STREAM_FORMATS = ("jsonl", "json")
+
 
 def clean_doi(raw: str) -> str:
     """Lowercase and strip common trailing punctuation."""
@@ -66,12 +76,17 @@ def extract_from_html(html: str, url: str) -> list[tuple[str, str, str, str]]:
     return out
 
 
-async def fetch_text(session: aiohttp.ClientSession, url: str, *, retries: int = 3) -> str:
+async def fetch_text(
+    session: aiohttp.ClientSession, url: str, *, retries: int = 3, html_only: bool = False
+) -> str | None:
+    """Fetch a page; with html_only, responses that are not HTML give None."""
     backoff = 1.0
     for attempt in range(1, retries + 1):
         try:
             async with session.get(url) as resp:
                 resp.raise_for_status()
+                if html_only and "html" not in resp.content_type:
+                    return None
                 return await resp.text()
         except Exception:
             if attempt == retries:
@@ -126,29 +141,333 @@ async def gather_pages(urls: list[str]) -> dict[str, str]:
         return htmls
 
 
+def extract_links(html: str, url: str) -> list[str]:
+    """Absolute http(s) links of a page, without fragments, in page order."""
+    links = []
+    for m in LINK_RE.finditer(html):
+        link = urldefrag(urljoin(url, m.group(1).strip()))[0]
+        parts = urlsplit(link)
+        if parts.scheme in ("http", "https") and parts.netloc:
+            links.append(link)
+    return links
+
+
+def normalize_url(url: str) -> str:
+    """Key for the visited set: scheme and host are case-insensitive."""
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{path}{query}"
+
+
+def make_scope(
+    seeds: list[str], include: list[re.Pattern], exclude: list[re.Pattern]
+) -> Callable[[str], bool]:
+    """
+    Returns a predicate telling whether a link should be crawled.
+
+    Links matching an exclude pattern, pointing to doi.org or to files in
+    SKIP_EXTENSIONS are out of scope. Otherwise a link must match one of the
+    include patterns, or, without include patterns, be on a seed's host.
+    """
+    seed_hosts = {urlsplit(seed).netloc.lower() for seed in seeds}
+
+    def in_scope(url: str) -> bool:
+        parts = urlsplit(url)
+        host = parts.netloc.lower()
+        if host.endswith("doi.org") or parts.path.lower().endswith(SKIP_EXTENSIONS):
+            return False
+        if any(p.search(url) for p in exclude):
+            return False
+        if include:
+            return any(p.search(url) for p in include)
+        return host in seed_hosts
+
+    return in_scope
+
+
+class HostLimiter:
+    """Bounds concurrent requests per host and spaces their starts by a politeness delay."""
+
+    def __init__(self, per_host: int = 2, delay: float = 1.0):
+        self.per_host = per_host
+        self.delay = delay
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with semaphore:
+            # Reserve the next start time; no await in between, so no two
+            # requests can claim the same slot
+            now = asyncio.get_running_loop().time()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+async def crawl(
+    session: aiohttp.ClientSession,
+    seeds: list[str],
+    on_page: Callable[[str, str], None],
+    *,
+    in_scope: Callable[[str], bool],
+    limiter: HostLimiter,
+    max_depth: int = 2,
+    max_pages: int = 500,
+) -> int:
+    """
+    Breadth-first crawl from the seed pages, calling on_page(url, html) for each page.
+
+    Pages of one depth are fetched concurrently (bounded by the limiter) and
+    on_page is called as soon as each arrives. Links of pages below max_depth
+    that are in scope and not yet visited form the next depth. At most
+    max_pages URLs are visited. Returns the number of pages fetched.
+    """
+    visited = set()
+    frontier = []
+    for seed in seeds:
+        key = normalize_url(seed)
+        if key not in visited:
+            visited.add(key)
+            frontier.append(seed)
+    fetched = 0
+
+    async def visit(url: str) -> list[str]:
+        nonlocal fetched
+        try:
+            async with limiter.slot(url):
+                html = await fetch_text(session, url, html_only=True)
+        except Exception as e:
+            print(f"WARN: could not fetch page: {url} ({type(e).__name__})", file=sys.stderr)
+            return []
+        if html is None:
+            return []
+        fetched += 1
+        on_page(url, html)
+        return extract_links(html, url)
+
+    for depth in range(max_depth + 1):
+        if not frontier:
+            break
+        print(f"Crawling depth {depth}: {len(frontier)} page(s)")
+        pages = await asyncio.gather(*[visit(url) for url in frontier])
+        if depth == max_depth:
+            break
+        frontier = []
+        for links in pages:
+            for link in links:
+                key = normalize_url(link)
+                if key in visited or not in_scope(link) or len(visited) >= max_pages:
+                    continue
+                visited.add(key)
+                frontier.append(link)
+    return fetched
+
+
+class RecordWriter:
+    """
+    Writes each CSL record to disk as soon as it arrives.
+
+    format "jsonl": one record per line, so a crash loses at most the record
+    being written. format "json": a JSON array streamed one element per line,
+    valid once the writer is closed. Either way only the record being written
+    is held in memory.
+    """
+
+    def __init__(self, path: Path, format: str = "jsonl"):
+        if format not in STREAM_FORMATS:
+            raise ValueError(f"unknown stream format: {format}")
+        self.path = path
+        self.format = format
+        self.count = 0
+        self._f = path.open("w", encoding="utf-8")
+        if format == "json":
+            self._f.write("[")
+
+    def write(self, record: Any) -> None:
+        line = json.dumps(record, ensure_ascii=False)
+        if self.format == "json":
+            line = ("\n" if self.count == 0 else ",\n") + line
+        else:
+            line += "\n"
+        self._f.write(line)
+        self._f.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        if self.format == "json":
+            self._f.write("\n]\n")
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FailureLog:
+    """Appends one JSON line per failed DOI, with its error and provenance, as it happens."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.count = 0
+        self._f = path.open("w", encoding="utf-8")
+
+    def write(self, doi: str, error: str, provenance: list[tuple[str, str, str]]) -> None:
+        entry = {
+            "doi": doi,
+            "error": error,
+            "provenance": [
+                {"page": page, "origin": origin, "detail": detail}
+                for page, origin, detail in provenance
+            ],
+        }
+        self._f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._f.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def csl_worker(
+    session: aiohttp.ClientSession,
+    queue: asyncio.Queue,
+    provenance: dict[str, list[tuple[str, str, str]]],
+    writer: RecordWriter,
+    failure_log: FailureLog,
+) -> None:
+    """Fetch CSL JSON for DOIs from the queue until it yields None."""
+    while (doi := await queue.get()) is not None:
+        try:
+            data = await fetch_json(session, f"https://doi.org/{doi}")
+        except Exception as e:
+            failure_log.write(doi, f"{type(e).__name__}: {e}", provenance.get(doi, []))
+        else:
+            writer.write(data)
+
+
 async def gather_csl(
-    dois: list[str], provenance: dict[str, list[tuple[str, str, str]]], concurrency: int = 10
-):
+    dois: list[str],
+    provenance: dict[str, list[tuple[str, str, str]]],
+    writer: RecordWriter,
+    failure_log: FailureLog,
+    concurrency: int = 10,
+) -> None:
     timeout = aiohttp.ClientTimeout(total=45)
-    sem = asyncio.Semaphore(concurrency)
-    ok: list[Any] = []
-    failures: dict[str, str] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for doi in dois:
+        queue.put_nowait(doi)
+    for _ in range(concurrency):
+        queue.put_nowait(None)
 
     async with aiohttp.ClientSession(
         timeout=timeout, headers={"User-Agent": USER_AGENT}
     ) as session:
+        await asyncio.gather(
+            *[
+                csl_worker(session, queue, provenance, writer, failure_log)
+                for _ in range(concurrency)
+            ]
+        )
+
 
-        async def worker(doi: str):
-            url = f"https://doi.org/{doi}"
-            async with sem:
-                try:
-                    data = await fetch_json(session, url)
-                    ok.append(data)
-                except Exception as e:
-                    failures[doi] = f"{type(e).__name__}: {e}"
+async def crawl_and_fetch(
+    seeds: list[str],
+    provenance: dict[str, list[tuple[str, str, str]]],
+    writer: RecordWriter,
+    failure_log: FailureLog,
+    *,
+    concurrency: int = 10,
+    **crawl_options: Any,
+) -> int:
+    """
+    Crawl from the seeds and fetch CSL JSON for each new DOI while crawling continues.
 
-        await asyncio.gather(*[worker(d) for d in dois])
-    return ok, failures
+    Fills provenance with every DOI hit. Failures are logged with the
+    provenance known at the time. Returns the number of pages fetched.
+    """
+    timeout = aiohttp.ClientTimeout(total=45)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def on_page(url: str, html: str) -> None:
+        for doi, page, origin, detail in extract_from_html(html, url):
+            if doi not in provenance:
+                queue.put_nowait(doi)
+            provenance.setdefault(doi, []).append((page, origin, detail))
+
+    async with aiohttp.ClientSession(
+        timeout=timeout, headers={"User-Agent": USER_AGENT}
+    ) as session:
+        workers = [
+            asyncio.create_task(csl_worker(session, queue, provenance, writer, failure_log))
+            for _ in range(concurrency)
+        ]
+        try:
+            pages = await crawl(session, seeds, on_page, **crawl_options)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        # Let the workers finish the DOIs still queued
+        for _ in workers:
+            queue.put_nowait(None)
+        await asyncio.gather(*workers)
+    return pages
+
+
+def iter_records(path: Path) -> Iterator[Any]:
+    """Read back the records of a RecordWriter file, in either format, one at a time."""
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            line = line.strip().rstrip(",")
+            if line and line not in ("[", "]"):
+                yield json.loads(line)
+
+
+def compact_json(stream_path: Path, out_path: Path) -> int:
+    """
+    Write the streamed records as one indented JSON array, record by record.
+
+    The output is identical to json.dumps(records, ensure_ascii=False, indent=2).
+    """
+    count = 0
+    with out_path.open("w", encoding="utf-8") as out:
+        for record in iter_records(stream_path):
+            text = json.dumps(record, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+            out.write(("[\n  " if count == 0 else ",\n  ") + text)
+            count += 1
+        out.write("\n]" if count else "[]")
+    return count
+
+
+def read_failure_log(
+    path: Path,
+) -> tuple[dict[str, str], dict[str, list[tuple[str, str, str]]]]:
+    """Read a FailureLog file into the arguments of write_failed_report."""
+    failures: dict[str, str] = {}
+    provenance: dict[str, list[tuple[str, str, str]]] = {}
+    for entry in iter_records(path):
+        failures[entry["doi"]] = entry["error"]
+        provenance[entry["doi"]] = [
+            (item["page"], item["origin"], item["detail"]) for item in entry["provenance"]
+        ]
+    return failures, provenance
 
 
 def write_failed_report(
@@ -163,6 +482,18 @@ def write_failed_report(
                 f.write(f"  page: {page}\n  origin: {origin}\n  detail: {detail}\n\n")
 
 
+def write_dois(provenance: dict[str, list[tuple[str, str, str]]], out_path: Path) -> list[str]:
+    """Write the unique sorted DOI list; exits if there is none."""
+    dois_sorted = sorted(provenance.keys())
+    if not dois_sorted:
+        print("No DOIs found.", file=sys.stderr)
+        sys.exit(1)
+
+    out_path.write_text("\n".join(dois_sorted) + "\n", encoding="utf-8")
+    print(f"Wrote {len(dois_sorted)} unique DOIs -> {out_path}")
+    return dois_sorted
+
+
 def main():
     ap = argparse.ArgumentParser(
         description="Extract DOIs from pages, fetch CSL JSON, and compile outputs."
@@ -177,6 +508,65 @@ def main():
     ap.add_argument("--out-dois", type=Path, default=Path("dois.txt"))
     ap.add_argument("--out-json", type=Path, default=Path("metadata.json"))
     ap.add_argument("--out-fail", type=Path, default=Path("failed_dois_report.txt"))
+    ap.add_argument(
+        "--out-stream",
+        type=Path,
+        default=Path("metadata.jsonl"),
+        help="Records are written here as they arrive. Default metadata.jsonl.",
+    )
+    ap.add_argument(
+        "--stream-format",
+        choices=STREAM_FORMATS,
+        default="jsonl",
+        help="jsonl (one record per line) or json (streamed JSON array). Default jsonl.",
+    )
+    ap.add_argument(
+        "--out-fail-stream",
+        type=Path,
+        default=Path("failed_dois.jsonl"),
+        help="Failures with provenance are appended here as they happen. "
+        "Default failed_dois.jsonl.",
+    )
+    ap.add_argument(
+        "--no-compact",
+        action="store_true",
+        help="Keep only the streamed files; skip writing --out-json and --out-fail at the end.",
+    )
+    ap.add_argument(
+        "--crawl",
+        action="store_true",
+        help="Treat the URLs as seeds and follow in-scope links breadth-first. "
+        "DOIs are fetched while crawling continues.",
+    )
+    ap.add_argument(
+        "--max-depth", type=int, default=2, help="Link depth followed from the seeds. Default 2."
+    )
+    ap.add_argument(
+        "--max-pages", type=int, default=500, help="Maximum pages visited. Default 500."
+    )
+    ap.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        type=re.compile,
+        help="Only crawl links matching this regex (repeatable). Default: links on a seed's host.",
+    )
+    ap.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        type=re.compile,
+        help="Never crawl links matching this regex (repeatable).",
+    )
+    ap.add_argument(
+        "--per-host", type=int, default=2, help="Concurrent page requests per host. Default 2."
+    )
+    ap.add_argument(
+        "--delay",
+        type=float,
+        default=1.0,
+        help="Seconds between the starts of page requests to one host. Default 1.0.",
+    )
     args = ap.parse_args()
 
     urls: list[str] = []
@@ -193,33 +583,62 @@ def main():
     if not urls:
         urls = URLS_DEFAULT
 
-    # 1) Fetch pages
-    html_map = asyncio.run(gather_pages(urls))
-
-    # 2) Extract DOIs with provenance
     prov: dict[str, list[tuple[str, str, str]]] = {}
-    for url, html in html_map.items():
-        for doi, page, origin, detail in extract_from_html(html, url):
-            prov.setdefault(doi, []).append((page, origin, detail))
-
-    # 3) Unique sorted DOI list
-    dois_sorted = sorted(prov.keys())
-    if not dois_sorted:
-        print("No DOIs found.", file=sys.stderr)
-        sys.exit(1)
-
-    args.out_dois.write_text("\n".join(dois_sorted) + "\n", encoding="utf-8")
-    print(f"Wrote {len(dois_sorted)} unique DOIs -> {args.out_dois}")
-
-    # 4) Fetch CSL JSON concurrently
-    ok, failures = asyncio.run(gather_csl(dois_sorted, prov, concurrency=args.concurrency))
-
-    # 5) Write JSON array
-    args.out_json.write_text(json.dumps(ok, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"OK: {len(ok)} records -> {args.out_json}")
-
-    # 6) Failure report
-    if failures:
+    if args.crawl:
+        # 1-4) Crawl pages and fetch CSL JSON for each DOI as soon as it is found
+        with (
+            RecordWriter(args.out_stream, args.stream_format) as writer,
+            FailureLog(args.out_fail_stream) as failure_log,
+        ):
+            pages = asyncio.run(
+                crawl_and_fetch(
+                    urls,
+                    prov,
+                    writer,
+                    failure_log,
+                    concurrency=args.concurrency,
+                    in_scope=make_scope(urls, args.include, args.exclude),
+                    limiter=HostLimiter(args.per_host, args.delay),
+                    max_depth=args.max_depth,
+                    max_pages=args.max_pages,
+                )
+            )
+        print(f"Crawled {pages} pages")
+        write_dois(prov, args.out_dois)
+    else:
+        # 1) Fetch pages
+        html_map = asyncio.run(gather_pages(urls))
+
+        # 2) Extract DOIs with provenance
+        for url, html in html_map.items():
+            for doi, page, origin, detail in extract_from_html(html, url):
+                prov.setdefault(doi, []).append((page, origin, detail))
+
+        # 3) Unique sorted DOI list
+        dois_sorted = write_dois(prov, args.out_dois)
+
+        # 4) Fetch CSL JSON concurrently, streaming records and failures to disk
+        with (
+            RecordWriter(args.out_stream, args.stream_format) as writer,
+            FailureLog(args.out_fail_stream) as failure_log,
+        ):
+            asyncio.run(
+                gather_csl(dois_sorted, prov, writer, failure_log, concurrency=args.concurrency)
+            )
+
+    print(f"OK: {writer.count} records -> {args.out_stream}")
+    if failure_log.count:
+        print(f"Failed: {failure_log.count} DOIs -> {args.out_fail_stream}")
+    if args.no_compact:
+        return
+
+    # 5) Compact into the JSON array
+    compact_json(args.out_stream, args.out_json)
+    print(f"Compacted {writer.count} records -> {args.out_json}")
+
+    # 6) Failure report, with every place each DOI was found
+    if failure_log.count:
+        failures, _ = read_failure_log(args.out_fail_stream)
         write_failed_report(failures, prov, args.out_fail)
         print(f"Wrote provenance report -> {args.out_fail}")
 
@@ -0,0 +1,184 @@
+"""Tests for the aio module."""
+
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pikepdf
+from aiohttp import web
+
+from pdf_metadata_enhancer.aio import (
+    enhance_many_async,
+    enhance_pdf_metadata_async,
+    fetch_metadata_async,
+    open_session,
+)
+from pdf_metadata_enhancer.metadata_fetcher import MetadataFetchError
+
+
+def _make_pdfs(directory, count):
+    paths = []
+    for i in range(count):
+        path = directory / f"doc{i}.pdf"
+        pdf = pikepdf.Pdf.new()
+        pdf.add_blank_page()
+        pdf.save(path)
+        paths.append(str(path))
+    return paths
+
+
+async def _start_stub_server():
+    """Serve CSL-JSON for /10.1234/<suffix>; 'missing' gives 404 and 'busy' gives 503."""
+
+    async def handle(request):
+        suffix = request.match_info["suffix"]
+        if suffix == "missing":
+            return web.Response(status=404)
+        if suffix == "busy":
+            return web.Response(status=503)
+        assert "csl+json" in request.headers["Accept"]
+        return web.json_response(
+            {"DOI": f"10.1234/{suffix}", "title": f"Stub {suffix}"},
+            content_type="application/vnd.citationstyles.csl+json",
+        )
+
+    app = web.Application()
+    app.router.add_get("/10.1234/{suffix}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_fetch_metadata_async():
+    """Test fetching CSL-JSON through a shared session and classifying failures."""
+
+    async def run():
+        runner, base_url = await _start_stub_server()
+        try:
+            async with open_session() as session:
+                metadata = await fetch_metadata_async(f"{base_url}/10.1234/abc", session)
+                assert metadata["title"] == "Stub abc"
+
+                for suffix, transient in (("missing", False), ("busy", True)):
+                    try:
+                        await fetch_metadata_async(f"{base_url}/10.1234/{suffix}", session)
+                        raise AssertionError("Expected MetadataFetchError")
+                    except MetadataFetchError as e:
+                        assert e.transient is transient
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(run())
+    print("✓ Async fetch test passed")
+
+
+def test_enhance_pdf_metadata_async():
+    """Test enhancing a PDF on a configurable executor."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (input_pdf,) = _make_pdfs(tmp, 1)
+        output_pdf = tmp / "out.pdf"
+
+        async def run():
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                await enhance_pdf_metadata_async(
+                    input_pdf, output_pdf, {"title": "Async"}, executor=executor
+                )
+
+        asyncio.run(run())
+        with pikepdf.open(output_pdf) as pdf:
+            assert str(pdf.docinfo["/Title"]) == "Async"
+
+    print("✓ Async enhance test passed")
+
+
+def test_enhance_many_async():
+    """Test the async batch iterator against a stub resolver."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pdfs = _make_pdfs(tmp, 4)
+
+        async def run():
+            runner, base_url = await _start_stub_server()
+            suffixes = ["a", "missing", "c", "d"]
+            mappings = [
+                {"pdf": pdf, "doi": f"{base_url}/10.1234/{suffix}"}
+                for pdf, suffix in zip(pdfs, suffixes, strict=True)
+            ]
+            try:
+                return [
+                    result
+                    async for result in enhance_many_async(mappings, tmp / "out", concurrency=2)
+                ]
+            finally:
+                await runner.cleanup()
+
+        results = asyncio.run(run())
+        assert [r.pdf for r in results] == pdfs
+        assert [r.status for r in results] == ["ok", "error", "ok", "ok"]
+        assert results[1].stage == "fetch"
+        assert not results[1].transient
+        assert results[0].fetch_seconds > 0
+        assert Path(results[0].sidecar).exists()
+        with pikepdf.open(results[2].output) as pdf:
+            assert str(pdf.docinfo["/Title"]) == "Stub c"
+
+    print("✓ Async batch test passed")
+
+
+def test_enhance_many_async_limit_and_cancellation():
+    """Test that the concurrency limit holds and closing the iterator cancels fetches."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pdfs = _make_pdfs(tmp, 6)
+        state = {"started": 0, "active": 0, "peak": 0, "cancelled": 0}
+
+        async def fetcher(doi, session, verbose=False):
+            state["started"] += 1
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            try:
+                await asyncio.sleep(0.05 if doi == "10.1234/0" else 3600)
+                return {"DOI": doi, "title": doi}
+            except asyncio.CancelledError:
+                state["cancelled"] += 1
+                raise
+            finally:
+                state["active"] -= 1
+
+        async def run():
+            mappings = [{"pdf": pdf, "doi": f"10.1234/{i}"} for i, pdf in enumerate(pdfs)]
+            async with open_session() as session:
+                batch = enhance_many_async(
+                    mappings, tmp / "out", session=session, fetcher=fetcher, concurrency=3
+                )
+                async with aclosing(batch):
+                    async for result in batch:
+                        assert result.ok
+                        break
+
+        asyncio.run(asyncio.wait_for(run(), timeout=30))
+        # The first result arrives with three fetches in flight; the two left are cancelled
+        assert state["started"] == 3
+        assert state["peak"] == 3
+        assert state["cancelled"] == 2
+        assert state["active"] == 0
+
+    print("✓ Async concurrency limit and cancellation test passed")
+
+
+if __name__ == "__main__":
+    print("Running aio module tests...\n")
+    test_fetch_metadata_async()
+    test_enhance_pdf_metadata_async()
+    test_enhance_many_async()
+    test_enhance_many_async_limit_and_cancellation()
+    print("\n✓ All aio tests passed!")
@@ -0,0 +1,117 @@
+"""Tests for the bagit module."""
+
+import hashlib
+import sys
+import tarfile
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pikepdf
+
+from pdf_metadata_enhancer.bagit import BagWriter
+from pdf_metadata_enhancer.batch import enhance_many
+
+
+def _make_mappings(directory, count):
+    mappings = []
+    for i in range(count):
+        path = directory / f"doc {i}.pdf"
+        pdf = pikepdf.Pdf.new()
+        pdf.add_blank_page()
+        pdf.save(path)
+        mappings.append({"pdf": str(path), "doi": f"10.1234/{i}"})
+    return mappings
+
+
+def _fake_fetcher(doi, verbose=False):
+    return {"DOI": doi, "title": f"Title for {doi}"}
+
+
+def _parse_manifest(data):
+    entries = {}
+    for line in data.decode("utf-8").splitlines():
+        digest, _, path = line.partition("  ")
+        entries[path] = digest
+    return entries
+
+
+def test_bag_directory():
+    """Test writing outputs straight into a BagIt directory."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        mappings = _make_mappings(tmp, 3)
+        bag_dir = tmp / "bag"
+
+        with BagWriter(bag_dir, ("sha256", "sha512", "blake2b")) as bag:
+            results = list(
+                enhance_many(
+                    mappings,
+                    bag.payload_dir,
+                    fetcher=_fake_fetcher,
+                    sink=bag,
+                    algorithms=("sha256", "sha512", "blake2b"),
+                )
+            )
+        assert all(result.ok for result in results)
+
+        assert (bag_dir / "bagit.txt").read_text().startswith("BagIt-Version: 1.0\n")
+        assert not (bag_dir / "manifest-blake2b.txt").exists()
+        payload = sorted(p for p in (bag_dir / "data").rglob("*") if p.is_file())
+        assert len(payload) == 6
+
+        for name in ("sha256", "sha512"):
+            manifest = _parse_manifest((bag_dir / f"manifest-{name}.txt").read_bytes())
+            assert manifest == {
+                path.relative_to(bag_dir).as_posix(): hashlib.new(
+                    name, path.read_bytes()
+                ).hexdigest()
+                for path in payload
+            }
+            tag_manifest = _parse_manifest((bag_dir / f"tagmanifest-{name}.txt").read_bytes())
+            for path, digest in tag_manifest.items():
+                assert hashlib.new(name, (bag_dir / path).read_bytes()).hexdigest() == digest
+
+        oxum = f"{sum(path.stat().st_size for path in payload)}.{len(payload)}"
+        assert f"Payload-Oxum: {oxum}\n" in (bag_dir / "bag-info.txt").read_text()
+
+    print("✓ BagIt directory test passed")
+
+
+def test_bag_tar_stream():
+    """Test streaming outputs into a tar file with BagIt layout."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        mappings = _make_mappings(tmp, 3)
+        tar_path = tmp / "delivery.tar.gz"
+
+        with BagWriter(tmp / "staging", tar_path=tar_path) as bag:
+            results = list(enhance_many(mappings, bag.payload_dir, fetcher=_fake_fetcher, sink=bag))
+        assert all(result.ok for result in results)
+        assert results[0].sidecar == f"{tar_path}:delivery/data/doc 0.pdf.json"
+
+        # Staged PDFs are removed once they are in the tar
+        assert not [p for p in (tmp / "staging").rglob("*") if p.is_file()]
+
+        with tarfile.open(tar_path) as tar:
+            files = {
+                member.name: tar.extractfile(member).read()
+                for member in tar.getmembers()
+                if member.isfile()
+            }
+        assert "delivery/bagit.txt" in files
+        manifest = _parse_manifest(files["delivery/manifest-sha256.txt"])
+        assert len(manifest) == 6
+        for path, digest in manifest.items():
+            assert hashlib.sha256(files[f"delivery/{path}"]).hexdigest() == digest
+        assert manifest["data/doc 1.pdf"] == results[1].output_sha256
+
+    print("✓ BagIt tar stream test passed")
+
+
+if __name__ == "__main__":
+    print("Running bagit module tests...\n")
+    test_bag_directory()
+    test_bag_tar_stream()
+    print("\n✓ All bagit tests passed!")
@@ -0,0 +1,132 @@
+"""Tests for the batch module."""
+
+import json
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pikepdf
+
+from pdf_metadata_enhancer.batch import EnhanceResult, enhance_many
+from pdf_metadata_enhancer.sidecar import JournalSink
+
+
+def _make_pdfs(directory, count):
+    paths = []
+    for i in range(count):
+        path = directory / f"doc{i}.pdf"
+        pdf = pikepdf.Pdf.new()
+        pdf.add_blank_page()
+        pdf.save(path)
+        paths.append(str(path))
+    return paths
+
+
+def _fake_fetcher(doi, verbose=False):
+    if doi.endswith("missing"):
+        return None
+    return {"DOI": doi, "title": f"Title for {doi}"}
+
+
+def test_enhance_many_sequential():
+    """Test batch enhancement with sidecars and a failing DOI."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pdfs = _make_pdfs(tmp, 3)
+        mappings = [
+            {"pdf": pdfs[0], "doi": "10.1234/a"},
+            {"pdf": pdfs[1], "doi": "10.1234/missing"},
+            {"pdf": pdfs[2], "doi": "10.1234/c"},
+        ]
+
+        results = list(enhance_many(mappings, tmp / "out", fetcher=_fake_fetcher))
+
+        assert [r.status for r in results] == ["ok", "error", "ok"]
+        assert results[1].stage == "fetch"
+        assert "10.1234/missing" in results[1].error
+        assert len(results[0].output_sha256) == 64
+        assert Path(results[0].sidecar).exists()
+        with pikepdf.open(results[2].output) as pdf:
+            assert str(pdf.docinfo["/Title"]) == "Title for 10.1234/c"
+        assert not hasattr(results[0], "__dict__")  # slotted
+
+    print("✓ Sequential batch test passed")
+
+
+def test_enhance_many_executor_and_journal():
+    """Test batch enhancement on a thread pool with a journal sink."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pdfs = _make_pdfs(tmp, 5)
+        mappings = [{"pdf": p, "doi": f"10.1234/{i}"} for i, p in enumerate(pdfs)]
+        journal = tmp / "journal.jsonl"
+
+        with JournalSink(journal) as sink, ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(
+                enhance_many(
+                    iter(mappings),
+                    tmp / "out",
+                    fetcher=_fake_fetcher,
+                    executor=executor,
+                    sink=sink,
+                    max_in_flight=2,
+                )
+            )
+
+        assert all(isinstance(r, EnhanceResult) and r.ok for r in results)
+        assert [r.doi for r in results] == [m["doi"] for m in mappings]
+        assert all(r.sidecar == str(journal) for r in results)
+        assert not list((tmp / "out").glob("*.json"))
+
+        lines = journal.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 5
+        assert {json.loads(line)["doi"] for line in lines} == {m["doi"] for m in mappings}
+
+        try:
+            list(enhance_many(mappings, tmp / "out", executor=executor, max_in_flight=0))
+            raise AssertionError("Expected ValueError")
+        except ValueError as e:
+            assert "max_in_flight" in str(e)
+
+    print("✓ Executor and journal batch test passed")
+
+
+def test_enhance_many_save_profile():
+    """Test that the save profile is applied, reported and recorded."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pdfs = _make_pdfs(tmp, 2)
+        mappings = [{"pdf": pdf, "doi": f"10.1234/{i}"} for i, pdf in enumerate(pdfs)]
+
+        results = list(
+            enhance_many(mappings, tmp / "out", fetcher=_fake_fetcher, save_profile="archival")
+        )
+
+        for result in results:
+            assert result.ok
+            assert result.save_profile == "archival"
+            assert result.input_bytes == Path(result.pdf).stat().st_size
+            assert result.output_bytes == Path(result.output).stat().st_size
+            with open(result.sidecar) as f:
+                assert json.load(f)["save_profile"] == "archival"
+            with pikepdf.open(result.output) as pdf:
+                assert pdf.is_linearized
+
+        try:
+            list(enhance_many(mappings, tmp / "out", save_profile="unknown"))
+            raise AssertionError("Expected ValueError")
+        except ValueError as e:
+            assert "Unknown save profile" in str(e)
+
+    print("✓ Save profile batch test passed")
+
+
+if __name__ == "__main__":
+    print("Running batch tests...\n")
+    test_enhance_many_sequential()
+    test_enhance_many_executor_and_journal()
+    test_enhance_many_save_profile()
+    print("\n✓ All batch tests passed!")
@@ -0,0 +1,234 @@
+"""Tests for the dedup module."""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pikepdf
+
+from pdf_metadata_enhancer.batch import enhance_many
+from pdf_metadata_enhancer.dedup import ContentDeduplicator, link_or_copy
+
+
+def _make_pdf(path, pages=1):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pdf = pikepdf.Pdf.new()
+    for _ in range(pages):
+        pdf.add_blank_page()
+    pdf.save(path)
+    return str(path)
+
+
+def _fake_fetcher(doi, verbose=False):
+    return {"DOI": doi, "title": f"Title for {doi}"}
+
+
+def test_link_or_copy():
+    """Test the link methods and their fallback order."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / "source.pdf"
+        source.write_bytes(b"%PDF-1.7 content")
+
+        method = link_or_copy(source, tmp / "auto.pdf")
+        assert method in ("reflink", "hardlink")
+        assert (tmp / "auto.pdf").read_bytes() == source.read_bytes()
+
+        assert link_or_copy(source, tmp / "hard.pdf", ("hardlink",)) == "hardlink"
+        assert os.path.samefile(source, tmp / "hard.pdf")
+
+        # An existing target is replaced, and a copy is an independent file
+        (tmp / "copy.pdf").write_bytes(b"old")
+        assert link_or_copy(source, tmp / "copy.pdf", ("copy",)) == "copy"
+        assert (tmp / "copy.pdf").read_bytes() == source.read_bytes()
+        assert not os.path.samefile(source, tmp / "copy.pdf")
+
+        try:
+            link_or_copy(tmp / "missing.pdf", tmp / "x.pdf")
+            raise AssertionError("Expected OSError")
+        except OSError:
+            pass
+
+    print("✓ Link or copy test passed")
+
+
+def test_deduplicator_hashes_only_on_size_collisions():
+    """Test that only rows sharing size and DOI are hashed and compared."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        first = _make_pdf(tmp / "a" / "doc.pdf")
+        copy = tmp / "b" / "doc.pdf"
+        copy.parent.mkdir()
+        shutil.copyfile(first, copy)
+        other = _make_pdf(tmp / "other.pdf", pages=2)
+
+        dedup = ContentDeduplicator()
+        future = Future()
+        options = {"input_digests": None}
+        assert dedup.find({"pdf": first, "doi": "10.1/x"}, options) is None
+        assert options["input_digests"] is None  # nothing to compare with, not hashed
+        dedup.add({"pdf": first, "doi": "10.1/x"}, options, future)
+
+        options = {"input_digests": None}
+        assert dedup.find({"pdf": str(copy), "doi": " 10.1/X "}, options) is future
+        assert len(options["input_digests"]["sha256"]) == 64
+
+        assert dedup.find({"pdf": str(copy), "doi": "10.1/y"}, {"input_digests": None}) is None
+        assert dedup.find({"pdf": other, "doi": "10.1/x"}, {"input_digests": None}) is None
+
+        try:
+            ContentDeduplicator(("symlink",))
+            raise AssertionError("Expected ValueError")
+        except ValueError:
+            pass
+
+    print("✓ Deduplicator test passed")
+
+
+def test_enhance_many_links_duplicates():
+    """Test that duplicate inputs are enhanced once and linked with provenance."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        first = _make_pdf(tmp / "in" / "a" / "doc.pdf")
+        copy = tmp / "in" / "b" / "doc.pdf"
+        copy.parent.mkdir()
+        shutil.copyfile(first, copy)
+        mappings = [
+            {"pdf": first, "doi": "10.1234/a"},
+            {"pdf": str(copy), "doi": "10.1234/a"},
+            {"pdf": str(copy), "doi": "10.1234/b"},
+        ]
+
+        calls = []
+
+        def fetcher(doi, verbose=False):
+            calls.append(doi)
+            return {"DOI": doi, "title": f"Title for {doi}", "fetch": len(calls)}
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(
+                enhance_many(
+                    mappings,
+                    tmp / "out",
+                    fetcher=fetcher,
+                    executor=executor,
+                    dedup=ContentDeduplicator(),
+                    algorithms=("sha256", "sha512"),
+                )
+            )
+
+        assert [r.status for r in results] == ["ok", "ok", "ok"]
+        primary, duplicate, other_doi = results
+        assert duplicate.duplicate_of == primary.output
+        assert duplicate.link_method in ("reflink", "hardlink")
+        assert duplicate.output != primary.output
+        assert duplicate.output_sha256 == primary.output_sha256
+        assert Path(duplicate.output).read_bytes() == Path(primary.output).read_bytes()
+        assert other_doi.duplicate_of is None
+
+        record = json.loads(Path(duplicate.sidecar).read_text())
+        assert record["dedup"] == {
+            "of": primary.output,
+            "input": primary.pdf,
+            "method": duplicate.link_method,
+        }
+        assert record["input"]["path"] == str(copy)
+        assert len(record["output"]["sha512"]) == 128
+        primary_record = json.loads(Path(primary.sidecar).read_text())
+        assert record["output"] == {**primary_record["output"], "path": duplicate.output}
+        # The duplicate records the primary's metadata, without fetching again
+        assert sorted(calls) == ["10.1234/a", "10.1234/b"]
+        assert record["metadata"] == primary_record["metadata"] == primary.metadata
+        assert duplicate.metadata == primary.metadata
+
+    print("✓ Duplicate linking test passed")
+
+
+def test_duplicate_of_failed_primary_is_enhanced():
+    """Test that a duplicate is enhanced on its own when the first row failed."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        first = _make_pdf(tmp / "in" / "doc.pdf")
+        copy = tmp / "in" / "copy.pdf"
+        shutil.copyfile(first, copy)
+        calls = []
+
+        def fetcher(doi, verbose=False):
+            calls.append(doi)
+            if len(calls) == 1:
+                return None
+            return _fake_fetcher(doi)
+
+        results = list(
+            enhance_many(
+                [{"pdf": first, "doi": "10.1234/a"}, {"pdf": str(copy), "doi": "10.1234/a"}],
+                tmp / "out",
+                fetcher=fetcher,
+                dedup=ContentDeduplicator(("copy",)),
+            )
+        )
+
+        assert [r.status for r in results] == ["error", "ok"]
+        assert results[1].duplicate_of is None
+        with pikepdf.open(results[1].output) as pdf:
+            assert str(pdf.docinfo["/Title"]) == "Title for 10.1234/a"
+
+    print("✓ Failed primary test passed")
+
+
+def test_duplicates_do_not_hold_workers():
+    """Test that duplicates wait for their primary without occupying a worker."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        first = _make_pdf(tmp / "in" / "doc.pdf")
+        copies = []
+        for name in ("copy1.pdf", "copy2.pdf"):
+            shutil.copyfile(first, tmp / "in" / name)
+            copies.append(str(tmp / "in" / name))
+        other = _make_pdf(tmp / "in" / "other.pdf", pages=2)
+        other_started = threading.Event()
+
+        def fetcher(doi, verbose=False):
+            if doi == "10.1234/a":
+                # Only finishes if the second worker is free for the unrelated row
+                if not other_started.wait(timeout=5):
+                    return None
+            else:
+                other_started.set()
+            return _fake_fetcher(doi)
+
+        mappings = [{"pdf": first, "doi": "10.1234/a"}]
+        mappings += [{"pdf": copy, "doi": "10.1234/a"} for copy in copies]
+        mappings.append({"pdf": other, "doi": "10.1234/b"})
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(
+                enhance_many(
+                    mappings,
+                    tmp / "out",
+                    fetcher=fetcher,
+                    executor=executor,
+                    dedup=ContentDeduplicator(),
+                )
+            )
+
+        assert [r.status for r in results] == ["ok"] * 4
+        assert [r.duplicate_of for r in results[1:3]] == [results[0].output] * 2
+
+    print("✓ Duplicate scheduling test passed")
+
+
+if __name__ == "__main__":
+    print("Running dedup module tests...\n")
+    test_link_or_copy()
+    test_deduplicator_hashes_only_on_size_collisions()
+    test_enhance_many_links_duplicates()
+    test_duplicate_of_failed_primary_is_enhanced()
+    test_duplicates_do_not_hold_workers()
+    print("\n✓ All dedup tests passed!")
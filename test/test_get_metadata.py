@@ -0,0 +1,362 @@
+"""Tests for the get_metadata harvester script."""
+
+import asyncio
+import json
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, "src/scripts")
+
+import aiohttp
+import get_metadata
+from aiohttp import web
+from get_metadata import (
+    STREAM_FORMATS,
+    FailureLog,
+    HostLimiter,
+    RecordWriter,
+    compact_json,
+    crawl,
+    crawl_and_fetch,
+    extract_links,
+    iter_records,
+    make_scope,
+    normalize_url,
+    read_failure_log,
+)
+
+RECORDS = [
+    {"DOI": "10.1234/a", "title": "Stadt am Rhein – Basel", "author": [{"family": "Müller"}]},
+    {"DOI": "10.1234/b", "title": "Line\nbreak, comma, [brackets]", "page": "1-20"},
+    {"DOI": "10.1234/c", "issued": {"date-parts": [[2024, 5]]}, "empty": [], "none": None},
+]
+
+
+def test_record_writer_streams_valid_files():
+    """Test that both stream formats are readable while and after writing."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for format in STREAM_FORMATS:
+            path = tmp / f"stream.{format}"
+            with RecordWriter(path, format) as writer:
+                writer.write(RECORDS[0])
+                # Records are on disk as soon as they are written
+                assert list(iter_records(path)) == RECORDS[:1]
+                for record in RECORDS[1:]:
+                    writer.write(record)
+            assert writer.count == len(RECORDS)
+            assert list(iter_records(path)) == RECORDS
+
+        assert json.loads((tmp / "stream.json").read_text(encoding="utf-8")) == RECORDS
+        lines = (tmp / "stream.jsonl").read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line) for line in lines] == RECORDS
+
+        # An empty json stream is an empty array once closed
+        with RecordWriter(tmp / "empty.json", "json"):
+            pass
+        assert json.loads((tmp / "empty.json").read_text(encoding="utf-8")) == []
+
+        try:
+            RecordWriter(tmp / "stream.xml", "xml")
+            raise AssertionError("Expected ValueError")
+        except ValueError:
+            pass
+
+    print("✓ Record writer test passed")
+
+
+def test_compact_json_matches_json_dumps():
+    """Test that compacting gives exactly the indented array json.dumps writes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for format in STREAM_FORMATS:
+            for records in (RECORDS, RECORDS[:1], []):
+                stream = tmp / f"stream.{format}"
+                with RecordWriter(stream, format) as writer:
+                    for record in records:
+                        writer.write(record)
+
+                out = tmp / "metadata.json"
+                assert compact_json(stream, out) == len(records)
+                expected = json.dumps(records, ensure_ascii=False, indent=2)
+                assert out.read_text(encoding="utf-8") == expected, (format, len(records))
+
+    print("✓ Compact JSON test passed")
+
+
+def test_failure_log_round_trip():
+    """Test that logged failures are read back with their provenance."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "failed_dois.jsonl"
+        provenance = [
+            ("https://example.org/band1", "href", "line 3: https://doi.org/10.1234/x"),
+            ("https://example.org/band2", "text", "line 9: siehe 10.1234/x"),
+        ]
+        with FailureLog(path) as log:
+            log.write("10.1234/x", "ClientResponseError: HTTP 404", provenance)
+            # Failures are on disk as soon as they are logged
+            assert len(path.read_text(encoding="utf-8").splitlines()) == 1
+            log.write("10.1234/y", "TimeoutError: ", [])
+        assert log.count == 2
+
+        failures, read_provenance = read_failure_log(path)
+        assert failures == {
+            "10.1234/x": "ClientResponseError: HTTP 404",
+            "10.1234/y": "TimeoutError: ",
+        }
+        assert read_provenance == {"10.1234/x": provenance, "10.1234/y": []}
+
+    print("✓ Failure log test passed")
+
+
+# Stub site: page -> (links, body text); "/slow" answers late and "/data" is not HTML
+SITE = {
+    "/": (["a", "a#top", "b", "doc.pdf", "data", "https://doi.org/10.1234/seed", "{other}/x"], ""),
+    "/a": (["/c", "/", "mailto:info@example.org"], "siehe doi:10.1234/a"),
+    "/b": (["/c", "/d", "/slow"], ""),
+    "/c": (["/e"], ""),
+    "/d": ([], "10.1234/d"),
+    "/e": ([], "10.1234/e"),
+    "/slow": ([], "10.1234/slow"),
+}
+
+
+async def _start_site(events):
+    """Serve SITE and a second host; each answered request is logged to events."""
+    urls = {}
+
+    async def page(request):
+        path = request.path
+        if path == "/slow":
+            await asyncio.sleep(0.3)
+        events.append(("page", path, asyncio.get_running_loop().time()))
+        if path == "/data":
+            return web.json_response({"not": "html"})
+        links, text = SITE[path]
+        anchors = "".join(f'<a href="{link.format(other=urls["other"])}">x</a>' for link in links)
+        return web.Response(
+            text=f"<html><body>{anchors}<p>{text}</p></body></html>", content_type="text/html"
+        )
+
+    async def other(request):
+        events.append(("other", request.path, asyncio.get_running_loop().time()))
+        return web.Response(text="<html></html>", content_type="text/html")
+
+    runners = []
+    for name, handler in (("site", page), ("other", other)):
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        runners.append(runner)
+        urls[name] = f"http://127.0.0.1:{runner.addresses[0][1]}"
+    return runners, urls["site"]
+
+
+async def _crawl_site(events, include=(), exclude=(), delay=0.0, **options):
+    """Crawl the stub site from "/"; return the pages fetched and the paths handed on."""
+    runners, base_url = await _start_site(events)
+    pages = []
+    try:
+        async with aiohttp.ClientSession() as session:
+            fetched = await crawl(
+                session,
+                [base_url + "/", base_url + "/#again"],
+                lambda url, html: pages.append(url.removeprefix(base_url)),
+                in_scope=make_scope([base_url], list(include), list(exclude)),
+                limiter=HostLimiter(per_host=2, delay=delay),
+                **options,
+            )
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+    return fetched, pages
+
+
+def _requested(events, kind="page"):
+    return [path for event_kind, path, _ in events if event_kind == kind]
+
+
+def test_links_and_scope():
+    """Test link extraction, URL normalisation and the crawl scope."""
+    html = (
+        '<a href="b.html#part">B</a> <A class="x" HREF=\'/c?q=1\'>C</A> '
+        '<a href="mailto:x@example.org">mail</a> <a href="https://Other.example/">o</a>'
+    )
+    assert extract_links(html, "https://Site.example/dir/a.html") == [
+        "https://Site.example/dir/b.html",
+        "https://Site.example/c?q=1",
+        "https://Other.example/",
+    ]
+    assert normalize_url("HTTPS://Site.EXAMPLE") == "https://site.example/"
+    assert normalize_url("https://site.example/A?x=1#frag") == "https://site.example/A?x=1"
+
+    in_scope = make_scope(["https://site.example/"], [], [re.compile(r"/private/")])
+    assert in_scope("https://SITE.example/page")
+    assert not in_scope("https://other.example/page")
+    assert not in_scope("https://site.example/private/page")
+    assert not in_scope("https://site.example/book.PDF")
+    assert not in_scope("https://doi.org/10.1234/x")
+
+    include = make_scope(["https://site.example/"], [re.compile(r"other\.example/ok")], [])
+    assert include("https://other.example/ok/1")
+    assert not include("https://site.example/page")
+
+    print("✓ Links and scope test passed")
+
+
+def test_crawl_depth_and_dedup():
+    """Test breadth-first order, visited-set dedup, the depth cut-off and skipped links."""
+    events = []
+    fetched, pages = asyncio.run(_crawl_site(events, max_depth=2))
+
+    # Every URL once (the seeds and fragments collapse), nothing off-host, no
+    # PDF, nothing below depth 2 (/e)
+    assert sorted(_requested(events)) == ["/", "/a", "/b", "/c", "/d", "/data", "/slow"]
+    assert _requested(events, "other") == []
+    # Non-HTML responses are neither counted nor handed on
+    assert fetched == 6
+    # One depth is finished before the next starts
+    assert pages[0] == "/"
+    assert set(pages[1:3]) == {"/a", "/b"}
+    assert set(pages[3:]) == {"/c", "/d", "/slow"} and pages[-1] == "/slow"
+
+    events.clear()
+    assert asyncio.run(_crawl_site(events, max_depth=0)) == (1, ["/"])
+
+    print("✓ Crawl depth and dedup test passed")
+
+
+def test_crawl_limits_and_scope():
+    """Test --max-pages, --include and --exclude while crawling."""
+    events = []
+    asyncio.run(_crawl_site(events, max_depth=5, max_pages=3))
+    assert sorted(_requested(events)) == ["/", "/a", "/b"]
+
+    events.clear()
+    asyncio.run(_crawl_site(events, max_depth=5, exclude=[re.compile(r"/b$")]))
+    assert sorted(_requested(events)) == ["/", "/a", "/c", "/data", "/e"]
+
+    # Include patterns replace the seed host scope, so other hosts can be followed
+    events.clear()
+    asyncio.run(_crawl_site(events, max_depth=5, include=[re.compile(r"/(a|x)$")]))
+    assert sorted(_requested(events)) == ["/", "/a"]
+    assert _requested(events, "other") == ["/x"]
+
+    print("✓ Crawl limits and scope test passed")
+
+
+def test_host_limiter_bounds_and_spaces_requests():
+    """Test the per-host concurrency bound and the delay between request starts."""
+
+    async def run(limiter, urls, hold):
+        loop = asyncio.get_running_loop()
+        origin = loop.time()
+        starts = {}
+        active = {}
+        peak = {}
+
+        async def request(url):
+            host = url.split("/")[2]
+            async with limiter.slot(url):
+                starts.setdefault(host, []).append(loop.time() - origin)
+                active[host] = active.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), active[host])
+                await asyncio.sleep(hold)
+                active[host] -= 1
+
+        await asyncio.gather(*[request(url) for url in urls])
+        return starts, peak
+
+    urls = [f"http://a.example/{i}" for i in range(6)] + ["http://b.example/0"]
+    starts, peak = asyncio.run(run(HostLimiter(per_host=2, delay=0), urls, hold=0.05))
+    assert peak == {"a.example": 2, "b.example": 1}
+
+    starts, peak = asyncio.run(run(HostLimiter(per_host=3, delay=0.1), urls, hold=0.01))
+    a_starts = starts["a.example"]
+    # Allow for timer jitter on each wake-up, but not for skipped delays
+    assert all(
+        later - earlier > 0.08 for earlier, later in zip(a_starts[:-1], a_starts[1:], strict=True)
+    )
+    assert a_starts[-1] - a_starts[0] >= 0.49
+    # Hosts are spaced independently
+    assert starts["b.example"][0] < 0.05
+
+    print("✓ Host limiter test passed")
+
+
+def test_crawl_and_fetch_streams_dois_while_crawling():
+    """Test that DOIs are fetched once each, during the crawl, with failures logged."""
+    events = []
+
+    async def fake_fetch_json(session, url, **kwargs):
+        doi = url.removeprefix("https://doi.org/")
+        events.append(("csl", doi, asyncio.get_running_loop().time()))
+        if doi == "10.1234/d":
+            raise aiohttp.ClientError("HTTP 404")
+        return {"DOI": doi}
+
+    async def run(writer, failure_log, provenance):
+        runners, base_url = await _start_site(events)
+        try:
+            return await crawl_and_fetch(
+                [base_url + "/"],
+                provenance,
+                writer,
+                failure_log,
+                concurrency=2,
+                in_scope=make_scope([base_url], [], []),
+                limiter=HostLimiter(per_host=4, delay=0),
+                max_depth=2,
+            )
+        finally:
+            for runner in runners:
+                await runner.cleanup()
+
+    fetch_json = get_metadata.fetch_json
+    get_metadata.fetch_json = fake_fetch_json
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            provenance = {}
+            with (
+                RecordWriter(tmp / "metadata.jsonl") as writer,
+                FailureLog(tmp / "failed.jsonl") as failure_log,
+            ):
+                pages = asyncio.run(run(writer, failure_log, provenance))
+
+            assert pages == 6
+            fetched = sorted(record["DOI"] for record in iter_records(tmp / "metadata.jsonl"))
+            assert fetched == ["10.1234/a", "10.1234/seed", "10.1234/slow"]
+            failures, failure_provenance = read_failure_log(tmp / "failed.jsonl")
+            assert list(failures) == ["10.1234/d"]
+            assert failure_provenance["10.1234/d"][0][0].endswith("/d")
+    finally:
+        get_metadata.fetch_json = fetch_json
+
+    # Each DOI is fetched once, however often it was found
+    assert {origin for _, origin, _ in provenance["10.1234/seed"]} == {"href", "text"}
+    csl = [doi for kind, doi, _ in events if kind == "csl"]
+    assert sorted(csl) == ["10.1234/a", "10.1234/d", "10.1234/seed", "10.1234/slow"]
+    assert "10.1234/e" not in provenance
+    # DOIs of earlier pages are fetched before the slow page of the last depth arrives
+    time_of = {(kind, key): at for kind, key, at in events}
+    assert time_of[("csl", "10.1234/a")] < time_of[("page", "/slow")]
+
+    print("✓ Crawl and fetch test passed")
+
+
+if __name__ == "__main__":
+    print("Running get_metadata tests...\n")
+    test_record_writer_streams_valid_files()
+    test_compact_json_matches_json_dumps()
+    test_failure_log_round_trip()
+    test_links_and_scope()
+    test_crawl_depth_and_dedup()
+    test_crawl_limits_and_scope()
+    test_host_limiter_bounds_and_spaces_requests()
+    test_crawl_and_fetch_streams_dois_while_crawling()
+    print("\n✓ All get_metadata tests passed!")
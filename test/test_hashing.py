@@ -0,0 +1,51 @@
+"""Tests for the hashing module."""
+
+import hashlib
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+from pdf_metadata_enhancer.hashing import hash_file, normalize_algorithms
+
+
+def test_hash_file_multiple_digests():
+    """Test computing several digests in one pass, across chunk boundaries."""
+    data = bytes(range(256)) * 1000
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(data)
+        temp_path = f.name
+
+    try:
+        digests = hash_file(temp_path, ("sha256", "sha512", "blake2b"), chunk_size=4096)
+        assert digests["sha256"] == hashlib.sha256(data).hexdigest()
+        assert digests["sha512"] == hashlib.sha512(data).hexdigest()
+        assert digests["blake2b"] == hashlib.blake2b(data).hexdigest()
+
+        single = hash_file(temp_path)
+        assert single == {"sha256": digests["sha256"]}
+        assert hash_file(temp_path, chunk_size=1000) == single
+        print("✓ Multi-digest hashing test passed")
+    finally:
+        Path(temp_path).unlink()
+
+
+def test_normalize_algorithms():
+    """Test algorithm validation always keeps SHA256 first."""
+    assert normalize_algorithms(None) == ("sha256",)
+    assert normalize_algorithms(["SHA512", "sha256", "blake2b"]) == ("sha256", "sha512", "blake2b")
+
+    try:
+        normalize_algorithms(["md6"])
+        raise AssertionError("Should have raised ValueError")
+    except ValueError as e:
+        assert "Unsupported digest algorithm" in str(e)
+    print("✓ Algorithm normalization test passed")
+
+
+if __name__ == "__main__":
+    print("Running hashing tests...\n")
+    test_hash_file_multiple_digests()
+    test_normalize_algorithms()
+    print("\n✓ All hashing tests passed!")
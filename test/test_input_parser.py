@@ -1,12 +1,19 @@
 """Tests for the input parser module."""
 
+import bz2
+import gzip
+import importlib.util
 import sys
 import tempfile
 from pathlib import Path
 
 sys.path.insert(0, "src")
 
-from pdf_metadata_enhancer.input_parser import parse_input_file
+from pdf_metadata_enhancer.input_parser import (
+    iter_input_file,
+    parse_input_file,
+    write_mapping_file,
+)
 
 
 def test_parse_csv():
@@ -115,6 +122,129 @@ def test_empty_file():
         csv_path.unlink()
 
 
+def test_write_mapping_file_roundtrip():
+    """Test that written mapping files parse back to the same rows."""
+    mappings = [
+        {"pdf": "./a, b.pdf", "doi": "10.1234/test1"},
+        {"pdf": "./ü.pdf", "doi": "10.1234/test2"},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for suffix in (".csv", ".tsv", ".jsonl", ".csv.gz", ".jsonl.xz"):
+            path = Path(tmp) / f"failed{suffix}"
+            write_mapping_file(path, mappings)
+            assert parse_input_file(path) == mappings
+    print("✓ Mapping file roundtrip test passed")
+
+
+def test_parse_compressed():
+    """Test streaming compressed CSV and JSONL files."""
+    with tempfile.TemporaryDirectory() as tmp:
+        gz_path = Path(tmp) / "map.csv.gz"
+        with gzip.open(gz_path, "wt", encoding="utf-8") as f:
+            f.write("pdf,doi\n./test1.pdf,10.1234/test1\n, \n./test2.pdf,10.1234/test2\n")
+        mappings = parse_input_file(gz_path)
+        assert [m["doi"] for m in mappings] == ["10.1234/test1", "10.1234/test2"]
+
+        bz2_path = Path(tmp) / "map.JSONL.BZ2"
+        with bz2.open(bz2_path, "wt", encoding="utf-8") as f:
+            f.write('{"pdf": "./test1.pdf", "doi": "10.1234/test1"}\n')
+        assert parse_input_file(bz2_path) == [{"pdf": "./test1.pdf", "doi": "10.1234/test1"}]
+
+        if importlib.util.find_spec("zstandard") is not None:
+            import zstandard
+
+            zst_path = Path(tmp) / "map.jsonl.zst"
+            with zstandard.open(zst_path, "wt", encoding="utf-8") as f:
+                f.write('{"pdf": "./test1.pdf", "doi": "10.1234/test1"}\n')
+            assert parse_input_file(zst_path)[0]["doi"] == "10.1234/test1"
+
+        # Rows are streamed lazily
+        rows = iter_input_file(gz_path)
+        assert next(rows) == {"pdf": "./test1.pdf", "doi": "10.1234/test1"}
+    print("✓ Compressed input test passed")
+
+
+def test_truncated_and_non_object_input_raise_value_errors():
+    """Test that corrupt files and non-object JSONL lines fail like invalid rows."""
+    with tempfile.TemporaryDirectory() as tmp:
+        gz_path = Path(tmp) / "map.csv.gz"
+        with gzip.open(gz_path, "wt", encoding="utf-8") as f:
+            f.write("pdf,doi\n")
+            for i in range(20000):
+                f.write(f"./doc{i}.pdf,10.1234/{i}\n")
+        data = gz_path.read_bytes()
+        gz_path.write_bytes(data[: len(data) // 2])
+
+        rows = []
+        try:
+            for row in iter_input_file(gz_path):
+                rows.append(row)
+            raise AssertionError("Expected ValueError")
+        except ValueError as e:
+            assert f"after {len(rows)} rows" in str(e)
+        # Rows before the damage are still read
+        assert rows and rows[0] == {"pdf": "./doc0.pdf", "doi": "10.1234/0"}
+
+        jsonl_path = Path(tmp) / "map.jsonl"
+        jsonl_path.write_text(
+            '{"pdf": "./a.pdf", "doi": "10.1234/a"}\n"./b.pdf"\n', encoding="utf-8"
+        )
+        rows = iter_input_file(jsonl_path)
+        assert next(rows)["doi"] == "10.1234/a"
+        try:
+            next(rows)
+            raise AssertionError("Expected ValueError")
+        except ValueError as e:
+            assert "Line 2" in str(e)
+        jsonl_path.write_text('["./a.pdf", "10.1234/a"]\n', encoding="utf-8")
+        try:
+            parse_input_file(jsonl_path)
+            raise AssertionError("Expected ValueError")
+        except ValueError as e:
+            assert "Line 1: Expected a JSON object" in str(e)
+    print("✓ Truncated and non-object input test passed")
+
+
+def test_parse_columnar():
+    """Test reading Parquet and Arrow files, ignoring other columns."""
+    if importlib.util.find_spec("pyarrow") is None:
+        print("- Columnar input test skipped (pyarrow not installed)")
+        return
+
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.parquet
+
+    table = pyarrow.table(
+        {
+            "title": ["A", "B", "C"],
+            "doi": ["10.1234/test1", None, "10.1234/test3"],
+            "pdf": ["./test1.pdf", "./test2.pdf", "./test3.pdf"],
+        }
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        parquet_path = Path(tmp) / "map.parquet"
+        pyarrow.parquet.write_table(table, parquet_path, row_group_size=1)
+        mappings = parse_input_file(parquet_path)
+        assert mappings == [
+            {"pdf": "./test1.pdf", "doi": "10.1234/test1"},
+            {"pdf": "./test3.pdf", "doi": "10.1234/test3"},
+        ]
+
+        arrow_path = Path(tmp) / "map.arrow"
+        pyarrow.feather.write_feather(table, arrow_path)
+        assert parse_input_file(arrow_path) == mappings
+
+        bad_path = Path(tmp) / "bad.parquet"
+        pyarrow.parquet.write_table(table.drop_columns(["doi"]), bad_path)
+        try:
+            parse_input_file(bad_path)
+            raise AssertionError("Should have raised ValueError")
+        except ValueError as e:
+            assert "Expected columns" in str(e)
+    print("✓ Columnar input test passed")
+
+
 if __name__ == "__main__":
     print("Running input parser tests...\n")
     test_parse_csv()
@@ -123,4 +253,8 @@ def test_empty_file():
     test_invalid_format()
     test_missing_columns()
     test_empty_file()
+    test_write_mapping_file_roundtrip()
+    test_parse_compressed()
+    test_truncated_and_non_object_input_raise_value_errors()
+    test_parse_columnar()
     print("\n✓ All input parser tests passed!")
@@ -0,0 +1,133 @@
+"""Tests for the layout module."""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pikepdf
+
+from pdf_metadata_enhancer.batch import enhance_many
+from pdf_metadata_enhancer.layout import OutputLayout
+
+
+def test_layout_paths():
+    """Test the path produced by each layout."""
+    out = Path("out")
+    sha = "ab" + "cd" + "0" * 60
+
+    assert OutputLayout(out).resolve("a/doc.pdf", "10.1/x") == out / "doc.pdf"
+    mirror = OutputLayout(out, "mirror", input_root=Path("/data"))
+    assert mirror.resolve("/data/vol1/doc.pdf", "10.1/x") == out / "vol1" / "doc.pdf"
+
+    sharded = OutputLayout(out, "sharded").resolve("a/doc.pdf", "10.1/x")
+    assert len(sharded.parent.name) == 2 and len(sharded.parent.parent.name) == 2
+    assert sharded.name == "doc.pdf"
+
+    doi = OutputLayout(out, "doi").resolve("a/doc.pdf", "10.21255/SGB-01/406352")
+    assert doi == out / "10.21255" / "sgb-01%2F406352" / "doc.pdf"
+
+    content = OutputLayout(out, "content").resolve("a/doc.pdf", "10.1/x", sha)
+    assert content == out / "ab" / "cd" / f"{sha}.pdf"
+
+    try:
+        OutputLayout(out, "bogus")
+        raise AssertionError("Should have raised ValueError")
+    except ValueError as e:
+        assert "Unknown output layout" in str(e)
+    print("✓ Layout path test passed")
+
+
+def test_layout_collisions():
+    """Test that same-named inputs never share an output path."""
+    layout = OutputLayout(Path("out"))
+    first = layout.resolve("a/doc.pdf", "10.1/x")
+    second = layout.resolve("b/doc.pdf", "10.1/y")
+    third = layout.resolve("b/doc.pdf", "10.1/y")
+
+    assert first == Path("out/doc.pdf")
+    assert second != first and second.suffix == ".pdf"
+    assert len({first, second, third}) == 3
+
+    # Resolution only depends on the input order
+    again = OutputLayout(Path("out"))
+    assert [
+        again.resolve("a/doc.pdf", "10.1/x"),
+        again.resolve("b/doc.pdf", "10.1/y"),
+        again.resolve("b/doc.pdf", "10.1/y"),
+    ] == [first, second, third]
+    print("✓ Layout collision test passed")
+
+
+def test_layout_keeps_existing_files():
+    """Test that existing files count as claimed and released claims are dropped."""
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        (out / "doc.pdf").write_bytes(b"earlier run")
+
+        assert OutputLayout(out).resolve("a/doc.pdf", "10.1/x") == out / "doc.pdf"
+        layout = OutputLayout(out, keep_existing=True)
+        first = layout.resolve("a/doc.pdf", "10.1/x")
+        assert first != out / "doc.pdf"
+
+        # Until released, the claim holds even though nothing is written yet
+        assert layout.resolve("a/doc.pdf", "10.1/x") != first
+        layout.release(first)
+        assert layout.resolve("a/doc.pdf", "10.1/x") == first
+    print("✓ Layout existing files test passed")
+
+
+def test_enhance_many_with_layout():
+    """Test that the layout is applied and recorded in the provenance."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        mappings = []
+        for folder in ("a", "b"):
+            (tmp / folder).mkdir()
+            path = tmp / folder / "doc.pdf"
+            pdf = pikepdf.Pdf.new()
+            pdf.add_blank_page()
+            pdf.save(path)
+            mappings.append({"pdf": str(path), "doi": f"10.1234/{folder}"})
+
+        out_dir = tmp / "out"
+        layout = OutputLayout(out_dir, "mirror", input_root=tmp)
+        results = list(
+            enhance_many(
+                mappings,
+                out_dir,
+                fetcher=lambda doi, verbose=False: {"DOI": doi, "title": doi},
+                layout=layout,
+            )
+        )
+
+        assert all(r.ok for r in results)
+        assert Path(results[0].output) == out_dir / "a" / "doc.pdf"
+        assert Path(results[1].output) == out_dir / "b" / "doc.pdf"
+        assert Path(results[1].sidecar) == out_dir / "b" / "doc.pdf.json"
+        assert '"layout": "mirror"' in Path(results[1].sidecar).read_text(encoding="utf-8")
+
+        # Identical inputs under the content layout still get separate outputs
+        results = list(
+            enhance_many(
+                mappings,
+                out_dir,
+                fetcher=lambda doi, verbose=False: {"DOI": doi, "title": doi},
+                layout=OutputLayout(out_dir, "content"),
+            )
+        )
+        assert all(r.ok for r in results)
+        assert results[0].input_sha256 == results[1].input_sha256
+        assert Path(results[0].output).name == f"{results[0].input_sha256}.pdf"
+        assert results[0].output != results[1].output
+    print("✓ Batch layout test passed")
+
+
+if __name__ == "__main__":
+    print("Running layout tests...\n")
+    test_layout_paths()
+    test_layout_collisions()
+    test_layout_keeps_existing_files()
+    test_enhance_many_with_layout()
+    print("\n✓ All layout tests passed!")
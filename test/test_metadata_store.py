@@ -0,0 +1,83 @@
+"""Tests for the metadata store module."""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pikepdf
+
+from pdf_metadata_enhancer.metadata_store import MetadataStore, load_sidecar
+from pdf_metadata_enhancer.sidecar import create_sidecar
+
+METADATA = {
+    "DOI": "10.1234/book",
+    "title": "Shared Book",
+    "abstract": "A long abstract shared by every chapter.",
+}
+
+
+def test_store_put_get():
+    """Test that equal records are stored once under the same digest."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MetadataStore(Path(tmp) / "store")
+
+        digest = store.put(METADATA)
+        reordered = dict(reversed(list(METADATA.items())))
+        assert store.put(reordered) == digest
+        assert store.put({**METADATA, "title": "Other"}) != digest
+
+        assert store.get(digest) == METADATA
+        assert len(list((Path(tmp) / "store").rglob("*.json"))) == 2
+
+        # Tampered records are detected on read
+        store.path_for(digest).write_text("{}", encoding="utf-8")
+        try:
+            store.get(digest)
+            raise AssertionError("Should have raised ValueError")
+        except ValueError as e:
+            assert "corrupt" in str(e)
+    print("✓ Store put/get test passed")
+
+
+def test_sidecar_references_store():
+    """Test that sidecars reference the store and can be rehydrated."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pdf_path = tmp / "chapter.pdf"
+        pdf = pikepdf.Pdf.new()
+        pdf.add_blank_page()
+        pdf.save(pdf_path)
+
+        store = MetadataStore(tmp / "store")
+        sidecars = []
+        for i in range(3):
+            sidecar_path = tmp / f"chapter{i}.json"
+            create_sidecar(
+                str(pdf_path),
+                pdf_path,
+                METADATA["DOI"],
+                METADATA,
+                sidecar_path,
+                metadata_store=store,
+            )
+            sidecars.append(sidecar_path)
+
+        raw = json.loads(sidecars[0].read_text(encoding="utf-8"))
+        assert "metadata" not in raw
+        assert raw["metadata_ref"]["store"] == str(tmp / "store")
+        assert len(list((tmp / "store").rglob("*.json"))) == 1
+
+        record = load_sidecar(sidecars[2])
+        assert record["metadata"] == METADATA
+        assert record["input"]["sha256"] == raw["input"]["sha256"]
+    print("✓ Sidecar store reference test passed")
+
+
+if __name__ == "__main__":
+    print("Running metadata store tests...\n")
+    test_store_put_get()
+    test_sidecar_references_store()
+    print("\n✓ All metadata store tests passed!")
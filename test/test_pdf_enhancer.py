@@ -8,7 +8,7 @@
 
 import pikepdf
 
-from pdf_metadata_enhancer.pdf_enhancer import enhance_pdf_metadata
+from pdf_metadata_enhancer.pdf_enhancer import SAVE_PROFILES, enhance_pdf_metadata
 
 
 def test_enhance_pdf_basic():
@@ -126,9 +126,37 @@ def test_enhance_pdf_xmp_metadata():
             output_pdf.unlink()
 
 
+def test_enhance_pdf_save_profiles():
+    """Test that save profiles control how the output is written."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        input_pdf = tmp / "input.pdf"
+        pdf = pikepdf.Pdf.new()
+        for _ in range(3):
+            pdf.add_blank_page()
+        pdf.save(input_pdf)
+
+        metadata = {"DOI": "10.1234/profile", "title": "Profile Test"}
+        for profile in SAVE_PROFILES:
+            output_pdf = tmp / f"{profile}.pdf"
+            enhance_pdf_metadata(str(input_pdf), output_pdf, metadata, save_profile=profile)
+            with pikepdf.open(output_pdf) as pdf:
+                assert str(pdf.docinfo["/Title"]) == "Profile Test"
+                assert pdf.is_linearized == (profile == "archival")
+
+        try:
+            enhance_pdf_metadata(str(input_pdf), tmp / "x.pdf", metadata, save_profile="unknown")
+            raise AssertionError("Expected ValueError")
+        except ValueError as e:
+            assert "Unknown save profile" in str(e)
+
+    print("✓ Save profile test passed")
+
+
 if __name__ == "__main__":
     print("Running PDF enhancer tests...\n")
     test_enhance_pdf_basic()
     test_enhance_pdf_minimal_metadata()
     test_enhance_pdf_xmp_metadata()
+    test_enhance_pdf_save_profiles()
     print("\n✓ All PDF enhancer tests passed!")
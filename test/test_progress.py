@@ -0,0 +1,191 @@
+"""Tests for the progress module."""
+
+import io
+import json
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pikepdf
+
+from pdf_metadata_enhancer.batch import EnhanceResult, enhance_many
+from pdf_metadata_enhancer.progress import (
+    ProgressReporter,
+    ProgressTracker,
+    count_in_background,
+    format_duration,
+    format_status,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_tracker_counts_stages_in_flight():
+    """Test that workers report their stages and the tracker ends with nothing in flight."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        mappings = []
+        for i in range(4):
+            path = tmp / f"doc{i}.pdf"
+            pdf = pikepdf.Pdf.new()
+            pdf.add_blank_page()
+            pdf.save(path)
+            mappings.append({"pdf": str(path), "doi": f"10.1234/{i}"})
+        mappings.append({"pdf": str(tmp / "absent.pdf"), "doi": "10.1234/absent"})
+
+        tracker = ProgressTracker()
+        barrier = threading.Barrier(2)
+        seen = []
+
+        def fetcher(doi, verbose=False):
+            if doi in ("10.1234/0", "10.1234/1"):
+                # Both fetches are in flight at the same time, and stay there
+                # until both have looked at the counter
+                barrier.wait(timeout=5)
+                seen.append(tracker.in_flight["fetch"])
+                barrier.wait(timeout=5)
+            return {"DOI": doi, "title": "Title"}
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for result in enhance_many(
+                mappings, tmp / "out", fetcher=fetcher, executor=executor, progress=tracker
+            ):
+                tracker.record(result)
+
+        assert seen == [2, 2]
+        assert tracker.in_flight == {"fetch": 0, "enhance": 0, "sidecar": 0}
+        assert (tracker.done, tracker.ok, tracker.errors) == (5, 4, 1)
+        assert tracker.bytes == sum(Path(m["pdf"]).stat().st_size for m in mappings[:4])
+
+    print("✓ Stage tracking test passed")
+
+
+def test_snapshot_rates_and_eta():
+    """Test rolling rates, error rate and ETA computed from the counters."""
+    clock = _Clock()
+    tracker = ProgressTracker()
+    reporter = ProgressReporter(tracker, window=10.0, clock=clock)
+
+    status = reporter.snapshot()
+    assert status["done"] == 0 and status["eta_seconds"] is None
+
+    for _ in range(20):
+        clock.now += 1
+        tracker.record(EnhanceResult(pdf="a.pdf", doi="10.1/a", status="ok", input_bytes=500_000))
+        reporter.snapshot()
+    tracker.record(EnhanceResult(pdf="b.pdf", doi="10.1/b"))
+    tracker.total = 61
+    status = reporter.snapshot()
+
+    # Only the last 10 seconds count: 10 rows plus the failed one
+    assert status["rows_per_second"] == 1.1
+    assert status["mb_per_second"] == 0.5
+    assert status["remaining"] == 40
+    assert status["eta_seconds"] == round(40 / 1.1, 1)
+    assert status["errors"] == 1
+    assert status["error_rate"] == round(1 / 21, 4)
+    assert status["elapsed_seconds"] == 20.0
+
+    counts = tracker.snapshot()
+    assert (counts["total"], counts["done"], counts["ok"], counts["errors"]) == (61, 21, 20, 1)
+    # The snapshot is a copy, not a view of the live counters
+    counts["in_flight"]["fetch"] = 5
+    assert tracker.in_flight["fetch"] == 0
+
+    tracker.done = 61
+    assert reporter.snapshot()["eta_seconds"] == 0.0
+
+    print("✓ Snapshot test passed")
+
+
+def test_reporter_writes_events_and_display():
+    """Test the JSON events file and the live display of a reporter."""
+    with tempfile.TemporaryDirectory() as tmp:
+        events_path = Path(tmp) / "progress.jsonl"
+        display = io.StringIO()
+        tracker = ProgressTracker(total=3)
+
+        with ProgressReporter(
+            tracker, interval=0.01, display=display, events_path=events_path
+        ) as reporter:
+            for _ in range(3):
+                tracker.record(EnhanceResult(pdf="a.pdf", doi="10.1/a", status="ok"))
+            threading.Event().wait(0.1)
+            reporter.echo("message")
+
+        events = [json.loads(line) for line in events_path.read_text().splitlines()]
+        assert len(events) > 1
+        assert {event["event"] for event in events[:-1]} == {"progress"}
+        assert events[-1]["event"] == "finished"
+        assert events[-1]["done"] == 3 and events[-1]["remaining"] == 0
+        assert all(event["timestamp"].endswith("Z") for event in events)
+        assert "+00:00" not in events[-1]["timestamp"]
+        assert "3/3 rows (100.0%)" in display.getvalue()
+        # The line is cleared when the reporter stops
+        assert display.getvalue().endswith("\r")
+
+    print("✓ Reporter test passed")
+
+
+def test_count_in_background():
+    """Test counting the rows for the total on a separate thread."""
+    tracker = ProgressTracker()
+    count_in_background(tracker, iter(range(1234))).join()
+    assert tracker.total == 1234
+
+    def broken():
+        yield 1
+        raise ValueError("bad row")
+
+    tracker = ProgressTracker()
+    count_in_background(tracker, broken()).join()
+    assert tracker.total is None
+
+    print("✓ Background counting test passed")
+
+
+def test_format_status():
+    """Test the display line and duration formatting."""
+    assert format_duration(None) == "?"
+    assert format_duration(12.7) == "12s"
+    assert format_duration(194) == "3m14s"
+    assert format_duration(7500) == "2h05m"
+
+    line = format_status(
+        {
+            "done": 1234,
+            "total": 10000,
+            "errors": 12,
+            "error_rate": 0.0097,
+            "rows_per_second": 45.2,
+            "mb_per_second": 3.14,
+            "in_flight": {"fetch": 8, "enhance": 3, "sidecar": 1},
+            "eta_seconds": 194.0,
+        }
+    )
+    assert line == (
+        "1,234/10,000 rows (12.3%) | 45.2 rows/s 3.1 MB/s | fetch 8 enhance 3 sidecar 1"
+        " | errors 12 (1.0%) | ETA 3m14s"
+    )
+
+    print("✓ Status formatting test passed")
+
+
+if __name__ == "__main__":
+    print("Running progress module tests...\n")
+    test_tracker_counts_stages_in_flight()
+    test_snapshot_rates_and_eta()
+    test_reporter_writes_events_and_display()
+    test_count_in_background()
+    test_format_status()
+    print("\n✓ All progress tests passed!")
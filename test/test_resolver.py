@@ -0,0 +1,171 @@
+"""Tests for the resolver module."""
+
+import json
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote
+
+sys.path.insert(0, "src")
+
+from pdf_metadata_enhancer.metadata_fetcher import MetadataFetchError
+from pdf_metadata_enhancer.resolver import DoiResolver, doi_prefix, learn_route, load_routes
+
+
+class _Stub:
+    """Local resolver redirecting to a local agency answering with CSL-JSON."""
+
+    def __init__(self):
+        self.hits = {"resolver": [], "agency": []}
+        self.accept = []
+        self.agency_down = False
+        stub = self
+
+        class Resolver(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.hits["resolver"].append(self.path)
+                self.send_response(302)
+                self.send_header("Location", f"{stub.agency_url}/works{self.path}/transform")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        class Agency(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.hits["agency"].append(self.path)
+                stub.accept.append(self.headers["Accept"])
+                doi = unquote(self.path.removeprefix("/works/").removesuffix("/transform"))
+                if stub.agency_down:
+                    status, body = 503, b"{}"
+                elif doi.endswith("/missing"):
+                    status, body = 404, b"{}"
+                else:
+                    status, body = 200, json.dumps({"DOI": doi, "title": f"T {doi}"}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/vnd.citationstyles.csl+json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._servers = [ThreadingHTTPServer(("127.0.0.1", 0), h) for h in (Resolver, Agency)]
+        for server in self._servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.resolver_url = f"http://127.0.0.1:{self._servers[0].server_address[1]}"
+        self.agency_url = f"http://127.0.0.1:{self._servers[1].server_address[1]}"
+
+    def close(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+
+def test_learn_route():
+    """Test deriving endpoint templates from final URLs."""
+    assert doi_prefix(" 10.21255/SGB-01 ") == "10.21255"
+    assert learn_route("10.21255/SGB-01", "https://api.example.org/works/10.21255/sgb-01/x") == {
+        "template": "https://api.example.org/works/{doi}/x",
+        "encoding": "raw",
+    }
+    assert learn_route("10.1/a<b>", "https://ra.example/10.1%2Fa%3Cb%3E") == {
+        "template": "https://ra.example/{doi}",
+        "encoding": "full",
+    }
+    assert learn_route("10.1/a", "https://ra.example/landing") is None
+    assert learn_route("10.1/a", "https://ra.example/10.1/a?id=10.1/a") is None
+
+    print("✓ Route learning test passed")
+
+
+def test_resolver_routes_directly_after_first_lookup():
+    """Test that later DOIs of a prefix skip the resolver."""
+    stub = _Stub()
+    try:
+        resolver = DoiResolver(resolver_url=stub.resolver_url)
+
+        assert resolver("10.5555/a")["title"] == "T 10.5555/a"
+        assert resolver.routes == {
+            "10.5555": {"template": f"{stub.agency_url}/works/{{doi}}/transform", "encoding": "raw"}
+        }
+        assert resolver("10.5555/B")["DOI"] == "10.5555/B"
+        assert resolver("10.7777/c")["DOI"] == "10.7777/c"
+
+        assert stub.hits["resolver"] == ["/10.5555/a", "/10.7777/c"]
+        assert stub.hits["agency"] == [
+            "/works/10.5555/a/transform",
+            "/works/10.5555/B/transform",
+            "/works/10.7777/c/transform",
+        ]
+        assert set(stub.accept) == {"application/vnd.citationstyles.csl+json"}
+        assert resolver.stats == {"resolver": 2, "direct": 1}
+
+        # Unknown DOIs fail like with fetch_metadata, after asking the resolver
+        try:
+            resolver("10.5555/missing")
+            raise AssertionError("Expected MetadataFetchError")
+        except MetadataFetchError as e:
+            assert not e.transient
+        assert stub.hits["resolver"][-1] == "/10.5555/missing"
+    finally:
+        stub.close()
+
+    print("✓ Direct routing test passed")
+
+
+def test_resolver_falls_back_and_relearns():
+    """Test that a stale route falls back to the resolver and is replaced."""
+    stub = _Stub()
+    try:
+        stale = {"10.5555": {"template": "http://127.0.0.1:9/{doi}", "encoding": "raw"}}
+        resolver = DoiResolver(resolver_url=stub.resolver_url, routes=stale, timeout=5)
+
+        assert resolver("10.5555/a")["DOI"] == "10.5555/a"
+        assert resolver.stats == {"fell_back": 1, "resolver": 1}
+        assert resolver.routes["10.5555"]["template"].startswith(stub.agency_url)
+
+        # Transient failures are still reported as such
+        stub.agency_down = True
+        try:
+            resolver("10.5555/b")
+            raise AssertionError("Expected MetadataFetchError")
+        except MetadataFetchError as e:
+            assert e.transient
+    finally:
+        stub.close()
+
+    print("✓ Fallback test passed")
+
+
+def test_route_file_round_trip():
+    """Test saving and loading learned routes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "routes.json"
+        assert load_routes(path) == {}
+
+        routes = {"10.1": {"template": "https://ra.example/{doi}", "encoding": "path"}}
+        DoiResolver(routes=routes).save_routes(path)
+        assert load_routes(path) == routes
+
+        path.write_text(json.dumps({"10.1": {"template": "https://ra.example/"}}))
+        try:
+            load_routes(path)
+            raise AssertionError("Expected ValueError")
+        except ValueError:
+            pass
+
+    print("✓ Route file test passed")
+
+
+if __name__ == "__main__":
+    print("Running resolver module tests...\n")
+    test_learn_route()
+    test_resolver_routes_directly_after_first_lookup()
+    test_resolver_falls_back_and_relearns()
+    test_route_file_round_trip()
+    print("\n✓ All resolver tests passed!")
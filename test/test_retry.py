@@ -0,0 +1,153 @@
+"""Tests for the retry module."""
+
+import errno
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pikepdf
+
+from pdf_metadata_enhancer.batch import enhance_many
+from pdf_metadata_enhancer.metadata_fetcher import MetadataFetchError
+from pdf_metadata_enhancer.retry import RetryScheduler, is_transient
+
+
+def test_scheduler_backoff():
+    """Test jittered exponential backoff and ready ordering."""
+    now = [100.0]
+    scheduler = RetryScheduler(
+        max_attempts=3, base_delay=2.0, max_delay=5.0, clock=lambda: now[0], rng=lambda: 1.0
+    )
+
+    assert scheduler.park("a", attempt=1) == 2.0
+    assert scheduler.park("b", attempt=2) == 4.0
+    assert scheduler.park("c", attempt=3) == 5.0  # capped
+    assert len(scheduler) == 3
+    assert scheduler.pop_ready() == []
+    assert scheduler.next_ready_in() == 2.0
+
+    now[0] += 4.0
+    assert scheduler.pop_ready() == ["a", "b"]
+    assert scheduler.should_retry(2) and not scheduler.should_retry(3)
+
+    half = RetryScheduler(base_delay=2.0, rng=lambda: 0.0)
+    assert half.park("x", attempt=1) == 1.0
+
+    scheduler.park("d", attempt=1)
+    assert scheduler.drain() == ["c", "d"]
+    assert len(scheduler) == 0
+    print("✓ Scheduler backoff test passed")
+
+
+def test_is_transient():
+    """Test failure classification."""
+    assert is_transient(MetadataFetchError("503", transient=True))
+    assert not is_transient(MetadataFetchError("404"))
+    assert is_transient(OSError(errno.ETIMEDOUT, "timed out"))
+    assert not is_transient(FileNotFoundError(errno.ENOENT, "missing"))
+    assert not is_transient(ValueError("broken PDF"))
+    print("✓ Failure classification test passed")
+
+
+def test_enhance_many_retries_transient_failures():
+    """Test that transient failures are retried and permanent ones are not."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        mappings = []
+        for name in ("flaky", "gone", "fine"):
+            path = tmp / f"{name}.pdf"
+            pdf = pikepdf.Pdf.new()
+            pdf.add_blank_page()
+            pdf.save(path)
+            mappings.append({"pdf": str(path), "doi": f"10.1234/{name}"})
+
+        calls = {}
+
+        def fetcher(doi, verbose=False):
+            calls[doi] = calls.get(doi, 0) + 1
+            if doi.endswith("flaky") and calls[doi] < 3:
+                raise MetadataFetchError("HTTP 503", transient=True)
+            if doi.endswith("gone"):
+                raise MetadataFetchError("HTTP 404")
+            return {"DOI": doi, "title": doi}
+
+        results = list(
+            enhance_many(
+                mappings,
+                tmp / "out",
+                fetcher=fetcher,
+                retry=RetryScheduler(max_attempts=3, base_delay=0.01),
+            )
+        )
+
+        by_doi = {r.doi: r for r in results}
+        assert len(results) == 3
+        assert by_doi["10.1234/flaky"].ok and by_doi["10.1234/flaky"].attempts == 3
+        assert not by_doi["10.1234/gone"].ok and by_doi["10.1234/gone"].attempts == 1
+        assert by_doi["10.1234/fine"].ok
+        # The flaky row did not hold up the rows after it
+        assert results[-1].doi == "10.1234/flaky"
+        assert calls == {"10.1234/flaky": 3, "10.1234/gone": 1, "10.1234/fine": 1}
+    print("✓ Batch retry test passed")
+
+
+def test_input_error_accounts_for_rows_read_before():
+    """Test that an invalid row does not swallow in-flight or parked rows."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        mappings = []
+        for name in ("flaky", "slow", "fine"):
+            path = tmp / f"{name}.pdf"
+            pdf = pikepdf.Pdf.new()
+            pdf.add_blank_page()
+            pdf.save(path)
+            mappings.append({"pdf": str(path), "doi": f"10.1234/{name}"})
+
+        def rows():
+            yield from mappings
+            raise ValueError("Row 5: missing 'doi'")
+
+        def fetcher(doi, verbose=False):
+            if doi.endswith("flaky"):
+                raise MetadataFetchError("HTTP 503", transient=True)
+            if doi.endswith("slow"):
+                time.sleep(0.2)
+            return {"DOI": doi, "title": doi}
+
+        results = []
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            try:
+                for result in enhance_many(
+                    rows(),
+                    tmp / "out",
+                    fetcher=fetcher,
+                    executor=executor,
+                    retry=RetryScheduler(max_attempts=3, base_delay=60.0),
+                ):
+                    results.append(result)
+                raise AssertionError("Expected ValueError")
+            except ValueError as e:
+                assert "Row 5" in str(e)
+
+        by_doi = {r.doi: r for r in results}
+        assert sorted(by_doi) == ["10.1234/fine", "10.1234/flaky", "10.1234/slow"]
+        assert by_doi["10.1234/slow"].ok and by_doi["10.1234/fine"].ok
+        # The parked row is reported with its failure instead of waiting for its backoff
+        flaky = by_doi["10.1234/flaky"]
+        assert not flaky.ok and flaky.transient and flaky.attempts == 1
+        assert time.monotonic() - started < 30
+    print("✓ Input error accounting test passed")
+
+
+if __name__ == "__main__":
+    print("Running retry tests...\n")
+    test_scheduler_backoff()
+    test_is_transient()
+    test_enhance_many_retries_transient_failures()
+    test_input_error_accounts_for_rows_read_before()
+    print("\n✓ All retry tests passed!")
@@ -0,0 +1,250 @@
+"""Tests for the HTTP service module."""
+
+import hashlib
+import http.client
+import json
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pikepdf
+
+from pdf_metadata_enhancer.server import EnhancementService, make_server
+
+
+def _start_server(out_dir, **kwargs):
+    service = EnhancementService(out_dir, **kwargs)
+    server = make_server(service, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    return server, service, base_url
+
+
+def _stop_server(server, service):
+    server.shutdown()
+    server.server_close()
+    service.shutdown()
+
+
+def _make_pdf(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pdf = pikepdf.Pdf.new()
+    pdf.add_blank_page()
+    pdf.save(path)
+    return path
+
+
+def _post(url, data, headers):
+    request = urllib.request.Request(url, data=data, headers=headers, method="POST")
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.status, dict(response.headers), response.read()
+
+
+def test_enhance_by_path():
+    """Test enhancing a PDF on disk with inline CSL-JSON."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        input_pdf = tmp / "input.pdf"
+        pdf = pikepdf.Pdf.new()
+        pdf.add_blank_page()
+        pdf.save(input_pdf)
+
+        server, service, base_url = _start_server(tmp / "out", workers=2)
+        try:
+            metadata = {"DOI": "10.1234/serve", "title": "Served Document"}
+            body = json.dumps({"pdf": str(input_pdf), "metadata": metadata}).encode()
+            status, _, raw = _post(
+                f"{base_url}/enhance", body, {"Content-Type": "application/json"}
+            )
+            result = json.loads(raw)
+
+            assert status == 200
+            assert result["status"] == "ok"
+            assert result["provenance"]["doi"] == "10.1234/serve"
+            assert Path(result["sidecar"]).exists()
+            with pikepdf.open(result["output"]) as out:
+                assert str(out.docinfo["/Title"]) == "Served Document"
+        finally:
+            _stop_server(server, service)
+
+    print("✓ Enhance by path test passed")
+
+
+def test_enhance_upload_returns_pdf():
+    """Test uploading a PDF and receiving the enhanced PDF back."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        input_pdf = tmp / "upload.pdf"
+        pdf = pikepdf.Pdf.new()
+        pdf.add_blank_page()
+        pdf.save(input_pdf)
+
+        server, service, base_url = _start_server(tmp / "out")
+        try:
+            metadata = json.dumps({"DOI": "10.1234/upload", "title": "Uploaded"})
+            query = urllib.request.quote(metadata)
+            status, headers, raw = _post(
+                f"{base_url}/enhance?filename=upload.pdf&metadata={query}",
+                input_pdf.read_bytes(),
+                {"Content-Type": "application/pdf", "Accept": "application/pdf"},
+            )
+
+            assert status == 200
+            assert raw.startswith(b"%PDF")
+            assert Path(headers["X-Provenance-Path"]).exists()
+            out_path = tmp / "returned.pdf"
+            out_path.write_bytes(raw)
+            with pikepdf.open(out_path) as out:
+                assert str(out.docinfo["/Title"]) == "Uploaded"
+        finally:
+            _stop_server(server, service)
+
+    print("✓ Upload test passed")
+
+
+def test_missing_doi_and_metadata():
+    """Test that a request without DOI or metadata is rejected."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        input_pdf = tmp / "input.pdf"
+        pdf = pikepdf.Pdf.new()
+        pdf.add_blank_page()
+        pdf.save(input_pdf)
+
+        server, service, base_url = _start_server(tmp / "out")
+        try:
+            body = json.dumps({"pdf": str(input_pdf)}).encode()
+            try:
+                _post(f"{base_url}/enhance", body, {"Content-Type": "application/json"})
+                raise AssertionError("Should have returned an HTTP error")
+            except urllib.error.HTTPError as e:
+                assert e.code == 400
+                assert "required" in json.loads(e.read())["error"]
+        finally:
+            _stop_server(server, service)
+
+    print("✓ Missing DOI/metadata test passed")
+
+
+def test_concurrent_same_named_inputs_keep_their_outputs():
+    """Test that concurrent requests for same-named PDFs get separate outputs."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        inputs = [_make_pdf(tmp / "a" / "paper.pdf"), _make_pdf(tmp / "b" / "paper.pdf")]
+        both_fetching = threading.Barrier(2)
+
+        def fetcher(doi, verbose=False):
+            # Hold both jobs until they run at the same time
+            both_fetching.wait(timeout=10)
+            return {"DOI": doi, "title": f"Title {doi}"}
+
+        server, service, base_url = _start_server(tmp / "out", workers=2, fetcher=fetcher)
+        try:
+            results = [None, None]
+
+            def request(index):
+                body = json.dumps({"pdf": str(inputs[index]), "doi": f"10.1234/{index}"})
+                _, _, raw = _post(
+                    f"{base_url}/enhance", body.encode(), {"Content-Type": "application/json"}
+                )
+                results[index] = json.loads(raw)
+
+            threads = [threading.Thread(target=request, args=(i,)) for i in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            _stop_server(server, service)
+
+        assert results[0]["output"] != results[1]["output"]
+        assert "paper.pdf" in {Path(r["output"]).name for r in results}
+        for index, result in enumerate(results):
+            output = Path(result["output"])
+            provenance = result["provenance"]
+            assert hashlib.sha256(output.read_bytes()).hexdigest() == provenance["output"]["sha256"]
+            sidecar = json.loads(Path(result["sidecar"]).read_text())
+            assert sidecar["doi"] == f"10.1234/{index}"
+            with pikepdf.open(output) as out:
+                assert str(out.docinfo["/Title"]) == f"Title 10.1234/{index}"
+
+    print("✓ Concurrent same-named inputs test passed")
+
+
+def test_malformed_requests_get_error_responses():
+    """Test that bad headers and storage failures are answered with JSON errors."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        server, service, base_url = _start_server(tmp / "out")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+            connection.putrequest("POST", "/enhance")
+            connection.putheader("Content-Type", "application/json")
+            connection.putheader("Content-Length", "many")
+            connection.endheaders()
+            response = connection.getresponse()
+            assert response.status == 400
+            assert "Content-Length" in json.loads(response.read())["error"]
+            connection.close()
+
+            # Uploads cannot be stored when the upload directory is not a directory
+            service.upload_dir = tmp / "not-a-directory"
+            service.upload_dir.write_text("")
+            try:
+                _post(
+                    f"{base_url}/enhance?doi=10.1234/x",
+                    _make_pdf(tmp / "in.pdf").read_bytes(),
+                    {"Content-Type": "application/pdf"},
+                )
+                raise AssertionError("Should have returned an HTTP error")
+            except urllib.error.HTTPError as e:
+                assert e.code == 500
+                assert "Error storing upload" in json.loads(e.read())["error"]
+        finally:
+            _stop_server(server, service)
+
+    print("✓ Malformed request test passed")
+
+
+def test_restart_and_repeated_uploads_keep_outputs():
+    """Test that a restarted service keeps earlier outputs and uploads are stored once."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        data = _make_pdf(tmp / "paper.pdf").read_bytes()
+        metadata = urllib.request.quote(json.dumps({"DOI": "10.1234/x", "title": "Paper"}))
+        url = "/enhance?filename=paper.pdf&metadata=" + metadata
+        outputs = []
+        for _ in range(2):
+            server, service, base_url = _start_server(tmp / "out")
+            try:
+                for _ in range(2):
+                    _, _, raw = _post(base_url + url, data, {"Content-Type": "application/pdf"})
+                    outputs.append(Path(json.loads(raw)["output"]))
+                # Finished jobs leave no claims behind
+                assert not service._layout._claimed
+            finally:
+                _stop_server(server, service)
+
+        assert len(set(outputs)) == 4
+        assert all(output.exists() for output in outputs)
+        uploads = list((tmp / "out" / "uploads").rglob("*"))
+        assert [p.name for p in uploads if p.is_file()] == ["paper.pdf"]
+
+    print("✓ Restart and repeated upload test passed")
+
+
+if __name__ == "__main__":
+    print("Running server tests...\n")
+    test_enhance_by_path()
+    test_enhance_upload_returns_pdf()
+    test_missing_doi_and_metadata()
+    test_concurrent_same_named_inputs_keep_their_outputs()
+    test_malformed_requests_get_error_responses()
+    test_restart_and_repeated_uploads_keep_outputs()
+    print("\n✓ All server tests passed!")
@@ -0,0 +1,208 @@
+"""Tests for the shard module."""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+from pdf_metadata_enhancer.input_parser import parse_input_file, write_mapping_file
+from pdf_metadata_enhancer.shard import (
+    merge_shards,
+    parse_shard,
+    read_manifest,
+    select_shard,
+    shard_name,
+    shard_of,
+    write_manifest,
+    write_shard_summary,
+)
+
+
+def test_parse_shard():
+    """Test parsing shard specifications."""
+    assert parse_shard("1/4") == (1, 4)
+    assert parse_shard(" 8 / 8 ") == (8, 8)
+    for spec in ("0/4", "5/4", "1", "a/b", "1/0"):
+        try:
+            parse_shard(spec)
+            raise AssertionError(f"Expected ValueError for {spec}")
+        except ValueError:
+            pass
+
+    print("✓ Shard parsing test passed")
+
+
+def test_select_shard_partitions_by_doi():
+    """Test that shards partition the rows and keep rows of one DOI together."""
+    mappings = [{"pdf": f"doc{i}.pdf", "doi": f"10.1234/{i % 50}"} for i in range(400)]
+    mappings.append({"pdf": "upper.pdf", "doi": " 10.1234/ABC "})
+    mappings.append({"pdf": "lower.pdf", "doi": "10.1234/abc"})
+
+    shards = [list(select_shard(mappings, index, 4)) for index in range(1, 5)]
+
+    assert sum(len(rows) for rows in shards) == len(mappings)
+    assert all(rows for rows in shards)
+    for index, rows in enumerate(shards, 1):
+        assert all(shard_of(row["doi"], 4) == index for row in rows)
+        # Input order is kept within a shard
+        assert rows == [m for m in mappings if shard_of(m["doi"], 4) == index]
+    assert shard_of("10.1234/ABC", 4) == shard_of("10.1234/abc", 4)
+
+    print("✓ Shard selection test passed")
+
+
+def _write_shard(out_dir, index, count, outputs, errors=0, failed=None, journal=None):
+    prefix = shard_name(index, count)
+    write_manifest(out_dir / f"{prefix}.manifest-sha256.txt", outputs)
+    failed_file = None
+    if failed:
+        failed_file = out_dir / f"failed_mappings-{prefix}.csv"
+        write_mapping_file(failed_file, failed)
+    write_shard_summary(
+        out_dir / f"{prefix}.summary.json",
+        {
+            "shard": {"index": index, "count": count},
+            "input": "map.csv",
+            "processed": len(outputs),
+            "errors": errors,
+            "retried": 0,
+            "journal": str(journal) if journal else None,
+            "manifest": f"{prefix}.manifest-sha256.txt",
+            "failed_file": str(failed_file) if failed_file else None,
+            "exit_status": 1 if errors else 0,
+        },
+    )
+
+
+def test_merge_shards():
+    """Test merging complete, failed, missing and conflicting shards."""
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        journals = []
+        for index in (1, 2):
+            journal = out_dir / f"journal-{index}.jsonl"
+            journal.write_text(json.dumps({"doi": f"10.1234/{index}"}) + "\n")
+            journals.append(journal)
+        _write_shard(out_dir, 1, 2, [("a" * 64, "a.pdf")], journal=journals[0])
+        _write_shard(out_dir, 2, 2, [("b" * 64, "b.pdf")], journal=journals[1])
+
+        summary = merge_shards(out_dir)
+        assert summary["ok"]
+        assert summary["processed"] == 2
+        assert summary["journal_records"] == 2
+        assert list(read_manifest(out_dir / "manifest-sha256.txt")) == [
+            ("a" * 64, "a.pdf"),
+            ("b" * 64, "b.pdf"),
+        ]
+        assert len((out_dir / "provenance.jsonl").read_text().splitlines()) == 2
+
+        # A failed shard fails the merge and its rows are collected
+        _write_shard(out_dir, 2, 2, [], errors=1, failed=[{"pdf": "b.pdf", "doi": "10.1234/b"}])
+        summary = merge_shards(out_dir)
+        assert not summary["ok"]
+        assert summary["failed_rows"] == 1
+        assert parse_input_file(out_dir / "failed_mappings.csv") == [
+            {"pdf": "b.pdf", "doi": "10.1234/b"}
+        ]
+
+        # Missing shards and outputs written by two shards fail the merge
+        for path in out_dir.glob("shard-*"):
+            path.unlink()
+        _write_shard(out_dir, 1, 3, [("a" * 64, "a.pdf")])
+        _write_shard(out_dir, 2, 3, [("c" * 64, "a.pdf")])
+        summary = merge_shards(out_dir)
+        assert not summary["ok"]
+        assert summary["shards"]["missing"] == [3]
+        assert summary["conflicting_outputs"] == ["a.pdf"]
+        assert summary["journal"] is None
+
+    print("✓ Shard merge test passed")
+
+
+def test_merge_shards_keeps_shard_journal_at_consolidated_path():
+    """Test that a shard journal at the consolidated path is never truncated."""
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        shared = out_dir / "provenance.jsonl"
+        records = [json.dumps({"doi": f"10.1234/{i}"}) for i in (1, 2)]
+        shared.write_text("\n".join(records) + "\n")
+        _write_shard(out_dir, 1, 2, [("a" * 64, "a.pdf")], journal=shared)
+        _write_shard(out_dir, 2, 2, [("b" * 64, "b.pdf")], journal=shared)
+
+        summary = merge_shards(out_dir)
+        assert summary["ok"]
+        assert summary["journal_records"] == 2
+        assert shared.read_text().splitlines() == records
+
+        # One of several shard journals cannot be the consolidated journal
+        other = out_dir / "journal-2.jsonl"
+        other.write_text(json.dumps({"doi": "10.1234/3"}) + "\n")
+        _write_shard(out_dir, 2, 2, [("b" * 64, "b.pdf")], journal=other)
+        try:
+            merge_shards(out_dir)
+            raise AssertionError("Expected ValueError")
+        except ValueError as e:
+            assert "one of the shard journals" in str(e)
+        assert shared.read_text().splitlines() == records
+
+        summary = merge_shards(out_dir, journal_path=out_dir / "all.jsonl")
+        assert summary["journal_records"] == 3
+
+    print("✓ Shard journal preservation test passed")
+
+
+def test_merge_shards_keeps_bag_manifest():
+    """Test that merge does not overwrite the payload manifest of a BagIt bag."""
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        (out_dir / "bagit.txt").write_text("BagIt-Version: 1.0\n")
+        bag_manifest = out_dir / "manifest-sha256.txt"
+        bag_manifest.write_text(f"{'d' * 64}  data/a.pdf\n")
+        _write_shard(out_dir, 1, 1, [("a" * 64, "a.pdf")])
+
+        try:
+            merge_shards(out_dir)
+            raise AssertionError("Expected ValueError")
+        except ValueError as e:
+            assert "BagIt bag" in str(e)
+        assert bag_manifest.read_text() == f"{'d' * 64}  data/a.pdf\n"
+
+        summary = merge_shards(out_dir, manifest_path=out_dir / "shards-sha256.txt")
+        assert summary["ok"]
+        assert summary["manifest_entries"] == 1
+
+    print("✓ Bag manifest preservation test passed")
+
+
+def test_merge_shards_rejects_mixed_runs():
+    """Test that summaries of different runs are not merged."""
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        try:
+            merge_shards(out_dir)
+            raise AssertionError("Expected ValueError")
+        except ValueError as e:
+            assert "No shard summaries" in str(e)
+
+        _write_shard(out_dir, 1, 2, [])
+        _write_shard(out_dir, 1, 3, [])
+        try:
+            merge_shards(out_dir)
+            raise AssertionError("Expected ValueError")
+        except ValueError as e:
+            assert "different runs" in str(e)
+
+    print("✓ Mixed run rejection test passed")
+
+
+if __name__ == "__main__":
+    print("Running shard module tests...\n")
+    test_parse_shard()
+    test_select_shard_partitions_by_doi()
+    test_merge_shards()
+    test_merge_shards_keeps_shard_journal_at_consolidated_path()
+    test_merge_shards_keeps_bag_manifest()
+    test_merge_shards_rejects_mixed_runs()
+    print("\n✓ All shard tests passed!")
@@ -67,6 +67,21 @@ def test_create_sidecar():
 
         print("✓ Sidecar creation test passed")
 
+        create_sidecar(
+            input_pdf,
+            output_pdf,
+            "10.1234/test",
+            metadata,
+            sidecar_path,
+            algorithms=("sha256", "sha512"),
+        )
+        with open(sidecar_path) as f:
+            data = json.load(f)
+        assert data["output"]["sha256"] == compute_file_hash(str(output_pdf))
+        assert len(data["output"]["sha512"]) == 128
+
+        print("✓ Sidecar extra digest test passed")
+
     finally:
         Path(input_pdf).unlink()
         output_pdf.unlink()
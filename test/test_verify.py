@@ -0,0 +1,98 @@
+"""Tests for the verify module."""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pikepdf
+
+from pdf_metadata_enhancer.pdf_enhancer import enhance_pdf_metadata
+from pdf_metadata_enhancer.sidecar import compute_file_hash, create_sidecar
+from pdf_metadata_enhancer.verify import load_provenance_records, verify_records
+
+METADATA = {
+    "DOI": "10.1234/verify",
+    "title": "Verified Document",
+    "author": [{"family": "Smith", "given": "John"}],
+}
+
+
+def _enhance(tmp, name):
+    input_pdf = tmp / f"{name}-in.pdf"
+    pdf = pikepdf.Pdf.new()
+    pdf.add_blank_page()
+    pdf.save(input_pdf)
+
+    out_dir = tmp / "out"
+    out_dir.mkdir(exist_ok=True)
+    output_pdf = out_dir / f"{name}.pdf"
+    enhance_pdf_metadata(str(input_pdf), output_pdf, METADATA)
+    create_sidecar(str(input_pdf), output_pdf, METADATA["DOI"], METADATA, out_dir / f"{name}.json")
+    return input_pdf, output_pdf
+
+
+def test_verify_clean_tree():
+    """Test that untouched outputs verify, including embedded metadata."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        _enhance(tmp, "a")
+        _enhance(tmp, "b")
+
+        report = verify_records(load_provenance_records(tmp / "out"), check_metadata=True)
+
+        assert report["checked"] == 2
+        assert report["ok"] == 2
+        assert report["failures"] == []
+
+    print("✓ Clean tree verification test passed")
+
+
+def test_verify_detects_problems():
+    """Test that missing, modified and re-labelled files are reported."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        input_a, _ = _enhance(tmp, "a")
+        _, output_b = _enhance(tmp, "b")
+        _, output_c = _enhance(tmp, "c")
+
+        input_a.unlink()
+        with open(output_b, "ab") as f:
+            f.write(b"\n% tampered\n")
+        with pikepdf.open(output_c, allow_overwriting_input=True) as pdf:
+            pdf.docinfo["/Title"] = "Something else"
+            pdf.save(output_c)
+        # Re-record the hash so only the embedded metadata disagrees
+        sidecar_c = tmp / "out" / "c.json"
+        record = json.loads(sidecar_c.read_text(encoding="utf-8"))
+        record["output"]["sha256"] = compute_file_hash(str(output_c))
+        sidecar_c.write_text(json.dumps(record), encoding="utf-8")
+
+        records = list(load_provenance_records(tmp / "out"))
+        report = verify_records(records, workers=2, check_metadata=True)
+
+        assert report["checked"] == 3
+        assert report["failed"] == 3
+        assert report["missing"] == 1
+        assert report["mismatched"] == 1
+        assert report["metadata_mismatches"] == 1
+        by_origin = {Path(f["origin"]).stem: f["problems"] for f in report["failures"]}
+        assert by_origin["a"][0]["file"] == "input"
+        assert by_origin["b"][0]["kind"] == "mismatch"
+        assert by_origin["c"][0]["field"] == "/Title"
+        assert by_origin["c"][0]["actual"] == "Something else"
+
+        report = verify_records(records, check_inputs=False, check_metadata=False)
+        assert report["failed"] == 1
+        assert report["missing"] == 0
+
+    print("✓ Problem detection test passed")
+
+
+if __name__ == "__main__":
+    print("Running verify tests...\n")
+    test_verify_clean_tree()
+    test_verify_detects_problems()
+    print("\n✓ All verify tests passed!")
@@ -0,0 +1,136 @@
+"""Tests for the xmp module."""
+
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pikepdf
+
+from pdf_metadata_enhancer.pdf_enhancer import enhance_pdf_metadata, extract_csl_fields
+from pdf_metadata_enhancer.xmp import can_replace_packet, dublin_core_values
+
+METADATA = {
+    "DOI": "10.1234/xmp",
+    "title": "Title with <markup> & \x0bcontrol",
+    "author": [{"family": "Smith", "given": "John"}, {"literal": "Basel Archive"}],
+    "subject": ["History", "Basel"],
+    "publisher": "Stadt.Geschichte.Basel",
+    "abstract": "An abstract.",
+    "copyright": "CC BY 4.0",
+    "language": "de",
+}
+
+
+def _make_pdf(path, xmp=None, docinfo=None):
+    pdf = pikepdf.Pdf.new()
+    pdf.add_blank_page()
+    if xmp is not None:
+        pdf.Root.Metadata = pdf.make_stream(xmp)
+    for key, value in (docinfo or {}).items():
+        pdf.docinfo[key] = value
+    pdf.save(path)
+
+
+def _read_metadata(path):
+    with pikepdf.open(path) as pdf:
+        meta = pdf.open_metadata()
+        xmp = {key: meta[key] for key in meta if not key.endswith("MetadataDate")}
+        return xmp, {key: str(value) for key, value in pdf.docinfo.items()}
+
+
+def _enhance_both(input_pdf, tmp, metadata=METADATA):
+    fast, slow = tmp / "fast.pdf", tmp / "slow.pdf"
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        enhance_pdf_metadata(str(input_pdf), fast, metadata, fast_xmp=True)
+        enhance_pdf_metadata(str(input_pdf), slow, metadata, fast_xmp=False)
+    return _read_metadata(fast), _read_metadata(slow)
+
+
+def test_fast_path_matches_metadata_editor():
+    """Test that the direct packet gives the same XMP and InfoDict as the editor."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        input_pdf = tmp / "input.pdf"
+        _make_pdf(input_pdf, docinfo={"/Creator": "Word", "/Keywords": "old"})
+
+        (fast_xmp, fast_info), (slow_xmp, slow_info) = _enhance_both(input_pdf, tmp)
+        assert fast_xmp == slow_xmp
+        assert fast_info == slow_info
+        assert fast_info["/Title"] == "Title with <markup> & control"
+        assert fast_info["/Author"] == "John Smith; Basel Archive"
+        assert fast_xmp["{http://purl.org/dc/elements/1.1/}identifier"] == "doi:10.1234/xmp"
+
+        # Minimal metadata drops the InfoDict entries without XMP counterpart
+        (fast_xmp, fast_info), (slow_xmp, slow_info) = _enhance_both(
+            input_pdf, tmp, {"DOI": "10.1234/min", "title": "Minimal"}
+        )
+        assert fast_xmp == slow_xmp
+        assert fast_info == slow_info
+
+    print("✓ Fast path equivalence test passed")
+
+
+def test_fast_path_rewrites_own_packet():
+    """Test that a packet written by an earlier run is replaced directly."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        first = tmp / "first.pdf"
+        _make_pdf(tmp / "input.pdf")
+        enhance_pdf_metadata(str(tmp / "input.pdf"), first, METADATA)
+
+        with pikepdf.open(first) as pdf:
+            packet = pdf.Root.Metadata.read_bytes()
+        assert can_replace_packet(packet, dublin_core_values(extract_csl_fields(METADATA)))
+
+        updated = {**METADATA, "title": "Updated"}
+        (fast_xmp, fast_info), (slow_xmp, slow_info) = _enhance_both(first, tmp, updated)
+        assert fast_xmp == slow_xmp
+        assert fast_info == slow_info
+        assert fast_info["/Title"] == "Updated"
+
+    print("✓ Fast path packet rewrite test passed")
+
+
+def test_fallback_keeps_foreign_metadata():
+    """Test that packets with other namespaces or properties go through the editor."""
+    foreign = (
+        b'<x:xmpmeta xmlns:x="adobe:ns:meta/">'
+        b'<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+        b'<rdf:Description rdf:about="" xmlns:xmpMM="http://ns.adobe.com/xap/1.0/mm/"'
+        b' xmpMM:DocumentID="uuid:1234"/>'
+        b"</rdf:RDF></x:xmpmeta>"
+    )
+    extra_property = (
+        b'<x:xmpmeta xmlns:x="adobe:ns:meta/">'
+        b'<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+        b'<rdf:Description rdf:about="" xmlns:xmp="http://ns.adobe.com/xap/1.0/">'
+        b"<xmp:CreatorTool>LaTeX</xmp:CreatorTool>"
+        b"</rdf:Description></rdf:RDF></x:xmpmeta>"
+    )
+    dc_values = dublin_core_values(extract_csl_fields(METADATA))
+    assert not can_replace_packet(foreign, dc_values)
+    assert not can_replace_packet(extra_property, dc_values)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        input_pdf = tmp / "input.pdf"
+        _make_pdf(input_pdf, xmp=foreign)
+
+        (fast_xmp, fast_info), (slow_xmp, slow_info) = _enhance_both(input_pdf, tmp)
+        assert fast_xmp == slow_xmp
+        assert fast_info == slow_info
+        assert fast_xmp["{http://ns.adobe.com/xap/1.0/mm/}DocumentID"] == "uuid:1234"
+
+    print("✓ Fallback test passed")
+
+
+if __name__ == "__main__":
+    print("Running xmp module tests...\n")
+    test_fast_path_matches_metadata_editor()
+    test_fast_path_rewrites_own_packet()
+    test_fallback_keeps_foreign_metadata()
+    print("\n✓ All xmp tests passed!")